@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List
 
 
 class Settings(BaseSettings):
@@ -8,25 +9,96 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = True
 
-    # Database
+    # Database: DB_URL (any SQLAlchemy URL) wins over the MySQL parts below, e.g.
+    # sqlite:///./dutch_pay.db (file) or sqlite:// (in-memory, shared by the process)
+    DB_URL: str = ""
     DB_HOST: str = "localhost"
     DB_PORT: int = 3306
     DB_USER: str = "root"
     DB_PASSWORD: str = "root_password"
     DB_NAME: str = "dutch_pay"
+    DB_ECHO: bool = False  # Log every SQL statement (independent of DEBUG)
+
+    # Connection pool (per engine, per worker process). Every worker has two engines on
+    # the primary (sync and async), so it can open up to 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # connections; gunicorn.conf.py sizes WEB_CONCURRENCY to fit DB_MAX_CONNECTIONS
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5  # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0  # Wait for a free connection before failing the request
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Keep below MySQL wait_timeout
+    DB_POOL_PRE_PING: str = "idle"  # "always" (every checkout), "idle" (after being idle), "off"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30.0
+    DB_MAX_CONNECTIONS: int = 151  # The primary's max_connections (MySQL default 151)
+
+    # Schema version check at startup when migrations are pending:
+    # "fail" (refuse to start), "warn", or "off". Migrations run via app.scripts.migrate
+    DB_SCHEMA_CHECK: str = "fail"
+    READINESS_DB_TIMEOUT_SECONDS: float = 2.0
+
+    # Read replicas for GET routes (comma-separated SQLAlchemy URLs; empty = primary only)
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # Lagging replicas are skipped
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0  # Reads stay on the primary this long after a user writes
 
     # JWT
     JWT_SECRET_KEY: str = "your-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
 
+    # get_current_user cache (0 disables); bounds staleness across processes
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing (bcrypt in a separate process pool; 0 = run inline)
+    BCRYPT_ROUNDS: int = 12  # Existing hashes are upgraded on the next login
+    BCRYPT_POOL_SIZE: int = 2
+    BCRYPT_MAX_QUEUE: int = 16  # Calls waiting for the pool before new ones get a 503
+    BCRYPT_TIMEOUT_SECONDS: float = 10.0
+
+    # Settlement solver: "greedy" (<= N-1 transfers) or "exact" (minimum transfers)
+    SETTLEMENT_SOLVER: str = "greedy"
+    SETTLEMENT_SOLVER_TIME_BUDGET_MS: int = 50  # CPU time before exact falls back to greedy
+    SETTLEMENT_EXACT_MAX_PARTICIPANTS: int = 20
+    BALANCE_ENGINE_MIN_PARTICIPANTS: int = 100  # Use the integer-cent array engine from this size
+
+    # Badge catalog cache (explicitly invalidated on seed/edit; TTL covers other processes)
+    BADGE_CATALOG_TTL_SECONDS: int = 300
+
+    # Outbox work queue (badge evaluation + settlement recalculation after payments)
+    OUTBOX_WORKER_ENABLED: bool = True  # Run the in-process worker thread
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_COALESCE_WINDOW_MS: int = 200  # Wait after a wake-up so a burst is handled as one batch
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_LEASE_SECONDS: int = 60  # Claimed rows reappear after this if the worker dies
+    OUTBOX_MAX_ATTEMPTS: int = 5
+
+    # Uploads (avatars, receipts); streamed to disk, served under /uploads
+    UPLOAD_DIR: str = "uploads"
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 64 * 1024
+
     # Google OAuth
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
     GOOGLE_REDIRECT_URI: str = ""
+    GOOGLE_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_USERINFO_URL: str = "https://www.googleapis.com/oauth2/v2/userinfo"
+    GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    GOOGLE_HTTP_READ_TIMEOUT_SECONDS: float = 5.0
+    GOOGLE_HTTP_MAX_RETRIES: int = 2
+    GOOGLE_HTTP_MAX_CONNECTIONS: int = 20
+    GOOGLE_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures before failing fast
+    GOOGLE_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    @property
+    def DB_REPLICA_URL_LIST(self) -> List[str]:
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
 
     @property
     def DATABASE_URL(self) -> str:
+        if self.DB_URL:
+            return self.DB_URL
         return f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?charset=utf8mb4"
 
     class Config:
@@ -1,19 +1,154 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import itertools
+import logging
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.config import settings
+from app.db_pool import install_idle_pre_ping, pool_options, pool_status
+
+
+# Every in-memory SQLite URL maps to this one named database, so the sync
+# and async engines (and every session) of a process see the same tables
+SQLITE_MEMORY_URL = "sqlite:///file:dutch_pay?mode=memory&cache=shared&uri=true"
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def normalize_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return SQLITE_MEMORY_URL
+    return url
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict:
+    """Dialect-specific create_engine() keyword arguments."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if _is_sqlite_memory(parsed):
+            # One connection kept open for the process: closing the last one drops the database
+            options["poolclass"] = StaticPool
+        else:
+            options.update(pool_options(is_async))
+        return options
+
+    options = pool_options(is_async)
+    if backend == "mysql" and not is_async:
+        options["connect_args"] = {"charset": "utf8mb4"}
+    return options
+
+
+def _configure_sqlite(engine: Engine):
+    """Enforce foreign keys like InnoDB does; file databases use WAL so readers don't block the writer."""
+    memory = _is_sqlite_memory(engine.url)
+
+    @event.listens_for(engine.pool, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if not memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+
+def _create_engine(url: str) -> Engine:
+    url = normalize_url(url)
+    created = create_engine(url, echo=settings.DB_ECHO, **engine_options(url))
+    if created.dialect.name == "sqlite":
+        _configure_sqlite(created)
+    install_idle_pre_ping(created)
+    return created
+
+
+engine = _create_engine(settings.DATABASE_URL)
+
+logger = logging.getLogger(__name__)
+
+# Statements executed inside the current query_budget() block (None outside)
+_query_count: ContextVar[Optional[list]] = ContextVar("query_count", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def query_budget(limit: int, label: str):
+    """
+    Enforce a maximum number of SQL statements for a block (e.g. a read path
+    with an eager-loading plan). Raises in DEBUG so N+1 regressions fail loudly,
+    logs a warning otherwise.
+    """
+    counter = [0]
+    token = _query_count.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_count.reset(token)
+
+    if counter[0] > limit:
+        message = f"{label}: {counter[0]} queries (budget {limit})"
+        if settings.DEBUG:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.DEBUG,
-    connect_args={"charset": "utf8mb4"}
-)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the same databases (mysql+pymysql -> mysql+aiomysql, tests: sqlite -> aiosqlite)
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """The async-driver equivalent of a sync SQLAlchemy URL."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    url = to_async_url(normalize_url(url))
+    created = create_async_engine(url, echo=settings.DB_ECHO, **engine_options(url, is_async=True))
+    if created.dialect.name == "sqlite":
+        _configure_sqlite(created.sync_engine)
+    install_idle_pre_ping(created.sync_engine)
+    return created
+
+
+async_engine = _create_async_engine(settings.DATABASE_URL)
+
+# Same session semantics as SessionLocal. Async routes run the existing sync
+# service code on it via `await db.run_sync(fn, ...)`, so only the I/O is async
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
 Base = declarative_base()
 
 
@@ -26,12 +161,135 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Initialize database tables."""
-    from app.models import (
-        User, Avatar, UserBadge,
-        Group, GroupParticipant,
-        Settlement, SettlementParticipant, SettlementResult,
-        Badge, GameResult
-    )
-    Base.metadata.create_all(bind=engine)
+async def get_async_db():
+    """Dependency for async routes: an AsyncSession on the primary."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class ReadReplicaRouter:
+    """
+    Picks the session factory for read-only requests.
+
+    Replicas (DB_REPLICA_URLS) are used round-robin while their replication
+    lag is at most DB_REPLICA_MAX_LAG_SECONDS; lag is sampled at most every
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS per replica, and a replica that
+    can't be checked counts as lagging. With no healthy replica, reads go
+    to the primary. Callers that just wrote ask for the primary themselves
+    (see track_user_writes), so they always see their own change.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [
+            sessionmaker(autocommit=False, autoflush=False, bind=_create_engine(url))
+            for url in urls
+        ]
+        self.async_replicas = [
+            async_sessionmaker(_create_async_engine(url), autoflush=False)
+            for url in urls
+        ]
+        self._round_robin = itertools.count()
+        self._lock = threading.Lock()
+        self._lag_checked_at: Dict[int, float] = {}
+        self._healthy: Dict[int, bool] = {}
+
+    def _replica_lag(self, index: int) -> Optional[float]:
+        """Seconds behind the primary, or None when unknown (broken replication, unreachable)."""
+        engine = self.replicas[index].kw["bind"]
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name != "mysql":
+                    return 0.0
+                row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                if row is None:
+                    return None
+                lag = row.get("Seconds_Behind_Source")
+                return float(lag) if lag is not None else None
+        except Exception as exc:
+            logger.warning("Replica %s lag check failed: %s", index, exc)
+            return None
+
+    def _is_healthy(self, index: int, blocking: bool = True) -> bool:
+        """
+        Cached health of a replica. When a re-check is due it runs inline, or
+        with blocking=False (event loop callers) in a background thread while
+        the previous answer is used.
+        """
+        now = time.monotonic()
+        with self._lock:
+            checked_at = self._lag_checked_at.get(index)
+            previous = self._healthy.get(index, False)
+            if checked_at is not None and now - checked_at < settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS:
+                return previous
+            # Claim the check; concurrent requests keep using the previous answer meanwhile
+            self._lag_checked_at[index] = now
+
+        if not blocking:
+            threading.Thread(target=self._refresh_health, args=(index, previous), daemon=True).start()
+            return previous
+        return self._refresh_health(index, previous)
+
+    def _refresh_health(self, index: int, previous: bool) -> bool:
+        lag = self._replica_lag(index)
+        healthy = lag is not None and lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        with self._lock:
+            self._healthy[index] = healthy
+        if healthy != previous:
+            logger.warning("Replica %s %s (lag=%s)", index, "in rotation" if healthy else "out of rotation", lag)
+        return healthy
+
+    def _pick(self, primary: bool, blocking: bool) -> Optional[int]:
+        """Index of the replica to read from, or None for the primary."""
+        if not self.replicas or primary:
+            return None
+        start = next(self._round_robin)
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            if self._is_healthy(index, blocking):
+                return index
+        return None
+
+    def session_factory(self, primary: bool = False) -> sessionmaker:
+        index = self._pick(primary, blocking=True)
+        return SessionLocal if index is None else self.replicas[index]
+
+    def async_session_factory(self, primary: bool = False) -> async_sessionmaker:
+        index = self._pick(primary, blocking=False)
+        return AsyncSessionLocal if index is None else self.async_replicas[index]
+
+
+read_router = ReadReplicaRouter(settings.DB_REPLICA_URL_LIST)
+
+
+def get_read_db(request: Request):
+    """
+    Dependency for read-only routes: a replica session when one is healthy
+    and the caller hasn't just written, otherwise the primary. Never write
+    through it. request.state.read_from_primary is set by the write-tracking
+    middleware from the caller's recent-write cookie.
+    """
+    db = read_router.session_factory(getattr(request.state, "read_from_primary", False))()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Async counterpart of get_read_db (replica health is never checked on the event loop)."""
+    async with read_router.async_session_factory(getattr(request.state, "read_from_primary", False))() as db:
+        yield db
+
+
+def pool_metrics() -> Dict[str, Dict]:
+    """Pool state and checkout wait statistics for every engine in this process."""
+    metrics = {
+        "primary": pool_status(engine),
+        "primary_async": pool_status(async_engine.sync_engine),
+    }
+    for index, factory in enumerate(read_router.replicas):
+        metrics[f"replica_{index}"] = pool_status(factory.kw["bind"])
+    for index, factory in enumerate(read_router.async_replicas):
+        metrics[f"replica_{index}_async"] = pool_status(factory.kw["bind"].sync_engine)
+    return metrics
+
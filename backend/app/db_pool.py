@@ -0,0 +1,158 @@
+"""
+Connection pool configuration and metrics.
+
+Pool sizing, timeouts, recycling and the pre-ping strategy come from
+Settings (DB_POOL_*). Engines use instrumented QueuePool subclasses that
+time every checkout, so /metrics/db-pool can tell pool exhaustion (long
+waits, timeouts, overflow in use) apart from slow queries.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+PRE_PING_STRATEGIES = {"always", "idle", "off"}
+
+
+class PoolMetrics:
+    """Checkout wait statistics for one pool (totals plus a rolling window for percentiles)."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._recent.append(seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts, timeouts = self.checkouts, self.timeouts
+            total_wait, max_wait = self.total_wait, self.max_wait
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p * len(recent)))]
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_avg": round(total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_ms_max": round(max_wait * 1000, 3),
+            "wait_ms_p50_recent": round(percentile(0.50) * 1000, 3),
+            "wait_ms_p95_recent": round(percentile(0.95) * 1000, 3),
+            "wait_ms_p99_recent": round(percentile(0.99) * 1000, 3),
+        }
+
+
+class _TimedCheckoutMixin:
+    """Times QueuePool._do_get: the wait for a free (or new overflow) connection."""
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        metrics = self.__dict__.get("_metrics")
+        if metrics is None:
+            metrics = self.__dict__["_metrics"] = PoolMetrics()
+        return metrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(is_async: bool = False) -> Dict[str, Any]:
+    """create_engine()/create_async_engine() pool keyword arguments from Settings."""
+    strategy = settings.DB_POOL_PRE_PING
+    if strategy not in PRE_PING_STRATEGIES:
+        raise ValueError(f"DB_POOL_PRE_PING must be one of {sorted(PRE_PING_STRATEGIES)}, got {strategy!r}")
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": strategy == "always",
+    }
+
+
+def install_idle_pre_ping(engine: Engine):
+    """
+    DB_POOL_PRE_PING=idle: ping only connections that sat in the pool for
+    longer than DB_POOL_PRE_PING_IDLE_SECONDS, instead of on every checkout.
+    A failed ping makes the pool discard the connection and open a new one.
+    """
+    if settings.DB_POOL_PRE_PING != "idle":
+        return
+    pool = engine.pool
+
+    @event.listens_for(pool, "checkin")
+    def _mark_idle(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(pool, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.DB_POOL_PRE_PING_IDLE_SECONDS:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        except Exception as error:
+            raise exc.DisconnectionError(str(error))
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Live pool state plus checkout wait statistics for one (sync) engine."""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # QueuePool.overflow() counts from -size; only connections beyond size are overflow
+            "overflow_in_use": max(0, pool.overflow()),
+            "timeout_seconds": pool.timeout(),
+        })
+    if isinstance(pool, _TimedCheckoutMixin):
+        status.update(pool.metrics.snapshot())
+    return status
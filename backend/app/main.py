@@ -1,11 +1,22 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import math
+
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 from app.config import settings
-from app.database import init_db
+from app.database import async_engine, engine, pool_metrics, read_router
+from app.migrations import HEAD, current_version
 from app.routers import auth, users, groups, settlements, games, badges, ai
+from app.services.auth import RECENT_WRITE_COOKIE, recent_write_token, user_id_from_authorization, wrote_recently
+from app.services.google_oauth import google_oauth_client
+from app.services.password_hasher import password_hasher
+from app.services.uploads import UploadFiles, UploadSizeLimit
+from app.services.work_queue import outbox_worker
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -15,6 +26,10 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Multipart bodies are cut off at the upload limit while streaming, not after spooling
+# (added first, so CORS wraps it and a 413 still carries CORS headers)
+app.add_middleware(UploadSizeLimit)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,8 +40,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@app.middleware("http")
+async def track_user_writes(request: Request, call_next):
+    """
+    Read-your-writes for replica routing. A successful write sets a short-lived
+    signed cookie; while it is valid, get_read_db sends the caller's reads to
+    the primary. The cookie travels with the client, so it holds across
+    workers and hosts.
+    """
+    if not read_router.replicas:
+        return await call_next(request)
+
+    user_id = user_id_from_authorization(request.headers.get("authorization"))
+    request.state.read_from_primary = wrote_recently(request.cookies.get(RECENT_WRITE_COOKIE), user_id)
+    response = await call_next(request)
+    if user_id is not None and request.method not in READ_METHODS and response.status_code < 400:
+        response.set_cookie(
+            RECENT_WRITE_COOKIE,
+            recent_write_token(user_id),
+            max_age=math.ceil(settings.DB_READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -36,16 +80,59 @@ app.include_router(games.router)
 app.include_router(badges.router)
 app.include_router(ai.router)
 
-# Mount static files for uploaded avatars
-uploads_dir = Path("uploads")
+# Mount static files for uploaded avatars and receipts
+uploads_dir = Path(settings.UPLOAD_DIR)
 uploads_dir.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", UploadFiles(directory=uploads_dir), name="uploads")
+
+
+# Served by /ready: not ready until startup finished, and again once shutdown begins
+readiness = {"started": False, "draining": False}
+
+
+def check_schema_version():
+    """
+    One cheap query instead of reflecting the schema: refuse to start (or
+    warn) when migrations are pending. An unreachable database doesn't
+    block startup; /ready reports it until the database is back.
+    """
+    if settings.DB_SCHEMA_CHECK == "off":
+        return
+    try:
+        with engine.connect() as conn:
+            version = current_version(conn)
+    except Exception as exc:
+        logger.warning("Schema version check skipped, database unavailable: %s", exc)
+        return
+    if version < HEAD:
+        message = f"Database schema is at version {version}, code expects {HEAD}: run python -m app.scripts.migrate"
+        if settings.DB_SCHEMA_CHECK == "fail":
+            raise RuntimeError(message)
+        logger.warning(message)
 
 
 @app.on_event("startup")
 def on_startup():
-    """Initialize database tables on startup."""
-    init_db()
+    """Check the schema version and start background services (no DDL here)."""
+    check_schema_version()
+    google_oauth_client.start()
+    if settings.OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+    readiness.update(started=True, draining=False)
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """Let the outbox worker finish its current batch and stop the bcrypt pool."""
+    readiness["draining"] = True
+    outbox_worker.stop()
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close pooled upstream connections."""
+    await google_oauth_client.aclose()
 
 
 @app.get("/")
@@ -59,6 +146,45 @@ def root():
 
 
 @app.get("/health")
-def health_check():
-    """Health check for container orchestration."""
+async def health_check():
+    """Liveness check for container orchestration (no I/O; see /ready for readiness)."""
     return {"status": "healthy"}
+
+
+async def _database_ready() -> bool:
+    async with async_engine.connect() as conn:
+        if settings.DB_SCHEMA_CHECK == "off":
+            await conn.exec_driver_sql("SELECT 1")
+            return True
+        return await conn.run_sync(current_version) >= HEAD
+
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness probe, separate from /health (liveness): 503 until startup
+    has finished, once shutdown has begun, or while the database is
+    unreachable or behind the code's schema version.
+    """
+    if not readiness["started"] or readiness["draining"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting" if not readiness["started"] else "draining"}
+    try:
+        database_ready = await asyncio.wait_for(_database_ready(), settings.READINESS_DB_TIMEOUT_SECONDS)
+    except Exception as exc:
+        logger.warning("Readiness check failed: %r", exc)
+        database_ready = False
+    if not database_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "database unavailable"}
+    return {"status": "ready"}
+
+
+@app.get("/metrics/db-pool")
+async def db_pool_metrics():
+    """
+    Connection pool state for this worker process: checked-out connections,
+    overflow in use, and checkout wait times / timeouts. Runs on the event
+    loop, so it still answers when the threadpool or the pools are exhausted.
+    """
+    return pool_metrics()
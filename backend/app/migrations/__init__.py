@@ -0,0 +1,91 @@
+"""
+Versioned schema migrations.
+
+Each migration is a module vNNNN_<name>.py with an upgrade(conn) function,
+listed in MIGRATIONS in order. Applied versions are recorded in the
+schema_migrations table; `python -m app.scripts.migrate` applies the
+pending ones. MySQL commits DDL implicitly, so a migration that fails
+half-way is not rolled back: every upgrade() checks what already exists
+and is safe to run again.
+
+Every schema change goes through a migration, so "at HEAD" means the
+schema matches the models (the startup check and /ready rely on it).
+Migrations describe their own tables and columns (see ops.py) and never
+import the models, which keep changing after the migration is written.
+"""
+
+import logging
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.migrations import (
+    v0001_baseline,
+    v0002_composite_indexes,
+    v0003_upload_blobs,
+    v0004_group_versions,
+    v0005_participant_balances,
+    v0006_outbox_events,
+    v0007_badge_progress,
+    v0008_settlement_history_index,
+    v0009_balance_version,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", v0001_baseline.upgrade),
+    Migration(2, "composite_indexes", v0002_composite_indexes.upgrade),
+    Migration(3, "upload_blobs", v0003_upload_blobs.upgrade),
+    Migration(4, "group_versions", v0004_group_versions.upgrade),
+    Migration(5, "participant_balances", v0005_participant_balances.upgrade),
+    Migration(6, "outbox_events", v0006_outbox_events.upgrade),
+    Migration(7, "badge_progress", v0007_badge_progress.upgrade),
+    Migration(8, "settlement_history_index", v0008_settlement_history_index.upgrade),
+    Migration(9, "balance_version", v0009_balance_version.upgrade),
+]
+
+HEAD = MIGRATIONS[-1].version
+
+# Kept off Base.metadata: only the migration runner creates and writes it
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def current_version(conn: Connection) -> int:
+    """Highest applied version (0 for a database the runner has never touched)."""
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to `target` (default: HEAD), each in its own transaction."""
+    target = HEAD if target is None else target
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        version = current_version(conn)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version or migration.version > target:
+            continue
+        logger.info("Applying migration %04d_%s", migration.version, migration.name)
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(version=migration.version, name=migration.name))
+        applied.append(migration)
+    return applied
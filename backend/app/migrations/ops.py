@@ -0,0 +1,47 @@
+"""
+Schema operations for migrations.
+
+Migrations describe their tables and columns here instead of importing
+the models, so what a migration does never changes when the models do.
+Every operation checks the live schema first and is a no-op when the
+change is already there.
+"""
+
+from typing import List
+
+from sqlalchemy import Column, Index, Integer, MetaData, Table, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+
+def quote(conn: Connection, name: str) -> str:
+    """Quote an identifier for the dialect (GROUPS is reserved in MySQL 8 and SQLite)."""
+    return conn.dialect.identifier_preparer.quote_identifier(name)
+
+
+def has_table(conn: Connection, table_name: str) -> bool:
+    return inspect(conn).has_table(table_name)
+
+
+def create_table(conn: Connection, table: Table):
+    table.create(bind=conn, checkfirst=True)
+
+
+def add_column(conn: Connection, table_name: str, column: Column):
+    """ALTER TABLE ... ADD COLUMN unless the column exists."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    if column.name in existing:
+        return
+    Table(table_name, MetaData(), column)
+    spec = CreateColumn(column).compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {quote(conn, table_name)} ADD COLUMN {spec}")
+
+
+def create_index(conn: Connection, table_name: str, name: str, columns: List[str], unique: bool = False):
+    """CREATE INDEX unless an index with that name exists on the table."""
+    existing = {index["name"] for index in inspect(conn).get_indexes(table_name)}
+    if name in existing:
+        return
+    # Only the column names matter for CREATE INDEX
+    table = Table(table_name, MetaData(), *(Column(column, Integer) for column in columns))
+    Index(name, *(table.c[column] for column in columns), unique=unique).create(bind=conn)
@@ -0,0 +1,146 @@
+"""
+Baseline: the schema as it was when versioned migrations were introduced.
+
+This is a frozen snapshot, not the current models: every later change is
+a numbered migration of its own. On a fresh database it creates the
+baseline tables; on an existing one it only creates the tables that are
+missing and adds users.full_body_photo_url, which older databases got
+from scripts/migrate_avatar.py.
+"""
+
+from sqlalchemy import (
+    JSON, Boolean, Column, DateTime, Enum, ForeignKey, Integer, MetaData, Numeric, String, Table, Text, func,
+)
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import add_column
+
+metadata = MetaData()
+
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(255), unique=True, index=True, nullable=False),
+    Column("password_hash", String(255), nullable=True),
+    Column("name", String(100), nullable=False),
+    Column("auth_provider", Enum("EMAIL", "GOOGLE", name="authprovider")),
+    Column("google_id", String(100), unique=True, nullable=True),
+    Column("payment_method", String(50), nullable=True),
+    Column("payment_account", String(100), nullable=True),
+    Column("profile_photo_url", String(255), nullable=True),
+    Column("full_body_photo_url", String(255), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+avatars = Table(
+    "avatars", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), unique=True, nullable=False),
+    Column("body", String(50)),
+    Column("eyes", String(50)),
+    Column("mouth", String(50)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+badges = Table(
+    "badges", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(100), unique=True, nullable=False),
+    Column("description", Text, nullable=True),
+    Column("icon", String(255), nullable=True),
+    Column("badge_type", String(50)),
+    Column("condition_code", String(100), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+groups = Table(
+    "groups", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(100), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("icon", String(255), nullable=True),
+    Column("invite_code", String(20), unique=True),
+    Column("owner_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+user_badges = Table(
+    "user_badges", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("badge_id", Integer, ForeignKey("badges.id"), nullable=False),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=True),
+    Column("earned_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+group_participants = Table(
+    "group_participants", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("name", String(100), nullable=False),
+    Column("is_admin", Boolean),
+    Column("joined_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+settlements = Table(
+    "settlements", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=False),
+    Column("payer_participant_id", Integer, ForeignKey("group_participants.id"), nullable=False),
+    Column("title", String(200), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("total_amount", Numeric(12, 2), nullable=False),
+    Column("split_type", Enum("EQUAL", "AMOUNT", "RATIO", name="splittype")),
+    Column("icon", String(255), nullable=True),
+    Column("receipt_image", String(500), nullable=True),
+    Column("is_settled", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+settlement_participants = Table(
+    "settlement_participants", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("settlement_id", Integer, ForeignKey("settlements.id"), nullable=False),
+    Column("participant_id", Integer, ForeignKey("group_participants.id"), nullable=False),
+    Column("amount", Numeric(12, 2), nullable=True),
+    Column("ratio", Numeric(5, 2), nullable=True),
+    Column("amount_owed", Numeric(12, 2), nullable=False),
+    Column("is_paid", Boolean),
+    Column("paid_at", DateTime(timezone=True), nullable=True),
+)
+
+settlement_results = Table(
+    "settlement_results", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=False),
+    Column("debtor_participant_id", Integer, ForeignKey("group_participants.id"), nullable=False),
+    Column("creditor_participant_id", Integer, ForeignKey("group_participants.id"), nullable=False),
+    Column("amount", Numeric(12, 2), nullable=False),
+    Column("is_completed", Boolean),
+    Column("completed_at", DateTime(timezone=True), nullable=True),
+    Column("calculation_batch", String(50), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+game_results = Table(
+    "game_results", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=False),
+    Column("game_type", Enum("PINBALL_ROULETTE", "BOMB", "PSYCHOLOGICAL", name="gametype"), nullable=False),
+    Column("participants", JSON, nullable=False),
+    Column("loser_participant_id", Integer, ForeignKey("group_participants.id"), nullable=False),
+    Column("amount", Numeric(12, 2), nullable=False),
+    Column("settlement_id", Integer, ForeignKey("settlements.id"), nullable=True),
+    Column("game_data", JSON, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def upgrade(conn: Connection):
+    metadata.create_all(bind=conn, checkfirst=True)
+    add_column(conn, "users", Column("full_body_photo_url", String(255), nullable=True))
@@ -0,0 +1,32 @@
+"""
+Composite indexes for the hot query shapes:
+
+- settlements (group_id, is_settled, created_at)
+- settlement_participants (settlement_id), (participant_id)
+- settlement_results (group_id, is_completed, debtor_participant_id, creditor_participant_id)
+- group_participants (group_id, user_id), (user_id, group_id)
+- user_badges (user_id, group_id, badge_id), (group_id, badge_id, user_id)
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_index
+
+INDEXES = [
+    ("settlements", "ix_settlements_group_settled_created", ["group_id", "is_settled", "created_at"]),
+    ("settlement_participants", "ix_settlement_participants_settlement_id", ["settlement_id"]),
+    ("settlement_participants", "ix_settlement_participants_participant_id", ["participant_id"]),
+    (
+        "settlement_results", "ix_settlement_results_group_completed_pair",
+        ["group_id", "is_completed", "debtor_participant_id", "creditor_participant_id"],
+    ),
+    ("group_participants", "ix_group_participants_group_user", ["group_id", "user_id"]),
+    ("group_participants", "ix_group_participants_user_group", ["user_id", "group_id"]),
+    ("user_badges", "ix_user_badges_user_group_badge", ["user_id", "group_id", "badge_id"]),
+    ("user_badges", "ix_user_badges_group_badge_user", ["group_id", "badge_id", "user_id"]),
+]
+
+
+def upgrade(conn: Connection):
+    for table_name, index_name, columns in INDEXES:
+        create_index(conn, table_name, index_name, columns)
@@ -0,0 +1,26 @@
+"""
+upload_blobs: reference counts for the content-addressed upload store.
+
+Files uploaded before this migration keep their uuid names and URLs; they
+are not tracked, so garbage collection never touches them.
+"""
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, func
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_table
+
+upload_blobs = Table(
+    "upload_blobs", MetaData(),
+    Column("id", Integer, primary_key=True, index=True),
+    Column("sha256", String(64), unique=True, nullable=False),
+    Column("url", String(255), nullable=False),
+    Column("ref_count", Integer, nullable=False, server_default="0"),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime, nullable=False, server_default=func.now()),
+    Index("ix_upload_blobs_ref_count_updated", "ref_count", "updated_at"),
+)
+
+
+def upgrade(conn: Connection):
+    create_table(conn, upload_blobs)
@@ -0,0 +1,16 @@
+"""
+groups.version / groups.results_version for ETags and the results cache.
+
+results_version starts as NULL, so each group's settlement results are
+recomputed once on the next GET /groups/{id}/results.
+"""
+
+from sqlalchemy import Column, Integer
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import add_column
+
+
+def upgrade(conn: Connection):
+    add_column(conn, "groups", Column("version", Integer, nullable=False, server_default="0"))
+    add_column(conn, "groups", Column("results_version", Integer, nullable=True))
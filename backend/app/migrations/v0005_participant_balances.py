@@ -0,0 +1,114 @@
+"""
+participant_balances: the per-participant balance ledger, rebuilt from
+history for every group.
+
+A balance is what the participant paid for unsettled expenses, minus
+their shares of them, plus completed transfers they paid, minus completed
+transfers they received. Amounts are summed as integer cents, rounded per
+row the way Numeric(12, 2) stores them. The rebuild replaces whatever the
+table holds, so running it again gives the same result.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Tuple
+
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, MetaData, Numeric, Table, cast, column, delete,
+    func, insert, select, table,
+)
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_table
+
+metadata = MetaData()
+# Referenced tables, so the foreign keys resolve; only participant_balances is created
+Table("groups", metadata, Column("id", Integer, primary_key=True))
+Table("group_participants", metadata, Column("id", Integer, primary_key=True))
+
+participant_balances = Table(
+    "participant_balances", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=False, index=True),
+    Column("participant_id", Integer, ForeignKey("group_participants.id"), unique=True, nullable=False),
+    Column("balance", Numeric(12, 2), nullable=False),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+settlements = table(
+    "settlements",
+    column("id", Integer),
+    column("group_id", Integer),
+    column("payer_participant_id", Integer),
+    column("total_amount", Numeric(12, 2)),
+    column("is_settled", Boolean),
+)
+settlement_participants = table(
+    "settlement_participants",
+    column("settlement_id", Integer),
+    column("participant_id", Integer),
+    column("amount_owed", Numeric(12, 2)),
+)
+settlement_results = table(
+    "settlement_results",
+    column("group_id", Integer),
+    column("debtor_participant_id", Integer),
+    column("creditor_participant_id", Integer),
+    column("amount", Numeric(12, 2)),
+    column("is_completed", Boolean),
+)
+
+
+def _cents_sum(amount):
+    return cast(func.sum(cast(func.round(amount * 100), BigInteger)), BigInteger)
+
+
+def balances_from_history(conn: Connection) -> Dict[Tuple[int, int], int]:
+    """(group_id, participant_id) -> balance in cents, for every group."""
+    balances: Dict[Tuple[int, int], int] = defaultdict(int)
+
+    def add(query, sign: int):
+        for group_id, participant_id, cents in conn.execute(query):
+            balances[(group_id, participant_id)] += sign * int(cents or 0)
+
+    s, sp, r = settlements.c, settlement_participants.c, settlement_results.c
+    # Payer paid the full amount, so they should receive their share back
+    add(
+        select(s.group_id, s.payer_participant_id, _cents_sum(s.total_amount))
+        .where(s.is_settled == False)
+        .group_by(s.group_id, s.payer_participant_id),
+        1,
+    )
+    # Each participant owes their share
+    add(
+        select(s.group_id, sp.participant_id, _cents_sum(sp.amount_owed))
+        .select_from(settlement_participants.join(settlements, s.id == sp.settlement_id))
+        .where(s.is_settled == False)
+        .group_by(s.group_id, sp.participant_id),
+        -1,
+    )
+    # Completed transfers: the debtor paid the creditor back
+    completed = r.is_completed == True
+    add(
+        select(r.group_id, r.debtor_participant_id, _cents_sum(r.amount))
+        .where(completed).group_by(r.group_id, r.debtor_participant_id),
+        1,
+    )
+    add(
+        select(r.group_id, r.creditor_participant_id, _cents_sum(r.amount))
+        .where(completed).group_by(r.group_id, r.creditor_participant_id),
+        -1,
+    )
+    return balances
+
+
+def upgrade(conn: Connection):
+    create_table(conn, participant_balances)
+
+    balances = balances_from_history(conn)
+    conn.execute(delete(participant_balances))
+    if balances:
+        conn.execute(insert(participant_balances), [
+            {"group_id": group_id, "participant_id": participant_id, "balance": Decimal(cents).scaleb(-2)}
+            for (group_id, participant_id), cents in sorted(balances.items())
+        ])
@@ -0,0 +1,30 @@
+"""
+outbox_events: deferred badge evaluation and settlement recalculation,
+processed by the outbox worker.
+"""
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text, func
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_table
+
+metadata = MetaData()
+Table("groups", metadata, Column("id", Integer, primary_key=True))
+
+outbox_events = Table(
+    "outbox_events", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("kind", String(50), nullable=False),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=False, index=True),
+    Column("payload", JSON, nullable=True),
+    Column("attempts", Integer, nullable=False, server_default="0"),
+    Column("last_error", Text, nullable=True),
+    Column("available_at", DateTime, nullable=False, server_default=func.now()),
+    Column("processed_at", DateTime, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_outbox_events_pending", "processed_at", "available_at", "id"),
+)
+
+
+def upgrade(conn: Connection):
+    create_table(conn, outbox_events)
@@ -0,0 +1,95 @@
+"""
+badge_progress: per-(group, user) counters for the badge rule engine,
+with the mini-game win counters ("game_wins") backfilled from
+game_results. Users who already have GAME_MASTER_WINS wins get the
+game_master badge when it is seeded; otherwise they get it from the rule
+engine on their next game. The backfill replaces existing game_wins rows,
+so running it again gives the same result.
+"""
+
+from collections import Counter
+
+from sqlalchemy import (
+    JSON, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, UniqueConstraint, column, delete, func,
+    insert, select, table, update,
+)
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_table
+
+GAME_WINS_METRIC = "game_wins"
+GAME_MASTER_CODE = "game_master"
+GAME_MASTER_WINS = 3
+
+metadata = MetaData()
+Table("groups", metadata, Column("id", Integer, primary_key=True))
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+badge_progress = Table(
+    "badge_progress", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("group_id", Integer, ForeignKey("groups.id"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("metric", String(50), nullable=False),
+    Column("value", Integer, nullable=False),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    UniqueConstraint("group_id", "user_id", "metric", name="uq_badge_progress_group_user_metric"),
+)
+
+game_results = table(
+    "game_results", column("group_id", Integer), column("participants", JSON), column("loser_participant_id", Integer),
+)
+group_participants = table("group_participants", column("id", Integer), column("user_id", Integer))
+badges = table("badges", column("id", Integer), column("condition_code", String))
+user_badges = table("user_badges", column("user_id", Integer), column("badge_id", Integer), column("group_id", Integer))
+groups = table("groups", column("id", Integer), column("version", Integer))
+
+
+def game_wins(conn: Connection) -> Counter:
+    """(group_id, user_id) -> games the user played in the group and did not lose."""
+    users = dict(conn.execute(
+        select(group_participants.c.id, group_participants.c.user_id)
+        .where(group_participants.c.user_id.isnot(None))
+    ).all())
+
+    wins = Counter()
+    g = game_results.c
+    for group_id, participants, loser_participant_id in conn.execute(
+        select(g.group_id, g.participants, g.loser_participant_id)
+    ):
+        winners = {users[pid] for pid in participants or [] if pid != loser_participant_id and pid in users}
+        for user_id in winners:
+            wins[(group_id, user_id)] += 1
+    return wins
+
+
+def upgrade(conn: Connection):
+    create_table(conn, badge_progress)
+
+    wins = game_wins(conn)
+    conn.execute(delete(badge_progress).where(badge_progress.c.metric == GAME_WINS_METRIC))
+    if wins:
+        conn.execute(insert(badge_progress), [
+            {"group_id": group_id, "user_id": user_id, "metric": GAME_WINS_METRIC, "value": count}
+            for (group_id, user_id), count in sorted(wins.items())
+        ])
+
+    badge_id = conn.execute(select(badges.c.id).where(badges.c.condition_code == GAME_MASTER_CODE)).scalar()
+    if badge_id is None:
+        return
+    held = set(conn.execute(
+        select(user_badges.c.group_id, user_badges.c.user_id).where(user_badges.c.badge_id == badge_id)
+    ).all())
+    awards = [
+        {"user_id": user_id, "badge_id": badge_id, "group_id": group_id}
+        for (group_id, user_id), count in sorted(wins.items())
+        if count >= GAME_MASTER_WINS and (group_id, user_id) not in held
+    ]
+    if awards:
+        conn.execute(insert(user_badges), awards)
+        # Badges are shown on the group screens: invalidate their ETags
+        conn.execute(
+            update(groups)
+            .where(groups.c.id.in_({award["group_id"] for award in awards}))
+            .values(version=groups.c.version + 1)
+        )
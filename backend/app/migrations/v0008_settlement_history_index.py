@@ -0,0 +1,12 @@
+"""
+settlements (group_id, created_at, id): keyset pagination of a group's
+settlement history.
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_index
+
+
+def upgrade(conn: Connection):
+    create_index(conn, "settlements", "ix_settlements_group_created_id", ["group_id", "created_at", "id"])
@@ -0,0 +1,18 @@
+"""
+groups.balance_version: the settlement results cache follows balance
+changes only, while groups.version (ETags) also follows profile, member
+and badge changes. results_version is reset so every group's results are
+recomputed once against the new counter.
+"""
+
+from sqlalchemy import Column, Integer, column, table, update
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import add_column
+
+groups = table("groups", column("results_version", Integer))
+
+
+def upgrade(conn: Connection):
+    add_column(conn, "groups", Column("balance_version", Integer, nullable=False, server_default="0"))
+    conn.execute(update(groups).values(results_version=None))
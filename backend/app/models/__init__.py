@@ -1,8 +1,10 @@
 from app.models.user import User, UserBadge, Avatar
 from app.models.group import Group, GroupParticipant
-from app.models.settlement import Settlement, SettlementParticipant, SettlementResult
-from app.models.badge import Badge
+from app.models.settlement import Settlement, SettlementParticipant, SettlementResult, ParticipantBalance
+from app.models.badge import Badge, BadgeProgress
 from app.models.game import GameResult
+from app.models.outbox import OutboxEvent
+from app.models.upload import UploadBlob
 
 __all__ = [
     "User",
@@ -13,6 +15,10 @@ __all__ = [
     "Settlement",
     "SettlementParticipant",
     "SettlementResult",
+    "ParticipantBalance",
     "Badge",
+    "BadgeProgress",
     "GameResult",
+    "OutboxEvent",
+    "UploadBlob",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -21,6 +21,25 @@ class Badge(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class BadgeProgress(Base):
+    """
+    Incremental per-(group, user) counters kept by the badge rule engine,
+    e.g. mini-game wins, so rules never rescan history.
+    """
+    __tablename__ = "badge_progress"
+    __table_args__ = (
+        UniqueConstraint("group_id", "user_id", "metric", name="uq_badge_progress_group_user_metric"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    metric = Column(String(50), nullable=False)
+    value = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 # Predefined badges:
 # - game_master: 게임 마스터 (미니게임 3회 이상 승리)
 # - penny_pincher: 구두쇠 (한 달간 결제 0회)
@@ -36,3 +55,5 @@ GROUP_BADGE_USE_MY_CARD = "use_my_card"
 GROUP_BADGE_MR_KRABS = "mr_krabs"
 GROUP_BADGE_KRABBY_PATTY_VIP = "krabby_patty_vip"
 GROUP_BADGE_NO_COIN_SQUIDWARD = "no_coin_squidward"
+GROUP_BADGE_GAME_MASTER = "game_master"
+GROUP_BADGE_QUICK_SETTLER = "quick_settler"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import secrets
@@ -23,6 +23,14 @@ class Group(Base):
 
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+    # Bumped on every write that changes what the group screens show
+    # (balances, settlements, members, badges). Used for ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped only when a participant balance changes; stored settlement
+    # results are recomputed only when results_version falls behind it
+    balance_version = Column(Integer, nullable=False, default=0, server_default="0")
+    results_version = Column(Integer, nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -34,6 +42,12 @@ class Group(Base):
 
 class GroupParticipant(Base):
     __tablename__ = "group_participants"
+    __table_args__ = (
+        # Members of a group / membership checks for a user in a group
+        Index("ix_group_participants_group_user", "group_id", "user_id"),
+        # A user's groups (group list, membership subqueries)
+        Index("ix_group_participants_user_group", "user_id", "group_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    Deferred side effects (badge evaluation, settlement recalculation),
+    written in the same transaction as the change that caused them and
+    processed at least once by the outbox worker.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Worker poll: pending rows whose lease/backoff has expired, oldest first
+        Index("ix_outbox_events_pending", "processed_at", "available_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # recalculate_results, badge_event
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False, index=True)
+    payload = Column(JSON, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+
+    # Not picked up before this time, in UTC (set on enqueue, on claim as a lease, and on retry as backoff)
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
+    processed_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
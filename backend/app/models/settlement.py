@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Numeric, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Numeric, Boolean, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -15,6 +15,12 @@ class SplitType(str, enum.Enum):
 class Settlement(Base):
     """Individual expense/payment item."""
     __tablename__ = "settlements"
+    __table_args__ = (
+        # Keyset pagination of a group's history: (created_at, id) DESC within group_id
+        Index("ix_settlements_group_created_id", "group_id", "created_at", "id"),
+        # Open/settled settlement lists of a group, newest first
+        Index("ix_settlements_group_settled_created", "group_id", "is_settled", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
@@ -59,6 +65,11 @@ class Settlement(Base):
 class SettlementParticipant(Base):
     """Participants in a settlement and their share."""
     __tablename__ = "settlement_participants"
+    __table_args__ = (
+        # Loading a settlement's shares / a participant's shares across settlements
+        Index("ix_settlement_participants_settlement_id", "settlement_id"),
+        Index("ix_settlement_participants_participant_id", "participant_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     settlement_id = Column(Integer, ForeignKey("settlements.id"), nullable=False)
@@ -98,6 +109,13 @@ class SettlementResult(Base):
     Shows who owes whom how much for final settlement.
     """
     __tablename__ = "settlement_results"
+    __table_args__ = (
+        # Pending transfers of a group, and looking one up by debtor/creditor pair
+        Index(
+            "ix_settlement_results_group_completed_pair",
+            "group_id", "is_completed", "debtor_participant_id", "creditor_participant_id",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
@@ -125,3 +143,25 @@ class SettlementResult(Base):
     group = relationship("Group")
     debtor = relationship("GroupParticipant", foreign_keys=[debtor_participant_id])
     creditor = relationship("GroupParticipant", foreign_keys=[creditor_participant_id])
+
+
+class ParticipantBalance(Base):
+    """
+    Materialized net balance per group participant.
+    Kept in sync with deltas on every settlement/transfer write so the
+    greedy calculation reads N rows instead of replaying the whole history.
+    balance > 0: participant should receive money
+    balance < 0: participant should pay money
+    """
+    __tablename__ = "participant_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False, index=True)
+    participant_id = Column(Integer, ForeignKey("group_participants.id"), unique=True, nullable=False)
+
+    balance = Column(Numeric(12, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    participant = relationship("GroupParticipant")
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class UploadBlob(Base):
+    """
+    One content-addressed file in the upload store (uploads/<sha[:2]>/<sha>.<ext>)
+    and how many rows (user photos, settlement receipts) point at it. Blobs
+    nobody references are deleted by app.scripts.gc_uploads after a grace period.
+    """
+    __tablename__ = "upload_blobs"
+    __table_args__ = (
+        # GC: unreferenced blobs, oldest first
+        Index("ix_upload_blobs_ref_count_updated", "ref_count", "updated_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    url = Column(String(255), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    # Last reference change, in UTC (set by add_reference/release_reference);
+    # GC waits for a grace period after the count reaches 0
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
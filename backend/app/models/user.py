@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -58,6 +58,12 @@ class Avatar(Base):
 
 class UserBadge(Base):
     __tablename__ = "user_badges"
+    __table_args__ = (
+        # A user's badges, per group, and "does the user hold this badge here"
+        Index("ix_user_badges_user_group_badge", "user_id", "group_id", "badge_id"),
+        # Per-group badge holders (rule engine lookups, weekly batch delete)
+        Index("ix_user_badges_group_badge_user", "group_id", "badge_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,10 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, File, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
 
 from app.database import get_db
-from app.services.auth import get_current_user
-from app.models.user import User
+from app.services.auth import get_current_user_id
 
 router = APIRouter(prefix="/api/v1/ai", tags=["AI Features"])
 
@@ -12,7 +10,7 @@ router = APIRouter(prefix="/api/v1/ai", tags=["AI Features"])
 @router.post("/analyze")
 async def analyze_image(
     image: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.schemas.user import (
     SignUpRequest,
     LoginRequest,
@@ -10,43 +12,70 @@ from app.schemas.user import (
     TokenResponse,
     UserResponse,
 )
-from app.services.auth import AuthService, get_current_user
+from app.services.auth import AuthService, get_current_user, normalize_google_mode
+from app.services.google_oauth import google_oauth_client
+from app.services.password_hasher import password_hasher
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def signup(request: SignUpRequest, db: Session = Depends(get_db)):
+async def signup(request: SignUpRequest, db: AsyncSession = Depends(get_async_db)):
     """Register a new user with email and password."""
-    service = AuthService(db)
-    return service.signup(request)
+    await db.run_sync(lambda session: AuthService(session).check_email_available(request.email))
+    # bcrypt runs in the hasher's process pool; the event loop only awaits it
+    password_hash = await password_hasher.hash(request.password)
+
+    def handle(db: Session):
+        user = AuthService(db).create_email_user(request, password_hash)
+        return UserResponse.model_validate(user)
+
+    return await db.run_sync(handle)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login with email and password, returns JWT token."""
-    service = AuthService(db)
-    return service.login(request)
+    user_id, password_hash = await db.run_sync(
+        lambda session: AuthService(session).password_login_user(request.email)
+    )
+    matches, rehashed = await password_hasher.verify(request.password, password_hash)
+    if not matches:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+
+    # Upgrade the stored hash to the current cost factor
+    if rehashed:
+        await db.run_sync(lambda session: AuthService(session).upgrade_password_hash(user_id, rehashed))
+    return AuthService(None).issue_token(user_id)
 
 
 @router.post("/google", response_model=TokenResponse)
-def google_login(request: GoogleLoginRequest, db: Session = Depends(get_db)):
+async def google_login(request: GoogleLoginRequest, db: Session = Depends(get_db)):
     """Login/Register with Google OAuth authorization code."""
+    mode = normalize_google_mode(request.mode)
+    # Upstream calls run on the event loop; only the DB work takes a worker thread
+    google_user = await google_oauth_client.fetch_user(request.code)
     service = AuthService(db)
-    return service.google_login(request.code, request.mode)
+    return await run_in_threadpool(service.google_login, google_user, mode)
 
 
 @router.post("/google/complete-profile", response_model=UserResponse)
-def complete_google_profile(
+async def complete_google_profile(
     request: GoogleCompleteProfileRequest,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Complete profile information for new Google users."""
-    service = AuthService(db)
-    return service.complete_google_profile(
-        current_user,
-        request.name,
-        request.payment_method,
-        request.payment_account
-    )
+    def handle(db: Session):
+        user = AuthService(db).complete_google_profile(
+            db.merge(current_user, load=False),
+            request.name,
+            request.payment_method,
+            request.payment_account
+        )
+        return UserResponse.model_validate(user)
+
+    return await db.run_sync(handle)
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
-from typing import List
-
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+from decimal import Decimal
+import hashlib
+
+from app.config import settings
+from app.database import get_async_db, get_async_read_db
 from app.schemas.group import (
     GroupCreate,
-    GroupUpdate,
     GroupResponse,
     GroupListResponse,
     GroupDetailResponse,
@@ -15,108 +19,100 @@ from app.schemas.group import (
     JoinGroupRequest,
     InviteGroupResponse,
 )
-from app.schemas.settlement import SettlementResponse, GroupSettlementResults
-from app.services.auth import get_current_user
+from app.schemas.settlement import SettlementResponse, SettlementPage, GroupSettlementResults
+from app.services.auth import get_current_user, get_current_user_id
+from app.services.group_members import GroupMemberReader
+from app.services.group_version import bump_group_version
 from app.models.user import User
 
 router = APIRouter(prefix="/api/v1/groups", tags=["Groups"])
 
 
-def _avatar_dict(user: User):
-    if not user or not user.avatar:
+def _group_etag(db: Session, group_id: int, user_id: int, kind: str) -> Optional[str]:
+    """
+    Strong ETag for a group-scoped view, derived from the group version.
+    One query that also checks membership; None if the user is not a member
+    (or the group does not exist), so the route runs its normal checks.
+    """
+    from app.models.group import Group, GroupParticipant
+
+    version = db.query(Group.version).join(
+        GroupParticipant, GroupParticipant.group_id == Group.id
+    ).filter(
+        Group.id == group_id,
+        GroupParticipant.user_id == user_id
+    ).limit(1).scalar()
+    if version is None:
+        return None
+
+    digest = hashlib.sha1(f"{settings.APP_VERSION}:{kind}:{group_id}:{version}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match covers the given ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(request: Request, response: Response, db: Session, group_id: int, user_id: int, kind: str):
+    """Set the ETag header; return a 304 response if the client's copy is current."""
+    etag = _group_etag(db, group_id, user_id, kind)
+    if not etag:
         return None
-    avatar = user.avatar
-    return {
-        "id": avatar.id,
-        "user_id": avatar.user_id,
-        "body": avatar.body,
-        "eyes": avatar.eyes,
-        "mouth": avatar.mouth,
-    }
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
 
 
 @router.post("", response_model=GroupResponse, status_code=status.HTTP_201_CREATED)
-def create_group(
+async def create_group(
     group_data: GroupCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new settlement group."""
-    from app.models.group import Group, GroupParticipant
-
-    participant_names = [name.strip() for name in group_data.participants or [] if name and name.strip()]
-    unique_names = []
-    seen = set()
-    for name in participant_names:
-        key = name.lower()
-        if key not in seen:
-            unique_names.append(name)
-            seen.add(key)
-
-    if not unique_names:
-        unique_names = [current_user.name]
-
-    group = Group(
-        name=group_data.name,
-        description=group_data.description,
-        icon=group_data.icon,
-        owner_id=current_user.id
-    )
-    db.add(group)
-    db.flush()
-
-    # Create participants (first participant is the creator's claimed persona)
-    for idx, name in enumerate(unique_names):
-        is_creator = idx == 0
-        participant = GroupParticipant(
-            group_id=group.id,
-            name=name,
-            user_id=current_user.id if is_creator else None,
-            is_admin=is_creator
+    def handle(db: Session):
+        from app.models.group import Group, GroupParticipant
+
+        participant_names = [name.strip() for name in group_data.participants or [] if name and name.strip()]
+        unique_names = []
+        seen = set()
+        for name in participant_names:
+            key = name.lower()
+            if key not in seen:
+                unique_names.append(name)
+                seen.add(key)
+
+        if not unique_names:
+            unique_names = [current_user.name]
+
+        group = Group(
+            name=group_data.name,
+            description=group_data.description,
+            icon=group_data.icon,
+            owner_id=current_user.id
         )
-        db.add(participant)
-    db.commit()
-    db.refresh(group)
-    participants = db.query(GroupParticipant).options(joinedload(GroupParticipant.user)).filter(GroupParticipant.group_id == group.id).all()
-
-    return GroupDetailResponse(
-        id=group.id,
-        name=group.name,
-        description=group.description,
-        icon=group.icon,
-        invite_code=group.invite_code,
-        owner_id=group.owner_id,
-        created_at=group.created_at,
-        participants=[
-            GroupParticipantResponse(
-                id=p.id,
-                name=p.name,
-                user_id=p.user_id,
-                is_admin=p.is_admin,
-                joined_at=p.joined_at,
-                user_name=p.user.name if p.user else None,
-                user_avatar=_avatar_dict(p.user),
-                user_profile_photo_url=p.user.profile_photo_url if p.user else None,
-                user_full_body_photo_url=p.user.full_body_photo_url if p.user else None,
-                is_claimed=bool(p.user_id),
-                badges=[],
+        db.add(group)
+        db.flush()
+
+        # Create participants (first participant is the creator's claimed persona)
+        for idx, name in enumerate(unique_names):
+            is_creator = idx == 0
+            participant = GroupParticipant(
+                group_id=group.id,
+                name=name,
+                user_id=current_user.id if is_creator else None,
+                is_admin=is_creator
             )
-            for p in participants
-        ],
-    )
-
-
-@router.get("", response_model=List[GroupListResponse])
-def get_my_groups(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get all groups the current user belongs to with unsettled amounts."""
-    # TODO: Implement with unsettled amount calculation
-    from app.models.group import Group, GroupParticipant
-
-    memberships = db.query(GroupParticipant).filter(GroupParticipant.user_id == current_user.id).all()
-    groups = []
-    for membership in memberships:
-        group = membership.group
-        groups.append(GroupListResponse(
+            db.add(participant)
+        db.commit()
+        db.refresh(group)
+        return GroupDetailResponse(
             id=group.id,
             name=group.name,
             description=group.description,
@@ -124,304 +120,336 @@ def get_my_groups(current_user: User = Depends(get_current_user), db: Session =
             invite_code=group.invite_code,
             owner_id=group.owner_id,
             created_at=group.created_at,
-            unsettled_amount=0,  # TODO: Calculate
-            member_count=len(group.participants)
-        ))
-    return groups
+            participants=GroupMemberReader(db).list_members(group.id, with_badges=False),
+        )
+
+    return await db.run_sync(handle)
+
+
+@router.get("", response_model=List[GroupListResponse])
+async def get_my_groups(current_user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Get all groups the current user belongs to with unsettled amounts.
+    One query: the user's ledger balance and the member count are grouped subqueries.
+    """
+    def handle(db: Session):
+        from app.models.group import Group, GroupParticipant
+        from app.models.settlement import ParticipantBalance
+
+        my_group_ids = select(GroupParticipant.group_id).where(GroupParticipant.user_id == current_user_id)
+
+        my_balances = select(
+            GroupParticipant.group_id.label("group_id"),
+            func.sum(ParticipantBalance.balance).label("balance"),
+        ).join(
+            ParticipantBalance, ParticipantBalance.participant_id == GroupParticipant.id
+        ).where(
+            GroupParticipant.user_id == current_user_id
+        ).group_by(GroupParticipant.group_id).subquery()
+
+        member_counts = select(
+            GroupParticipant.group_id.label("group_id"),
+            func.count(GroupParticipant.id).label("member_count"),
+        ).where(
+            GroupParticipant.group_id.in_(my_group_ids)
+        ).group_by(GroupParticipant.group_id).subquery()
+
+        rows = db.query(
+            Group,
+            my_balances.c.balance,
+            member_counts.c.member_count,
+        ).outerjoin(
+            my_balances, my_balances.c.group_id == Group.id
+        ).outerjoin(
+            member_counts, member_counts.c.group_id == Group.id
+        ).filter(
+            Group.id.in_(my_group_ids)
+        ).order_by(Group.id).all()
+
+        groups = []
+        for group, balance, member_count in rows:
+            balance = balance or Decimal("0")
+            groups.append(GroupListResponse(
+                id=group.id,
+                name=group.name,
+                description=group.description,
+                icon=group.icon,
+                invite_code=group.invite_code,
+                owner_id=group.owner_id,
+                created_at=group.created_at,
+                # Amount the user still has to pay in this group (net debt)
+                unsettled_amount=-balance if balance < 0 else Decimal("0"),
+                member_count=member_count or 0
+            ))
+        return groups
+
+    return await db.run_sync(handle)
 
 
 @router.get("/{group_id}", response_model=GroupDetailResponse)
-def get_group(
+async def get_group(
     group_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get group details including members."""
-    from app.models.group import Group, GroupParticipant
-    from app.models.user import UserBadge
-    from app.schemas.badge import UserBadgeResponse, BadgeResponse
-
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
-
-    # Check membership
-    is_member = db.query(GroupParticipant).filter(
-        GroupParticipant.group_id == group_id,
-        GroupParticipant.user_id == current_user.id
-    ).first()
-    if not is_member:
-        raise HTTPException(status_code=403, detail="Not a member of this group")
-
-    participants = db.query(GroupParticipant).options(joinedload(GroupParticipant.user)).filter(GroupParticipant.group_id == group_id).all()
-
-    participant_responses = []
-    for p in participants:
-        badges = []
-        if p.user_id:
-            user_badges = db.query(UserBadge).options(
-                joinedload(UserBadge.badge),
-                joinedload(UserBadge.group)
-            ).filter(
-                UserBadge.user_id == p.user_id,
-                UserBadge.group_id == group_id
-            ).all()
-            badges = [
-                UserBadgeResponse(
-                    id=ub.id,
-                    badge=BadgeResponse(
-                        id=ub.badge.id,
-                        name=ub.badge.name,
-                        description=ub.badge.description,
-                        icon=ub.badge.icon,
-                        badge_type=ub.badge.badge_type,
-                        condition_code=ub.badge.condition_code,
-                        created_at=ub.badge.created_at,
-                    ),
-                    group_id=ub.group_id,
-                    group_name=ub.group.name if ub.group else None,
-                    earned_at=ub.earned_at,
-                )
-                for ub in user_badges
-            ]
-
-        participant_responses.append(GroupParticipantResponse(
-            id=p.id,
-            name=p.name,
-            user_id=p.user_id,
-            is_admin=p.is_admin,
-            joined_at=p.joined_at,
-            user_name=p.user.name if p.user else None,
-            user_avatar=_avatar_dict(p.user),
-            user_profile_photo_url=p.user.profile_photo_url if p.user else None,
-            user_full_body_photo_url=p.user.full_body_photo_url if p.user else None,
-            is_claimed=bool(p.user_id),
-            badges=badges,
-        ))
-
-    return GroupDetailResponse(
-        id=group.id,
-        name=group.name,
-        description=group.description,
-        icon=group.icon,
-        invite_code=group.invite_code,
-        owner_id=group.owner_id,
-        created_at=group.created_at,
-        participants=participant_responses,
-    )
+    """Get group details including members. Supports If-None-Match."""
+    def handle(db: Session):
+        from app.models.group import Group, GroupParticipant
+
+        not_modified = _not_modified(request, response, db, group_id, current_user_id, "detail")
+        if not_modified:
+            return not_modified
+
+        group = db.query(Group).filter(Group.id == group_id).first()
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found")
+
+        # Check membership
+        is_member = db.query(GroupParticipant).filter(
+            GroupParticipant.group_id == group_id,
+            GroupParticipant.user_id == current_user_id
+        ).first()
+        if not is_member:
+            raise HTTPException(status_code=403, detail="Not a member of this group")
+
+        participant_responses = GroupMemberReader(db).list_members(group_id)
+
+        return GroupDetailResponse(
+            id=group.id,
+            name=group.name,
+            description=group.description,
+            icon=group.icon,
+            invite_code=group.invite_code,
+            owner_id=group.owner_id,
+            created_at=group.created_at,
+            participants=participant_responses,
+        )
+
+    return await db.run_sync(handle)
 
 
 @router.get("/{group_id}/members", response_model=List[GroupParticipantResponse])
-def get_group_members(
+async def get_group_members(
     group_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all members of a group with their badges."""
-    from app.models.group import GroupParticipant
-    from app.models.user import UserBadge
-    from app.schemas.badge import UserBadgeResponse, BadgeResponse
-
-    # Verify membership
-    is_member = db.query(GroupParticipant).filter(
-        GroupParticipant.group_id == group_id,
-        GroupParticipant.user_id == current_user.id
-    ).first()
-    if not is_member:
-        raise HTTPException(status_code=403, detail="Not a member of this group")
-
-    participants = db.query(GroupParticipant).options(joinedload(GroupParticipant.user)).filter(GroupParticipant.group_id == group_id).all()
-
-    result = []
-    for p in participants:
-        badges = []
-        if p.user_id:
-            # Fetch badges for this user in this group
-            user_badges = db.query(UserBadge).options(
-                joinedload(UserBadge.badge),
-                joinedload(UserBadge.group)
-            ).filter(
-                UserBadge.user_id == p.user_id,
-                UserBadge.group_id == group_id
-            ).all()
-            badges = [
-                UserBadgeResponse(
-                    id=ub.id,
-                    badge=BadgeResponse(
-                        id=ub.badge.id,
-                        name=ub.badge.name,
-                        description=ub.badge.description,
-                        icon=ub.badge.icon,
-                        badge_type=ub.badge.badge_type,
-                        condition_code=ub.badge.condition_code,
-                        created_at=ub.badge.created_at,
-                    ),
-                    group_id=ub.group_id,
-                    group_name=ub.group.name if ub.group else None,
-                    earned_at=ub.earned_at,
-                )
-                for ub in user_badges
-            ]
-
-        result.append(GroupParticipantResponse(
-            id=p.id,
-            name=p.name,
-            user_id=p.user_id,
-            is_admin=p.is_admin,
-            joined_at=p.joined_at,
-            user_name=p.user.name if p.user else None,
-            user_avatar=_avatar_dict(p.user),
-            user_profile_photo_url=p.user.profile_photo_url if p.user else None,
-            user_full_body_photo_url=p.user.full_body_photo_url if p.user else None,
-            is_claimed=bool(p.user_id),
-            badges=badges,
-        ))
-
-    return result
+    def handle(db: Session):
+        from app.models.group import GroupParticipant
+
+        # Verify membership
+        is_member = db.query(GroupParticipant).filter(
+            GroupParticipant.group_id == group_id,
+            GroupParticipant.user_id == current_user_id
+        ).first()
+        if not is_member:
+            raise HTTPException(status_code=403, detail="Not a member of this group")
+
+        return GroupMemberReader(db).list_members(group_id)
+
+    return await db.run_sync(handle)
 
 
 @router.post("/{group_id}/invite", response_model=InviteCodeResponse)
-def create_invite_code(
+async def create_invite_code(
     group_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate/get invite code for a group."""
-    from app.models.group import Group
+    def handle(db: Session):
+        from app.models.group import Group
+
+        group = db.query(Group).filter(Group.id == group_id).first()
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found")
 
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
+        return InviteCodeResponse(
+            invite_code=group.invite_code,
+            group_id=group.id,
+            group_name=group.name
+        )
 
-    return InviteCodeResponse(
-        invite_code=group.invite_code,
-        group_id=group.id,
-        group_name=group.name
-    )
+    return await db.run_sync(handle)
 
 
 @router.get("/invite/{invite_code}", response_model=InviteGroupResponse)
-def get_invite_group(
+async def get_invite_group(
     invite_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get group info and participants by invite code."""
-    from app.models.group import Group, GroupParticipant
+    def handle(db: Session):
+        from app.models.group import Group
 
-    group = db.query(Group).filter(Group.invite_code == invite_code.upper()).first()
-    if not group:
-        raise HTTPException(status_code=404, detail="Invalid invite code")
-
-    participants = db.query(GroupParticipant).options(joinedload(GroupParticipant.user)).filter(GroupParticipant.group_id == group.id).all()
-
-    return InviteGroupResponse(
-        invite_code=group.invite_code,
-        group_id=group.id,
-        group_name=group.name,
-        participants=[
-            GroupParticipantResponse(
-                id=p.id,
-                name=p.name,
-                user_id=p.user_id,
-                is_admin=p.is_admin,
-                joined_at=p.joined_at,
-                user_name=p.user.name if p.user else None,
-                user_avatar=_avatar_dict(p.user),
-                user_profile_photo_url=p.user.profile_photo_url if p.user else None,
-                user_full_body_photo_url=p.user.full_body_photo_url if p.user else None,
-                is_claimed=bool(p.user_id),
-                badges=[],
-            )
-            for p in participants
-        ],
-    )
+        group = db.query(Group).filter(Group.invite_code == invite_code.upper()).first()
+        if not group:
+            raise HTTPException(status_code=404, detail="Invalid invite code")
+
+        return InviteGroupResponse(
+            invite_code=group.invite_code,
+            group_id=group.id,
+            group_name=group.name,
+            participants=GroupMemberReader(db).list_members(group.id, with_badges=False),
+        )
+
+    return await db.run_sync(handle)
 
 @router.post("/join", response_model=GroupResponse)
-def join_group(
+async def join_group(
     request: JoinGroupRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Join a group using invite code."""
-    from app.models.group import Group, GroupParticipant
-
-    group = db.query(Group).filter(Group.invite_code == request.invite_code.upper()).first()
-    if not group:
-        raise HTTPException(status_code=404, detail="Invalid invite code")
+    def handle(db: Session):
+        from app.models.group import Group, GroupParticipant
 
-    if request.participant_id and request.participant_name:
-        raise HTTPException(status_code=400, detail="Choose existing participant or create a new one")
+        group = db.query(Group).filter(Group.invite_code == request.invite_code.upper()).first()
+        if not group:
+            raise HTTPException(status_code=404, detail="Invalid invite code")
 
-    if not request.participant_id and not request.participant_name:
-        raise HTTPException(status_code=400, detail="Participant selection required")
+        if request.participant_id and request.participant_name:
+            raise HTTPException(status_code=400, detail="Choose existing participant or create a new one")
 
-    # Check if already a member
-    existing = db.query(GroupParticipant).filter(
-        GroupParticipant.group_id == group.id,
-        GroupParticipant.user_id == current_user.id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Already a member of this group")
+        if not request.participant_id and not request.participant_name:
+            raise HTTPException(status_code=400, detail="Participant selection required")
 
-    if request.participant_id:
-        participant = db.query(GroupParticipant).filter(
-            GroupParticipant.id == request.participant_id,
-            GroupParticipant.group_id == group.id
-        ).first()
-        if not participant:
-            raise HTTPException(status_code=404, detail="Participant not found")
-        if participant.user_id is not None:
-            raise HTTPException(status_code=400, detail="Participant already claimed")
-        participant.user_id = current_user.id
-    else:
-        participant_name = (request.participant_name or "").strip()
-        if not participant_name:
-            raise HTTPException(status_code=400, detail="Participant name required")
-
-        existing_name = db.query(GroupParticipant).filter(
+        # Check if already a member
+        existing = db.query(GroupParticipant).filter(
             GroupParticipant.group_id == group.id,
-            func.lower(GroupParticipant.name) == participant_name.lower()
+            GroupParticipant.user_id == current_user_id
         ).first()
-        if existing_name:
-            raise HTTPException(status_code=400, detail="Participant name already exists")
+        if existing:
+            raise HTTPException(status_code=400, detail="Already a member of this group")
+
+        if request.participant_id:
+            participant = db.query(GroupParticipant).filter(
+                GroupParticipant.id == request.participant_id,
+                GroupParticipant.group_id == group.id
+            ).first()
+            if not participant:
+                raise HTTPException(status_code=404, detail="Participant not found")
+            if participant.user_id is not None:
+                raise HTTPException(status_code=400, detail="Participant already claimed")
+            participant.user_id = current_user_id
+        else:
+            participant_name = (request.participant_name or "").strip()
+            if not participant_name:
+                raise HTTPException(status_code=400, detail="Participant name required")
+
+            existing_name = db.query(GroupParticipant).filter(
+                GroupParticipant.group_id == group.id,
+                func.lower(GroupParticipant.name) == participant_name.lower()
+            ).first()
+            if existing_name:
+                raise HTTPException(status_code=400, detail="Participant name already exists")
+
+            participant = GroupParticipant(
+                group_id=group.id,
+                name=participant_name,
+                user_id=current_user_id,
+                is_admin=False
+            )
+            db.add(participant)
+        bump_group_version(db, group.id)
+        db.commit()
+        db.refresh(group)
+        return GroupResponse.model_validate(group)
 
-        participant = GroupParticipant(
-            group_id=group.id,
-            name=participant_name,
-            user_id=current_user.id,
-            is_admin=False
-        )
-        db.add(participant)
-    db.commit()
-    db.refresh(group)
-    return group
+    return await db.run_sync(handle)
 
 
 @router.get("/{group_id}/settlements", response_model=List[SettlementResponse])
-def get_group_settlements(
+async def get_group_settlements(
     group_id: int,
+    request: Request,
+    response: Response,
     is_settled: bool = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get all settlement items for a group."""
-    from app.models.settlement import Settlement
+    """Get all settlement items for a group. Supports If-None-Match."""
+    def handle(db: Session):
+        from app.services.settlement import SettlementService
+
+        not_modified = _not_modified(request, response, db, group_id, current_user_id, f"settlements:{is_settled}")
+        if not_modified:
+            return not_modified
+
+        service = SettlementService(db)
+        return [SettlementResponse.model_validate(s) for s in service.list_group_settlements(group_id, is_settled)]
 
-    query = db.query(Settlement).filter(Settlement.group_id == group_id)
-    if is_settled is not None:
-        query = query.filter(Settlement.is_settled == is_settled)
+    return await db.run_sync(handle)
 
-    return query.order_by(Settlement.created_at.desc()).all()
+
+@router.get("/{group_id}/settlements/history", response_model=SettlementPage)
+async def get_group_settlement_history(
+    group_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    payer_participant_id: Optional[int] = None,
+    participant_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    icon: Optional[str] = None,
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Settlement history for a group, newest first, with cursor pagination.
+    Pass next_cursor from the previous page as ?cursor= to continue.
+    date_from/date_to are inclusive (YYYY-MM-DD).
+    """
+    def handle(db: Session):
+        from app.models.group import GroupParticipant
+        from app.services.settlement import SettlementService
+
+        is_member = db.query(GroupParticipant).filter(
+            GroupParticipant.group_id == group_id,
+            GroupParticipant.user_id == current_user_id
+        ).first()
+        if not is_member:
+            raise HTTPException(status_code=403, detail="Not a member of this group")
+
+        service = SettlementService(db)
+        return service.list_settlement_history(
+            group_id,
+            limit=limit,
+            cursor=cursor,
+            payer_participant_id=payer_participant_id,
+            participant_id=participant_id,
+            date_from=date_from,
+            date_to=date_to,
+            icon=icon,
+        )
+
+    return await db.run_sync(handle)
 
 
 @router.get("/{group_id}/results", response_model=GroupSettlementResults)
-def get_settlement_results(
+async def get_settlement_results(
     group_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Calculate and return greedy algorithm settlement results."""
-    from app.services.settlement import SettlementService
+    """
+    Return settlement results, recalculating only if balances changed since the last calculation.
+    Supports If-None-Match.
+    """
+    def handle(db: Session):
+        from app.services.settlement import SettlementService
+
+        not_modified = _not_modified(request, response, db, group_id, current_user_id, "results")
+        if not_modified:
+            return not_modified
+
+        service = SettlementService(db)
+        return service.get_settlement_results(group_id)
 
-    service = SettlementService(db)
-    return service.calculate_settlement_results(group_id)
+    return await db.run_sync(handle)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from decimal import Decimal
 
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db
 from app.schemas.settlement import (
     SettlementCreate,
     SettlementUpdate,
@@ -11,31 +12,34 @@ from app.schemas.settlement import (
     SettlementResultResponse,
     SplitType,
 )
-from app.services.auth import get_current_user
+from app.services.auth import get_current_user_id
 from app.services.settlement import SettlementService
-from app.models.user import User
+from app.services.uploads import save_image
 
 router = APIRouter(prefix="/api/v1/settlements", tags=["Settlements"])
 
 
 @router.post("", response_model=SettlementResponse, status_code=status.HTTP_201_CREATED)
-def create_settlement(
+async def create_settlement(
     settlement_data: SettlementCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new settlement item (expense)."""
-    from app.models.group import GroupParticipant
+    def handle(db: Session):
+        from app.models.group import GroupParticipant
+
+        is_member = db.query(GroupParticipant).filter(
+            GroupParticipant.group_id == settlement_data.group_id,
+            GroupParticipant.user_id == current_user_id
+        ).first()
+        if not is_member:
+            raise HTTPException(status_code=403, detail="Not a member of this group")
 
-    is_member = db.query(GroupParticipant).filter(
-        GroupParticipant.group_id == settlement_data.group_id,
-        GroupParticipant.user_id == current_user.id
-    ).first()
-    if not is_member:
-        raise HTTPException(status_code=403, detail="Not a member of this group")
+        service = SettlementService(db)
+        return SettlementResponse.model_validate(service.create_settlement(settlement_data))
 
-    service = SettlementService(db)
-    return service.create_settlement(settlement_data)
+    return await db.run_sync(handle)
 
 
 @router.post("/upload", response_model=SettlementResponse, status_code=status.HTTP_201_CREATED)
@@ -49,20 +53,13 @@ async def create_settlement_with_receipt(
     description: Optional[str] = Form(None),
     icon: Optional[str] = Form(None),
     receipt: UploadFile = File(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create settlement with receipt image upload (Multipart form)."""
     from app.schemas.settlement import SettlementCreate, ParticipantInput
     from app.models.group import GroupParticipant
 
-    is_member = db.query(GroupParticipant).filter(
-        GroupParticipant.group_id == group_id,
-        GroupParticipant.user_id == current_user.id
-    ).first()
-    if not is_member:
-        raise HTTPException(status_code=403, detail="Not a member of this group")
-
     # Parse participant IDs
     participants = [
         ParticipantInput(participant_id=int(uid.strip()))
@@ -80,109 +77,137 @@ async def create_settlement_with_receipt(
         participants=participants
     )
 
-    service = SettlementService(db)
-    settlement = service.create_settlement(settlement_data)
+    def handle(db: Session, receipt_url: Optional[str]):
+        is_member = db.query(GroupParticipant).filter(
+            GroupParticipant.group_id == group_id,
+            GroupParticipant.user_id == current_user_id
+        ).first()
+        if not is_member:
+            raise HTTPException(status_code=403, detail="Not a member of this group")
 
-    # TODO: Handle receipt upload to storage
-    if receipt:
-        # Save receipt and update settlement.receipt_image
-        pass
+        service = SettlementService(db)
+        return SettlementResponse.model_validate(service.create_settlement(settlement_data, receipt_url))
 
-    return settlement
+    # Stored first so a rejected image fails the request before anything is written
+    # (if the settlement isn't created, the unreferenced file is garbage collected)
+    receipt_url = await save_image(receipt) if receipt else None
+    return await db.run_sync(handle, receipt_url)
 
 
 @router.get("/{settlement_id}", response_model=SettlementResponse)
-def get_settlement(
+async def get_settlement(
     settlement_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get settlement details."""
-    from app.models.settlement import Settlement
+    def handle(db: Session):
+        service = SettlementService(db)
+        return SettlementResponse.model_validate(service.get_settlement(settlement_id))
 
-    settlement = db.query(Settlement).filter(Settlement.id == settlement_id).first()
-    if not settlement:
-        raise HTTPException(status_code=404, detail="Settlement not found")
-    return settlement
+    return await db.run_sync(handle)
 
 
 @router.put("/{settlement_id}", response_model=SettlementResponse)
-def update_settlement(
+async def update_settlement(
     settlement_id: int,
     update_data: SettlementUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update settlement item (amount, participants, etc.)."""
-    service = SettlementService(db)
-    return service.update_settlement(settlement_id, update_data, current_user.id)
+    def handle(db: Session):
+        service = SettlementService(db)
+        return SettlementResponse.model_validate(service.update_settlement(settlement_id, update_data, current_user_id))
+
+    return await db.run_sync(handle)
 
 
 @router.patch("/pay/{detail_id}", response_model=SettlementResultResponse)
-def mark_payment_complete(
+async def mark_payment_complete(
     detail_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark a 1:1 transfer as completed and create a repayment settlement."""
-    from app.models.settlement import SettlementResult, Settlement, SettlementParticipant
-    from app.services.settlement import SettlementService
-    from datetime import datetime
-    from decimal import Decimal
-
-    result = db.query(SettlementResult).filter(SettlementResult.id == detail_id).first()
-    if not result:
-        raise HTTPException(status_code=404, detail="Settlement result not found")
-
-    # Verify user is either the debtor or creditor participant
-    debtor = result.debtor
-    creditor = result.creditor
-    is_debtor = debtor and debtor.user_id == current_user.id
-    is_creditor = creditor and creditor.user_id == current_user.id
-
-    if not (is_debtor or is_creditor):
-        raise HTTPException(status_code=403, detail="Only participants can mark as paid")
-
-    # Mark as completed
-    result.is_completed = True
-    result.completed_at = datetime.utcnow()
-
-    # Award time-based badges
-    from app.services.badge import BadgeService
-    badge_service = BadgeService(db)
-    if debtor and debtor.user_id:
-        badge_service.check_and_award_payment_speed_badges(
-            result, debtor.user_id, result.group_id
+    def handle(db: Session):
+        from app.models.settlement import SettlementResult, Settlement, SettlementParticipant
+        from datetime import datetime
+
+        result = db.query(SettlementResult).filter(SettlementResult.id == detail_id).first()
+        if not result:
+            raise HTTPException(status_code=404, detail="Settlement result not found")
+
+        # Verify user is either the debtor or creditor participant
+        debtor = result.debtor
+        creditor = result.creditor
+        is_debtor = debtor and debtor.user_id == current_user_id
+        is_creditor = creditor and creditor.user_id == current_user_id
+
+        if not (is_debtor or is_creditor):
+            raise HTTPException(status_code=403, detail="Only participants can mark as paid")
+
+        # Mark as completed (apply to the balance ledger and badge rules only on the first completion)
+        first_completion = not result.is_completed
+        if first_completion:
+            from app.services.ledger import LedgerService
+            LedgerService(db).apply_transfer(
+                result.group_id,
+                result.debtor_participant_id,
+                result.creditor_participant_id,
+                result.amount,
+            )
+        result.is_completed = True
+        result.completed_at = datetime.utcnow()
+
+        # Time-based badges (Sandy, GarySnail, QuickSettler) are evaluated by the outbox worker
+        from app.services.work_queue import enqueue_badge_event, enqueue_results_recalculation, outbox_worker
+        if first_completion:
+            from app.services.badge_rules import TransferCompleted
+            enqueue_badge_event(db, TransferCompleted(
+                group_id=result.group_id,
+                result_id=result.id,
+                debtor_participant_id=result.debtor_participant_id,
+                creditor_participant_id=result.creditor_participant_id,
+                amount=result.amount,
+                requested_at=result.created_at,
+                completed_at=result.completed_at,
+            ))
+
+        # Create a repayment settlement
+        repayment_settlement = Settlement(
+            group_id=result.group_id,
+            payer_participant_id=result.debtor_participant_id,
+            title="\uc0c1\ud658",
+            description=f"{debtor.name}\uc774(\uac00) {creditor.name}\uc5d0\uac8c \uc0c1\ud658",
+            total_amount=result.amount,
+            split_type=SplitType.EQUAL,
+            icon="/icons/reimburse.png",
+            is_settled=True,
         )
+        db.add(repayment_settlement)
+        db.flush()
+
+        # Add creditor as the only participant (they receive the full amount)
+        repayment_participant = SettlementParticipant(
+            settlement_id=repayment_settlement.id,
+            participant_id=result.creditor_participant_id,
+            amount_owed=result.amount,
+            is_paid=True
+        )
+        db.add(repayment_participant)
 
-    # Create a repayment settlement
-    repayment_settlement = Settlement(
-        group_id=result.group_id,
-        payer_participant_id=result.debtor_participant_id,
-        title="\uc0c1\ud658",
-        description=f"{debtor.name}\uc774(\uac00) {creditor.name}\uc5d0\uac8c \uc0c1\ud658",
-        total_amount=result.amount,
-        split_type=SplitType.EQUAL,
-        icon="/icons/reimburse.png",
-        is_settled=True,
-    )
-    db.add(repayment_settlement)
-    db.flush()
-
-    # Add creditor as the only participant (they receive the full amount)
-    repayment_participant = SettlementParticipant(
-        settlement_id=repayment_settlement.id,
-        participant_id=result.creditor_participant_id,
-        amount_owed=result.amount,
-        is_paid=True
-    )
-    db.add(repayment_participant)
+        # The repayment row is new even when the transfer was already completed
+        from app.services.group_version import bump_group_version
+        bump_group_version(db, result.group_id)
+
+        # Recalculate group balances in the background (coalesced per group)
+        enqueue_results_recalculation(db, result.group_id)
 
-    db.commit()
+        db.commit()
+        outbox_worker.wake()
 
-    # Recalculate group balances
-    service = SettlementService(db)
-    service.calculate_settlement_results(result.group_id)
+        db.refresh(result)
+        return SettlementResultResponse.model_validate(result)
 
-    db.refresh(result)
-    return result
+    return await db.run_sync(handle)
@@ -1,11 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from typing import List
-import os
-import uuid
-from pathlib import Path
 
-from app.database import get_db
+from app.database import get_async_db, get_read_db
 from app.schemas.user import (
     UserResponse,
     UserProfileResponse,
@@ -14,20 +12,26 @@ from app.schemas.user import (
     AvatarResponse,
 )
 from app.schemas.badge import UserBadgeResponse
-from app.services.auth import get_current_user
+from app.services.auth import get_current_user, get_current_user_id, user_cache
+from app.services.group_version import bump_user_groups_version
+from app.services.uploads import add_reference, release_reference, save_image
 from app.models.user import User, UserBadge
 
 router = APIRouter(prefix="/api/v1/users", tags=["Users"])
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_me(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Get current user's basic info."""
-    return current_user
+    def handle(db: Session):
+        # A cached user is detached; merge it so the avatar can lazy-load
+        return UserResponse.model_validate(db.merge(current_user, load=False))
+
+    return await db.run_sync(handle)
 
 
 @router.get("/me/profile", response_model=UserProfileResponse)
-def get_my_profile(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_my_profile(current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_read_db)):
     """Get current user's full profile including avatar, badges, and payment info."""
     return (
         db.query(User)
@@ -35,48 +39,59 @@ def get_my_profile(current_user: User = Depends(get_current_user), db: Session =
             joinedload(User.avatar),
             joinedload(User.badges).joinedload(UserBadge.badge),
         )
-        .filter(User.id == current_user.id)
+        .filter(User.id == current_user_id)
         .first()
     )
 
 
 @router.patch("/me", response_model=UserResponse)
-def update_my_profile(
+async def update_my_profile(
     update_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user's profile."""
-    for field, value in update_data.model_dump(exclude_unset=True).items():
-        setattr(current_user, field, value)
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    def handle(db: Session):
+        user = db.merge(current_user, load=False)
+        for field, value in update_data.model_dump(exclude_unset=True).items():
+            setattr(user, field, value)
+        bump_user_groups_version(db, user.id)
+        db.commit()
+        user_cache.invalidate(user.id)
+        db.refresh(user)
+        return UserResponse.model_validate(user)
+
+    return await db.run_sync(handle)
 
 
 @router.patch("/me/avatar", response_model=AvatarResponse)
-def update_avatar(
+async def update_avatar(
     avatar_data: AvatarUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user's SpongeBob fish avatar (body, eyes, fin, pattern, color)."""
     from app.models.user import Avatar
 
-    if current_user.avatar:
-        for field, value in avatar_data.model_dump(exclude_unset=True).items():
-            setattr(current_user.avatar, field, value)
-    else:
-        avatar = Avatar(user_id=current_user.id, **avatar_data.model_dump())
-        db.add(avatar)
+    def handle(db: Session):
+        user = db.merge(current_user, load=False)
+        if user.avatar:
+            for field, value in avatar_data.model_dump(exclude_unset=True).items():
+                setattr(user.avatar, field, value)
+        else:
+            avatar = Avatar(user_id=user.id, **avatar_data.model_dump())
+            db.add(avatar)
+
+        bump_user_groups_version(db, user.id)
+        db.commit()
+        db.refresh(user)
+        return AvatarResponse.model_validate(user.avatar)
 
-    db.commit()
-    db.refresh(current_user)
-    return current_user.avatar
+    return await db.run_sync(handle)
 
 
 @router.get("/me/badges", response_model=List[UserBadgeResponse])
-def get_my_badges(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_my_badges(current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_read_db)):
     """Get all badges earned by the current user across all groups."""
     from app.models.user import UserBadge
     from app.models.badge import Badge
@@ -84,7 +99,7 @@ def get_my_badges(current_user: User = Depends(get_current_user), db: Session =
     from app.schemas.badge import UserBadgeResponse, BadgeResponse
 
     user_badges = db.query(UserBadge).filter(
-        UserBadge.user_id == current_user.id
+        UserBadge.user_id == current_user_id
     ).all()
 
     result = []
@@ -124,7 +139,7 @@ async def upload_avatar(
     eyes: str = Form(...),
     mouth: str = Form(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload a cropped avatar image and optionally a full-body avatar image.
@@ -144,65 +159,42 @@ async def upload_avatar(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File must be an image"
         )
-
-    # Create uploads directory if it doesn't exist
-    upload_dir = Path("uploads")
-    upload_dir.mkdir(exist_ok=True)
-
-    # Generate unique filename for crop
-    file_extension = os.path.splitext(file.filename)[1] if file.filename else ".png"
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = upload_dir / unique_filename
-
-    # Save the cropped file
-    try:
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
-    except Exception as e:
+    if full_body_file and (not full_body_file.content_type or not full_body_file.content_type.startswith("image/")):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save file: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Full body file must be an image"
         )
-    
-    # Save the full body file if provided
-    full_body_filename = None
-    if full_body_file:
-        if not full_body_file.content_type or not full_body_file.content_type.startswith("image/"):
-             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Full body file must be an image"
-            )
-        
-        full_ext = os.path.splitext(full_body_file.filename)[1] if full_body_file.filename else ".png"
-        full_body_filename = f"{uuid.uuid4()}_full{full_ext}"
-        full_path = upload_dir / full_body_filename
-
-        try:
-            full_contents = await full_body_file.read()
-            with open(full_path, "wb") as f:
-                f.write(full_contents)
-        except Exception as e:
-             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to save full body file: {str(e)}"
-            )
-
-    # Update or create avatar configuration
-    if current_user.avatar:
-        current_user.avatar.body = body
-        current_user.avatar.eyes = eyes
-        current_user.avatar.mouth = mouth
-    else:
-        avatar = Avatar(user_id=current_user.id, body=body, eyes=eyes, mouth=mouth)
-        db.add(avatar)
-
-    # Update user's profile photo URL
-    current_user.profile_photo_url = f"/uploads/{unique_filename}"
-    if full_body_filename:
-        current_user.full_body_photo_url = f"/uploads/{full_body_filename}"
-
-    db.commit()
-    db.refresh(current_user)
-
-    return current_user
+
+    # Stream both images into the upload store before touching the database; if the
+    # update below fails they stay unreferenced and are garbage collected
+    profile_photo_url = await save_image(file)
+    full_body_photo_url = await save_image(full_body_file) if full_body_file else None
+
+    def handle(db: Session):
+        user = db.merge(current_user, load=False)
+
+        # Update or create avatar configuration
+        if user.avatar:
+            user.avatar.body = body
+            user.avatar.eyes = eyes
+            user.avatar.mouth = mouth
+        else:
+            avatar = Avatar(user_id=user.id, body=body, eyes=eyes, mouth=mouth)
+            db.add(avatar)
+
+        # Update user's profile photo URL (moving the upload references with it)
+        add_reference(db, profile_photo_url)
+        release_reference(db, user.profile_photo_url)
+        user.profile_photo_url = profile_photo_url
+        if full_body_photo_url:
+            add_reference(db, full_body_photo_url)
+            release_reference(db, user.full_body_photo_url)
+            user.full_body_photo_url = full_body_photo_url
+
+        bump_user_groups_version(db, user.id)
+        db.commit()
+        user_cache.invalidate(user.id)
+        db.refresh(user)
+        return UserResponse.model_validate(user)
+
+    return await db.run_sync(handle)
@@ -54,7 +54,7 @@ class GroupResponse(GroupBase):
 
 class GroupListResponse(GroupResponse):
     """Group with unsettled amount for main screen."""
-    unsettled_amount: Decimal = Decimal("0")
+    unsettled_amount: Decimal = Decimal("0")  # What the current user still owes in this group
     member_count: int = 0
 
 
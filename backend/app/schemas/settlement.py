@@ -81,6 +81,13 @@ class SettlementResponse(BaseModel):
         from_attributes = True
 
 
+class SettlementPage(BaseModel):
+    """One page of a group's settlement history (keyset pagination)."""
+    items: List[SettlementResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+    has_more: bool = False
+
+
 # Settlement Result Schemas (Greedy Algorithm Output)
 class SettlementResultResponse(BaseModel):
     """Single transfer instruction from greedy algorithm."""
@@ -0,0 +1,284 @@
+"""
+Query-plan regression check for the hot read/write paths.
+Usage: DB_URL=sqlite:// python -m app.scripts.check_query_plans [--verbose]
+
+Seeds a scratch database (migrated to head), runs the hot paths of
+SettlementService, BadgeService, the badge rule engine and the group
+routes while recording every SQL statement, then EXPLAINs each SELECT /
+UPDATE / DELETE and reports the ones that full-scan a table. Works on
+SQLite (EXPLAIN QUERY PLAN: "SCAN <table>") and MySQL (EXPLAIN: type=ALL).
+
+tests/test_query_plans.py runs the same check (seed, exercise,
+check_plans) on the test database. As a CLI it writes seed data, so it
+refuses to run on a database that already has groups; never point it at
+a real one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, insert, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import Base, SessionLocal, engine
+from app.migrations import upgrade
+
+# Catalog-sized tables where a scan is expected and harmless
+SCAN_ALLOWED_TABLES = {"badges", "schema_migrations"}
+
+SEED_USERS = 300
+SEED_GROUPS = 60
+SEED_PARTICIPANTS_PER_GROUP = 8
+SEED_SETTLEMENTS_PER_GROUP = 40
+
+_current_label: Optional[str] = None
+_captured: List[Tuple[str, str, object]] = []
+
+
+class PlanCheck(NamedTuple):
+    label: str
+    statement: str
+    plan: List[str]
+    scanned: List[str]  # Tables read by a full scan; empty when the plan is fine
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if _current_label is not None and not executemany:
+        _captured.append((_current_label, statement, parameters))
+
+
+class _label:
+    """Attribute the statements run inside the block to a hot path."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        global _current_label
+        _current_label = self.name
+
+    def __exit__(self, *exc):
+        global _current_label
+        _current_label = None
+
+
+def _next_id(conn: Connection, table: str) -> int:
+    quoted = conn.dialect.identifier_preparer.quote_identifier(table)
+    return (conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {quoted}")).scalar() or 0) + 1
+
+
+def seed(conn: Connection) -> Dict[int, List[int]]:
+    """
+    Bulk-insert a few thousand rows so plans reflect real selectivity.
+    Ids continue after the existing rows. Returns {group_id: participant ids}.
+    """
+    from app.models import Group, GroupParticipant, Settlement, SettlementParticipant, User
+
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    first_user, first_group = _next_id(conn, "users"), _next_id(conn, "groups")
+    users = range(first_user, first_user + SEED_USERS)
+    groups = range(first_group, first_group + SEED_GROUPS)
+    first_participant = _next_id(conn, "group_participants")
+    first_settlement = _next_id(conn, "settlements")
+
+    conn.execute(insert(User), [
+        {"id": i, "email": f"plan{i}@example.com", "name": f"user{i}", "password_hash": None}
+        for i in users
+    ])
+    conn.execute(insert(Group), [
+        {"id": g, "name": f"group{g}", "owner_id": rng.choice(users), "version": 0}
+        for g in groups
+    ])
+
+    participants, participant_ids = [], {}
+    for g in groups:
+        user_ids = rng.sample(users, SEED_PARTICIPANTS_PER_GROUP // 2)
+        for p in range(SEED_PARTICIPANTS_PER_GROUP):
+            pid = first_participant + len(participants)
+            participants.append({
+                "id": pid, "group_id": g, "name": f"p{pid}",
+                "user_id": user_ids[p] if p < len(user_ids) else None,
+            })
+            participant_ids.setdefault(g, []).append(pid)
+    conn.execute(insert(GroupParticipant), participants)
+
+    settlements, shares = [], []
+    for g in groups:
+        for _ in range(SEED_SETTLEMENTS_PER_GROUP):
+            sid = first_settlement + len(settlements)
+            members = rng.sample(participant_ids[g], 4)
+            settlements.append({
+                "id": sid, "group_id": g, "payer_participant_id": members[0], "title": f"s{sid}",
+                "total_amount": Decimal("40.00"), "is_settled": rng.random() < 0.5,
+                "created_at": now - timedelta(hours=rng.randint(0, 24 * 30)),
+            })
+            shares.extend(
+                {"settlement_id": sid, "participant_id": pid, "amount_owed": Decimal("10.00")}
+                for pid in members
+            )
+    conn.execute(insert(Settlement), settlements)
+    conn.execute(insert(SettlementParticipant), shares)
+
+    # Statistics for the seeded tables only: on a handful of rows (another table that
+    # already had a few) a scan is the planner's right call, not a missing index
+    analyze = "ANALYZE" if conn.dialect.name == "sqlite" else "ANALYZE TABLE"
+    for table in ("users", "groups", "group_participants", "settlements", "settlement_participants"):
+        conn.execute(text(f"{analyze} {conn.dialect.identifier_preparer.quote_identifier(table)}"))
+    return participant_ids
+
+
+def exercise(participant_ids: Dict[int, List[int]]):
+    """Run the hot paths; every statement they issue is captured."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.models import GroupParticipant
+    from app.scripts.seed_group_badges import seed_group_badges
+    from app.services.auth import AuthService
+    from app.services.badge import BadgeService
+    from app.services.badge_rules import BadgeRuleEngine, GameFinished, TransferCompleted
+    from app.services.settlement import SettlementService
+
+    seed_group_badges()
+    group_ids = list(participant_ids)
+    group_id = group_ids[len(group_ids) // 2]
+    pids = participant_ids[group_id]
+
+    db = SessionLocal()
+    try:
+        owner = db.query(GroupParticipant.user_id).filter(
+            GroupParticipant.id == pids[0]
+        ).scalar()
+        service = SettlementService(db)
+
+        with _label("SettlementService.calculate_settlement_results"):
+            service.calculate_settlement_results(group_id)
+            db.commit()
+        with _label("SettlementService.get_settlement_results"):
+            results = service.get_settlement_results(group_id)
+        with _label("SettlementService.get_settlement"):
+            settlement_id = service.list_settlement_history(group_id, limit=1).items[0].id
+            service.get_settlement(settlement_id)
+        with _label("SettlementService.list_group_settlements"):
+            service.list_group_settlements(group_id)
+            service.list_group_settlements(group_id, is_settled=False)
+        with _label("SettlementService.list_settlement_history"):
+            page = service.list_settlement_history(group_id, limit=10)
+            service.list_settlement_history(group_id, limit=10, cursor=page.next_cursor, participant_id=pids[1])
+
+        with _label("BadgeService.calculate_weekly_badges_for_groups"):
+            BadgeService(db).calculate_weekly_badges_for_groups(group_ids[:20])
+            db.commit()
+        with _label("BadgeRuleEngine.publish"):
+            rule_engine = BadgeRuleEngine(db)
+            now = datetime.utcnow()
+            if results.results:
+                transfer = results.results[0]
+                rule_engine.publish(TransferCompleted(
+                    group_id=group_id, result_id=transfer.id,
+                    debtor_participant_id=transfer.debtor_participant_id,
+                    creditor_participant_id=transfer.creditor_participant_id,
+                    amount=transfer.amount, requested_at=now - timedelta(minutes=1), completed_at=now,
+                ))
+            rule_engine.publish(GameFinished(
+                group_id=group_id, game_result_id=0, participant_ids=tuple(pids[:4]), loser_participant_id=pids[0],
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+    headers = {"Authorization": f"Bearer {AuthService(None)._create_access_token(owner)}"}
+    client = TestClient(app)
+    for path in (
+        "/api/v1/groups",
+        f"/api/v1/groups/{group_id}",
+        f"/api/v1/groups/{group_id}/members",
+        f"/api/v1/groups/{group_id}/settlements",
+        f"/api/v1/groups/{group_id}/settlements/history?limit=10",
+        f"/api/v1/groups/{group_id}/results",
+    ):
+        with _label(f"GET {path}"):
+            response = client.get(path, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}: {response.text[:200]}")
+
+
+def full_scans(conn: Connection, statement: str, parameters) -> Tuple[List[str], List[str]]:
+    """(plan lines, tables read by a full scan) for one statement."""
+    tables = set(Base.metadata.tables) - SCAN_ALLOWED_TABLES
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        scanned = []
+        for line in plan:
+            match = re.match(r"SCAN (\w+)", line)
+            # Eager loads show up under their alias (group_participants_1)
+            table = re.sub(r"_\d+$", "", match.group(1)) if match else None
+            if table in tables:
+                scanned.append(table)
+        return plan, scanned
+
+    rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().fetchall()
+    plan = [f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']}" for row in rows]
+    scanned = [row["table"] for row in rows if row["type"] == "ALL" and row["table"] in tables]
+    return plan, scanned
+
+
+def check_plans(conn: Connection) -> List[PlanCheck]:
+    """EXPLAIN every distinct SELECT / UPDATE / DELETE captured by exercise()."""
+    checks, seen = [], set()
+    for label, statement, parameters in _captured:
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb not in ("SELECT", "UPDATE", "DELETE") or statement in seen:
+            continue
+        seen.add(statement)
+        plan, scanned = full_scans(conn, statement, parameters)
+        checks.append(PlanCheck(label, statement, plan, scanned))
+    return checks
+
+
+def run(participant_ids: Dict[int, List[int]]) -> List[PlanCheck]:
+    """Exercise the hot paths on seeded data and check every statement's plan."""
+    _captured.clear()
+    exercise(participant_ids)
+    with engine.connect() as conn:
+        checks = check_plans(conn)
+        conn.rollback()
+    return checks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not only failures")
+    args = parser.parse_args()
+
+    upgrade(engine)
+    with engine.begin() as conn:
+        if conn.execute(text(f"SELECT COUNT(*) FROM {conn.dialect.identifier_preparer.quote_identifier('groups')}")).scalar():
+            sys.exit("Database already has groups; run this against an empty scratch database (e.g. DB_URL=sqlite://)")
+        participant_ids = seed(conn)
+
+    checks = run(participant_ids)
+    failures = [check for check in checks if check.scanned]
+    for check in checks if args.verbose else failures:
+        print(f"[{'FULL SCAN: ' + ', '.join(check.scanned) if check.scanned else 'ok'}] {check.label}")
+        print("    " + " ".join(check.statement.split())[:300])
+        for line in check.plan:
+            print(f"      {line}")
+
+    print(f"{len(checks)} statements checked, {len(failures)} with full table scans")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Batch job: recompute weekly ranking badges (UseMyCard, MrKrabs,
+KrabbyPattyVIP, NoCoinSquidward) for all groups.
+Usage: python -m app.scripts.compute_weekly_badges [--chunk-size 500] [--days 7]
+
+Groups are processed in chunks; each chunk is two grouped aggregate queries
+(range scans on ix_settlements_group_created_id), one bulk delete and one
+bulk insert, committed on its own.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.models.group import Group
+from app.services.badge import BadgeService
+
+
+def compute_weekly_badges(chunk_size: int, days: int) -> None:
+    db = SessionLocal()
+    started = time.perf_counter()
+    since = datetime.utcnow() - timedelta(days=days)
+    try:
+        group_ids = [group_id for (group_id,) in db.query(Group.id).order_by(Group.id).all()]
+        total_chunks = (len(group_ids) + chunk_size - 1) // chunk_size
+        print(f"Computing weekly badges for {len(group_ids)} groups since {since:%Y-%m-%d %H:%M} "
+              f"({total_chunks} chunks of {chunk_size})")
+
+        service = BadgeService(db)
+        total_awarded = 0
+        for chunk_index in range(total_chunks):
+            chunk = group_ids[chunk_index * chunk_size:(chunk_index + 1) * chunk_size]
+            chunk_started = time.perf_counter()
+
+            awarded = service.calculate_weekly_badges_for_groups(chunk, since)
+            db.commit()
+
+            total_awarded += awarded
+            print(f"  chunk {chunk_index + 1}/{total_chunks}: groups {chunk[0]}-{chunk[-1]}, "
+                  f"{awarded} badges awarded ({time.perf_counter() - chunk_started:.2f}s)")
+
+        print(f"Done: {total_awarded} badges awarded in {time.perf_counter() - started:.2f}s")
+    except Exception as exc:
+        db.rollback()
+        print(f"Error computing weekly badges: {exc}")
+        raise
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-size", type=int, default=500, help="Groups per batch (default 500)")
+    parser.add_argument("--days", type=int, default=7, help="Ranking window in days (default 7)")
+    args = parser.parse_args()
+
+    compute_weekly_badges(args.chunk_size, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Garbage-collect the content-addressed upload store.
+Usage: python -m app.scripts.gc_uploads [--grace-hours 24] [--dry-run]
+
+Deletes, once they are older than the grace period:
+- blobs whose reference count is 0 (row and file),
+- files in the store with no upload_blobs row (the upload's request failed
+  before it took a reference),
+- temporary .part files left by interrupted uploads.
+The grace period covers uploads whose reference isn't committed yet; a
+re-upload of an existing file refreshes its mtime for the same reason.
+Legacy uuid-named uploads are never touched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.upload import UploadBlob
+from app.services.uploads import CONTENT_FILE, path_for
+
+
+def _older_than(path: Path, cutoff: float) -> bool:
+    try:
+        return path.stat().st_mtime < cutoff
+    except FileNotFoundError:
+        return False
+
+
+def _unlink(path: Path, dry_run: bool):
+    if not dry_run:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def gc_uploads(grace_hours: float, dry_run: bool, batch_size: int = 500) -> None:
+    started = time.perf_counter()
+    root = Path(settings.UPLOAD_DIR)
+    cutoff = time.time() - grace_hours * 3600
+    db = SessionLocal()
+    try:
+        # 1. Unreferenced blobs
+        deleted_blobs = 0
+        last_id = 0
+        while True:
+            candidates = db.query(UploadBlob.id).filter(
+                UploadBlob.ref_count <= 0,
+                UploadBlob.updated_at < datetime.utcnow() - timedelta(hours=grace_hours),
+                UploadBlob.id > last_id
+            ).order_by(UploadBlob.id).limit(batch_size).all()
+            if not candidates:
+                break
+            last_id = candidates[-1].id
+
+            # Re-check under lock: a request may have taken a reference since
+            blobs = db.query(UploadBlob).filter(
+                UploadBlob.id.in_([row.id for row in candidates]),
+                UploadBlob.ref_count <= 0
+            ).with_for_update().all()
+            for blob in blobs:
+                path = path_for(blob.url)
+                if path.exists() and not _older_than(path, cutoff):
+                    continue  # just re-uploaded; its reference is probably on the way
+                if not dry_run:
+                    db.delete(blob)
+                _unlink(path, dry_run)
+                deleted_blobs += 1
+            db.commit()
+        print(f"Unreferenced blobs deleted: {deleted_blobs}")
+
+        # 2. Files that never got a row, and 3. abandoned temp files
+        tracked = {sha256 for (sha256,) in db.query(UploadBlob.sha256).all()}
+        db.rollback()
+        orphan_files = partial_files = 0
+        for path in root.glob("??/*"):
+            if CONTENT_FILE.match(path.name) and path.stem not in tracked and _older_than(path, cutoff):
+                _unlink(path, dry_run)
+                orphan_files += 1
+        for path in root.glob(".upload-*.part"):
+            if _older_than(path, cutoff):
+                _unlink(path, dry_run)
+                partial_files += 1
+        print(f"Untracked files deleted: {orphan_files}, temporary files deleted: {partial_files}")
+
+        print(f"Done{' (dry run)' if dry_run else ''} in {time.perf_counter() - started:.2f}s")
+    except Exception as exc:
+        db.rollback()
+        print(f"Error collecting uploads: {exc}")
+        raise
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grace-hours", type=float, default=24, help="Minimum age before deletion (default 24)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted")
+    args = parser.parse_args()
+
+    gc_uploads(args.grace_hours, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
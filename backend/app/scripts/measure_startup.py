@@ -0,0 +1,116 @@
+"""
+Measure application startup: import time, time until the server accepts
+requests (/health) and until it is ready (/ready), and graceful shutdown.
+Usage: python -m app.scripts.measure_startup [--server uvicorn|gunicorn] [--runs 5] [--max-seconds 5]
+
+Each run starts a fresh server process on the configured database (e.g.
+DB_URL=sqlite:///./startup.db after `python -m app.scripts.migrate`).
+With --max-seconds the script exits 1 when the median time-to-ready is
+over budget, so it can gate CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+
+def _status(url: str) -> Optional[int]:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except OSError:
+        return None
+
+
+def measure_import() -> float:
+    """Seconds to import app.main in a fresh interpreter."""
+    output = subprocess.check_output([
+        sys.executable, "-c",
+        "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)",
+    ])
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def server_command(server: str, port: int, workers: int) -> List[str]:
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "app.main:app"]
+    return [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)]
+
+
+def measure_run(command: List[str], port: int, timeout: float) -> Dict[str, float]:
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timings: Dict[str, float] = {}
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode} during startup")
+            if "listening" not in timings and _status(f"{base}/health") == 200:
+                timings["listening"] = time.perf_counter() - started
+            if "listening" in timings and _status(f"{base}/ready") == 200:
+                timings["ready"] = time.perf_counter() - started
+                break
+            time.sleep(0.02)
+        else:
+            raise RuntimeError(f"server not ready after {timeout:.0f}s")
+    finally:
+        stopping = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        timings["shutdown"] = time.perf_counter() - stopping
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers (default 2)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-run startup timeout in seconds")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if median time-to-ready exceeds this")
+    args = parser.parse_args()
+
+    # Background services would only add noise to the timing
+    os.environ.setdefault("OUTBOX_WORKER_ENABLED", "false")
+
+    import_seconds = measure_import()
+    print(f"import app.main: {import_seconds * 1000:.0f} ms")
+
+    command = server_command(args.server, args.port, args.workers)
+    runs = []
+    for run in range(1, args.runs + 1):
+        timings = measure_run(command, args.port, args.timeout)
+        runs.append(timings)
+        print(f"  run {run}: listening {timings['listening'] * 1000:.0f} ms, "
+              f"ready {timings['ready'] * 1000:.0f} ms, shutdown {timings['shutdown'] * 1000:.0f} ms")
+
+    median_ready = statistics.median(timings["ready"] for timings in runs)
+    median_shutdown = statistics.median(timings["shutdown"] for timings in runs)
+    print(f"{args.server}: median ready {median_ready * 1000:.0f} ms, "
+          f"median shutdown {median_shutdown * 1000:.0f} ms over {len(runs)} runs")
+
+    if args.max_seconds is not None and median_ready > args.max_seconds:
+        print(f"Startup over budget: {median_ready:.2f}s > {args.max_seconds:.2f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
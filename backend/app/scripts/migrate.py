@@ -0,0 +1,38 @@
+"""
+Apply versioned schema migrations (app.migrations).
+Usage: python -m app.scripts.migrate [--status] [--to VERSION]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app.database import engine
+from app.migrations import HEAD, MIGRATIONS, current_version, upgrade
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--status", action="store_true", help="Show applied/pending migrations and exit")
+    parser.add_argument("--to", type=int, default=None, help=f"Target version (default: head, {HEAD})")
+    args = parser.parse_args()
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    if args.status:
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version <= version else "pending"
+            print(f"  {migration.version:04d}_{migration.name}: {state}")
+        return
+
+    applied = upgrade(engine, args.to)
+    for migration in applied:
+        print(f"  applied {migration.version:04d}_{migration.name}")
+    with engine.connect() as conn:
+        print(f"Schema at version {current_version(conn)} (head {HEAD})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Check or repair the participant_balances ledger against the history it is
+derived from (unsettled expenses and completed transfers).
+Usage: python -m app.scripts.rebuild_balances [--check] [--group-id ID ...]
+
+--check only reports groups whose stored balances differ from
+LedgerService.compute_balances_from_history and exits non-zero if any do.
+Without it, every drifted group is rebuilt with LedgerService.rebuild_group
+(which also invalidates its settlement results), one commit per group.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from app.database import SessionLocal
+from app.models.group import Group
+from app.services.ledger import LedgerService
+
+
+def _nonzero(balances: Dict[int, Decimal]) -> Dict[int, Decimal]:
+    # A participant with no row and one stored at 0.00 are the same balance
+    return {participant_id: balance for participant_id, balance in balances.items() if balance}
+
+
+def rebuild_balances(group_ids: Optional[List[int]] = None, check_only: bool = False) -> List[int]:
+    """Returns the ids of groups whose stored balances had drifted from history."""
+    db = SessionLocal()
+    drifted = []
+    try:
+        if group_ids is None:
+            group_ids = [group_id for (group_id,) in db.query(Group.id).order_by(Group.id).all()]
+
+        for group_id in group_ids:
+            # Writers bump the group row before touching balances: hold it so none interleave
+            if db.query(Group.id).filter(Group.id == group_id).with_for_update().scalar() is None:
+                print(f"  group {group_id}: not found")
+                db.rollback()
+                continue
+
+            ledger = LedgerService(db)
+            stored = _nonzero(ledger.get_balances(group_id))
+            expected = _nonzero(ledger.compute_balances_from_history(group_id))
+            if stored == expected:
+                db.rollback()
+                continue
+
+            drifted.append(group_id)
+            changed = sorted(set(stored) | set(expected))
+            diff = ", ".join(
+                f"{pid}: {stored.get(pid, Decimal('0.00'))} -> {expected.get(pid, Decimal('0.00'))}" for pid in changed
+                if stored.get(pid) != expected.get(pid)
+            )
+            if check_only:
+                print(f"  group {group_id}: drifted ({diff})")
+                db.rollback()
+            else:
+                ledger.rebuild_group(group_id)
+                db.commit()
+                print(f"  group {group_id}: rebuilt ({diff})")
+
+        verb = "drifted" if check_only else "rebuilt"
+        print(f"Done: {len(drifted)} of {len(group_ids)} groups {verb}")
+        return drifted
+    except Exception as exc:
+        db.rollback()
+        print(f"Error rebuilding balances: {exc}")
+        raise
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="Only report drifted groups (exit 1 if any)")
+    parser.add_argument("--group-id", type=int, action="append", help="Limit to these groups (repeatable)")
+    args = parser.parse_args()
+
+    drifted = rebuild_balances(args.group_id, check_only=args.check)
+    if args.check and drifted:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Run the outbox worker outside the API process.
+Usage: python -m app.scripts.run_outbox_worker [--once]
+
+Set OUTBOX_WORKER_ENABLED=false on the API instances when running it this way.
+Several workers can run at once; claimed rows are leased, not shared.
+"""
+
+import argparse
+import time
+
+from app.services.work_queue import OutboxWorker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="Drain pending events and exit")
+    args = parser.parse_args()
+
+    worker = OutboxWorker()
+    if args.once:
+        started = time.perf_counter()
+        total = 0
+        while True:
+            claimed = worker.run_once()
+            if not claimed:
+                break
+            total += claimed
+            print(f"  processed {claimed} events")
+        print(f"Done: {total} events in {time.perf_counter() - started:.2f}s")
+        return
+
+    print("Outbox worker running (Ctrl+C to stop)")
+    worker.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping outbox worker...")
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
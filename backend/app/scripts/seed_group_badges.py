@@ -4,6 +4,7 @@ Usage: python -m app.scripts.seed_group_badges
 """
 
 from app.database import SessionLocal
+from app.services.badge_catalog import badge_catalog
 from app.models.badge import (
     Badge,
     GROUP_BADGE_SANDY,
@@ -18,6 +19,9 @@ from app.models.badge import (
 def seed_group_badges():
     db = SessionLocal()
     try:
+        # Only badges whose artwork is in public/badges. The game_master and
+        # quick_settler rules are already live and stay dormant (progress is
+        # still counted) until their badges are added here with an icon.
         badges_data = [
             {
                 "name": "성실한 다람이",
@@ -78,6 +82,7 @@ def seed_group_badges():
             print(f"Created badge: {badge_data['name']}")
 
         db.commit()
+        badge_catalog.invalidate()
         print("Badge seeding completed successfully!")
 
     except Exception as e:
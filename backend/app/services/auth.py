@@ -1,49 +1,122 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-import httpx
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, Avatar, AuthProvider
-from app.schemas.user import SignUpRequest, LoginRequest, TokenResponse
+from app.services.group_version import bump_user_groups_version
+from app.schemas.user import SignUpRequest, TokenResponse
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
+class UserCache:
+    """
+    Bounded LRU of users.* column values by id, with a short TTL.
+    Lets get_current_user skip the users SELECT on most requests. Entries
+    are dropped explicitly after profile writes and by the mapper event
+    below; the TTL bounds staleness from writes in other processes.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = settings.AUTH_USER_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.AUTH_USER_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            stored_at, values = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def put(self, user: User):
+        if not self.enabled:
+            return
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic(), values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    """Any user row written through the ORM in this process drops its entry."""
+    user_cache.invalidate(target.id)
+
+
+def normalize_google_mode(mode: Optional[str]) -> str:
+    mode = (mode or "login").lower()
+    if mode not in {"login", "signup"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Google auth mode"
+        )
+    return mode
+
+
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
 
-    def _hash_password(self, password: str) -> str:
-        return pwd_context.hash(password)
-
-    def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
-
     def _create_access_token(self, user_id: int) -> str:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         to_encode = {"sub": str(user_id), "exp": expire}
         return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
-    def signup(self, request: SignUpRequest) -> User:
-        # Check if email exists
-        existing = self.db.query(User).filter(User.email == request.email).first()
-        if existing:
+    # Email signup and login hash/verify passwords with password_hasher on the
+    # event loop (see routers/auth.py); these are the database steps around it.
+
+    def check_email_available(self, email: str):
+        if self.db.query(User.id).filter(User.email == email).first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
+    def create_email_user(self, request: SignUpRequest, password_hash: str) -> User:
+        # Check again: another signup may have taken the email while the password was hashed
+        self.check_email_available(request.email)
+
         # Create user
         user = User(
             email=request.email,
-            password_hash=self._hash_password(request.password),
+            password_hash=password_hash,
             name=request.name,
             auth_provider=AuthProvider.EMAIL,
             payment_method=request.payment_method,
@@ -60,62 +133,30 @@ class AuthService:
         self.db.refresh(user)
         return user
 
-    def login(self, request: LoginRequest) -> TokenResponse:
-        user = self.db.query(User).filter(User.email == request.email).first()
-        if not user or not user.password_hash:
+    def password_login_user(self, email: str) -> Tuple[int, str]:
+        """(user id, password hash) of an email account, 401 if there is none."""
+        row = self.db.query(User.id, User.password_hash).filter(User.email == email).first()
+        if not row or not row.password_hash:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
+        return row.id, row.password_hash
 
-        if not self._verify_password(request.password, user.password_hash):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid email or password"
-            )
+    def upgrade_password_hash(self, user_id: int, rehashed: str):
+        """Store a hash made with the current cost factor."""
+        self.db.query(User).filter(User.id == user_id).update(
+            {User.password_hash: rehashed}, synchronize_session=False
+        )
+        self.db.commit()
 
-        token = self._create_access_token(user.id)
-        return TokenResponse(access_token=token)
+    def issue_token(self, user_id: int) -> TokenResponse:
+        return TokenResponse(access_token=self._create_access_token(user_id))
 
-    def google_login(self, code: str, mode: str = "login") -> TokenResponse:
-        """Exchange Google auth code for access token and login/register user."""
-        mode = (mode or "login").lower()
-        if mode not in {"login", "signup"}:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid Google auth mode"
-            )
-
-        # Get Google access token
-        token_url = "https://oauth2.googleapis.com/token"
-        token_data = {
-            "grant_type": "authorization_code",
-            "client_id": settings.GOOGLE_CLIENT_ID,
-            "client_secret": settings.GOOGLE_CLIENT_SECRET,
-            "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-            "code": code,
-        }
-
-        with httpx.Client() as client:
-            token_response = client.post(token_url, data=token_data)
-            if token_response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get Google access token"
-                )
-            google_token = token_response.json()["access_token"]
-
-            # Get user info from Google
-            user_url = "https://www.googleapis.com/oauth2/v2/userinfo"
-            headers = {"Authorization": f"Bearer {google_token}"}
-            user_response = client.get(user_url, headers=headers)
-            if user_response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get Google user info"
-                )
+    def google_login(self, google_user: Dict[str, Any], mode: str = "login") -> TokenResponse:
+        """Login/register the user behind a Google profile (see google_oauth.fetch_user)."""
+        mode = normalize_google_mode(mode)
 
-        google_user = user_response.json()
         google_id = str(google_user["id"])
         google_email = google_user.get("email")
         google_name = google_user.get("name", "User")
@@ -132,6 +173,7 @@ class AuthService:
                 if user:
                     user.google_id = google_id
                     self.db.commit()
+                    user_cache.invalidate(user.id)
 
             if not user:
                 if mode == "login":
@@ -175,17 +217,15 @@ class AuthService:
         user.name = name
         user.payment_method = payment_method
         user.payment_account = payment_account
+        bump_user_groups_version(self.db, user.id)
         self.db.commit()
+        user_cache.invalidate(user.id)
         self.db.refresh(user)
         return user
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency to get current authenticated user from JWT token."""
-    token = credentials.credentials
+def _user_id_from_token(token: str) -> int:
+    """Decode and verify the JWT; returns the user id (no database access)."""
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         user_id: str = payload.get("sub")
@@ -194,16 +234,83 @@ def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token"
             )
-    except JWTError:
+        return int(user_id)
+    except (JWTError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+
+def user_id_from_authorization(authorization: Optional[str]) -> Optional[int]:
+    """User id from an "Authorization: Bearer ..." header, or None (never raises)."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return _user_id_from_token(authorization[7:].strip())
+    except HTTPException:
+        return None
+
+
+# Read-your-writes marker for replica routing: set after a successful write and
+# checked by the read dependencies, so it holds whichever worker serves the next request
+RECENT_WRITE_COOKIE = "recent_write"
+
+
+def recent_write_token(user_id: int) -> str:
+    """Signed marker that the user just wrote; expires after DB_READ_YOUR_WRITES_SECONDS."""
+    expire = datetime.utcnow() + timedelta(seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+    # "wrote" rather than "sub": the marker must never pass as an access token
+    to_encode = {"wrote": str(user_id), "exp": expire}
+    return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def wrote_recently(token: Optional[str], user_id: Optional[int]) -> bool:
+    """Whether `token` is an unexpired recent_write_token for this user (never raises)."""
+    if not token or user_id is None:
+        return False
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("wrote") == str(user_id)
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> int:
+    """
+    Dependency for routes that only need the caller's id.
+    Trusts the signed token and never loads the users row; tokens are only
+    issued for existing users and users are never deleted.
+    """
+    return _user_id_from_token(credentials.credentials)
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependency to get current authenticated user from JWT token.
+    A cache hit touches no session; a miss loads the row through the request's
+    AsyncSession. The user may be detached, so routes that write it or read its
+    relationships merge it into their own session first.
+    """
+    user_id = _user_id_from_token(credentials.credentials)
+
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        # Rebuild a persistent User from the cached columns without a SELECT
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return user
+
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    user_cache.put(user)
     return user
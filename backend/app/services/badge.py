@@ -1,213 +1,158 @@
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from decimal import Decimal
 
-from app.models.badge import Badge, GROUP_BADGE_SANDY, GROUP_BADGE_GARY_SNAIL, GROUP_BADGE_USE_MY_CARD, GROUP_BADGE_MR_KRABS, GROUP_BADGE_KRABBY_PATTY_VIP, GROUP_BADGE_NO_COIN_SQUIDWARD
+from app.models.badge import GROUP_BADGE_USE_MY_CARD, GROUP_BADGE_MR_KRABS, GROUP_BADGE_KRABBY_PATTY_VIP, GROUP_BADGE_NO_COIN_SQUIDWARD
 from app.models.user import UserBadge
+from app.services.badge_catalog import badge_catalog
+from app.services.group_version import bump_group_version, bump_groups_version
+
+
+WEEKLY_BADGE_CODES = [
+    GROUP_BADGE_USE_MY_CARD,
+    GROUP_BADGE_MR_KRABS,
+    GROUP_BADGE_KRABBY_PATTY_VIP,
+    GROUP_BADGE_NO_COIN_SQUIDWARD,
+]
 
 
 class BadgeService:
     def __init__(self, db: Session):
         self.db = db
 
-    def check_and_award_payment_speed_badges(
-        self, settlement_result, user_id: int, group_id: int
-    ):
-        """
-        Calculate time diff between settlement_result.created_at and completed_at
-        - If <= 5 min: Award Sandy badge
-        - If > 48 hours: Award GarySnail badge
-        """
-        print(f"[BADGE DEBUG] Checking payment speed badges for user_id={user_id}, group_id={group_id}")
-
-        debt_time = settlement_result.created_at
-
-        print(f"[BADGE DEBUG] completed_at={settlement_result.completed_at}, debt_time={debt_time}")
-
-        if not settlement_result.completed_at or not debt_time:
-            print(f"[BADGE DEBUG] Missing timestamps, skipping")
-            return
-
-        time_diff = settlement_result.completed_at - debt_time
-        time_diff_seconds = time_diff.total_seconds()
-        time_diff_minutes = time_diff_seconds / 60
-        time_diff_hours = time_diff_seconds / 3600
-
-        print(f"[BADGE DEBUG] Time diff: {time_diff_minutes:.2f} minutes ({time_diff_hours:.2f} hours)")
-
-        # Check for Sandy badge (5 minutes)
-        if time_diff_minutes <= 5:
-            print(f"[BADGE DEBUG] Awarding Sandy badge (payment within 5 minutes)")
-            sandy_badge = self.db.query(Badge).filter(
-                Badge.condition_code == GROUP_BADGE_SANDY
-            ).first()
-            if sandy_badge:
-                print(f"[BADGE DEBUG] Sandy badge found: id={sandy_badge.id}")
-                result = self._award_badge_if_not_exists(user_id, sandy_badge.id, group_id)
-                print(f"[BADGE DEBUG] Award result: {result}")
-            else:
-                print(f"[BADGE DEBUG] Sandy badge NOT found in database!")
-
-        # Check for GarySnail badge (48 hours)
-        if time_diff_hours > 48:
-            print(f"[BADGE DEBUG] Awarding GarySnail badge (payment after 48 hours)")
-            gary_badge = self.db.query(Badge).filter(
-                Badge.condition_code == GROUP_BADGE_GARY_SNAIL
-            ).first()
-            if gary_badge:
-                self._award_badge_if_not_exists(user_id, gary_badge.id, group_id)
-            else:
-                print(f"[BADGE DEBUG] GarySnail badge NOT found in database!")
-
-    def calculate_weekly_spending_badges(self, group_id: int) -> List[UserBadge]:
+    def calculate_weekly_spending_badges(self, group_id: int) -> int:
+        """Recalculate weekly ranking badges for one group. Returns the number awarded."""
+        awarded = self.calculate_weekly_badges_for_groups([group_id])
+        self.db.commit()
+        return awarded
+
+    def calculate_weekly_badges_for_groups(self, group_ids: List[int], since: Optional[datetime] = None) -> int:
         """
-        Query settlements from last 7 days:
+        Weekly ranking badges for a chunk of groups, from settlements since `since`
+        (default: last 7 days):
         - UseMyCard: MAX(total_amount) per payer
         - MrKrabs: MIN(total_amount) per payer
         - KrabbyPattyVIP: SUM(amount_owed) per participant (highest)
         - NoCoinSquidward: SUM(amount_owed) per participant (lowest)
 
-        Remove old weekly badges before awarding new ones.
+        Two grouped aggregate queries for the whole chunk, then old weekly
+        badges are replaced with one bulk DELETE and one bulk INSERT.
         Handle ties: award to all users with same value.
+        Does not commit. Returns the number of badges awarded.
         """
         from app.models.settlement import Settlement, SettlementParticipant
         from app.models.group import GroupParticipant
-        from sqlalchemy import func
 
-        # Remove old weekly badges
-        self.remove_old_weekly_badges(group_id)
+        if not group_ids:
+            return 0
+        if since is None:
+            since = datetime.utcnow() - timedelta(days=7)
 
-        # Get settlements from last 7 days
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        settlements = self.db.query(Settlement).filter(
-            Settlement.group_id == group_id,
-            Settlement.created_at >= seven_days_ago
+        # Per (group, payer user): largest and smallest single payment.
+        # Unclaimed payers come back with user_id NULL; they count for the group minimum.
+        payer_rows = self.db.query(
+            Settlement.group_id,
+            GroupParticipant.user_id,
+            func.max(Settlement.total_amount),
+            func.min(Settlement.total_amount),
+        ).join(
+            GroupParticipant, GroupParticipant.id == Settlement.payer_participant_id
+        ).filter(
+            Settlement.group_id.in_(group_ids),
+            Settlement.created_at >= since
+        ).group_by(
+            Settlement.group_id, GroupParticipant.user_id
         ).all()
 
-        if not settlements:
-            return []
-
-        awarded_badges = []
-
-        # Calculate UseMyCard: MAX single payment per payer
-        max_single_payment = Decimal("0")
-        max_payers: Dict[int, Decimal] = {}  # user_id -> max payment
-
-        for settlement in settlements:
-            payer = settlement.payer_participant
-            if payer and payer.user_id:
-                current_max = max_payers.get(payer.user_id, Decimal("0"))
-                if settlement.total_amount > current_max:
-                    max_payers[payer.user_id] = settlement.total_amount
-                if settlement.total_amount > max_single_payment:
-                    max_single_payment = settlement.total_amount
-
-        if max_single_payment > 0:
-            use_my_card_badge = self.db.query(Badge).filter(
-                Badge.condition_code == GROUP_BADGE_USE_MY_CARD
-            ).first()
-            if use_my_card_badge:
-                for user_id, amount in max_payers.items():
-                    if amount == max_single_payment:
-                        badge = self._award_badge_if_not_exists(
-                            user_id, use_my_card_badge.id, group_id
-                        )
-                        if badge:
-                            awarded_badges.append(badge)
-
-        # Calculate MrKrabs: MIN single payment per payer
-        min_single_payment = min([s.total_amount for s in settlements]) if settlements else Decimal("0")
-        min_payers: Dict[int, Decimal] = {}  # user_id -> min payment
-
-        for settlement in settlements:
-            payer = settlement.payer_participant
-            if payer and payer.user_id:
-                if payer.user_id not in min_payers:
-                    min_payers[payer.user_id] = settlement.total_amount
-                else:
-                    current_min = min_payers[payer.user_id]
-                    if settlement.total_amount < current_min:
-                        min_payers[payer.user_id] = settlement.total_amount
-
-        if min_single_payment > 0:
-            mr_krabs_badge = self.db.query(Badge).filter(
-                Badge.condition_code == GROUP_BADGE_MR_KRABS
-            ).first()
-            if mr_krabs_badge:
-                for user_id, amount in min_payers.items():
-                    if amount == min_single_payment:
-                        badge = self._award_badge_if_not_exists(
-                            user_id, mr_krabs_badge.id, group_id
-                        )
-                        if badge:
-                            awarded_badges.append(badge)
-
-        # Calculate KrabbyPattyVIP: MAX total spending (sum of amount_owed)
-        settlement_ids = [s.id for s in settlements]
-        spending_query = self.db.query(
+        # Per (group, claimed user): total share of this week's settlements
+        spending_rows = self.db.query(
+            Settlement.group_id,
             GroupParticipant.user_id,
-            func.sum(SettlementParticipant.amount_owed).label("total_spending")
+            func.sum(SettlementParticipant.amount_owed),
+        ).select_from(SettlementParticipant).join(
+            Settlement, Settlement.id == SettlementParticipant.settlement_id
         ).join(
-            SettlementParticipant,
-            SettlementParticipant.participant_id == GroupParticipant.id
+            GroupParticipant, GroupParticipant.id == SettlementParticipant.participant_id
         ).filter(
-            SettlementParticipant.settlement_id.in_(settlement_ids),
+            Settlement.group_id.in_(group_ids),
+            Settlement.created_at >= since,
             GroupParticipant.user_id.isnot(None)
         ).group_by(
-            GroupParticipant.user_id
+            Settlement.group_id, GroupParticipant.user_id
         ).all()
 
-        if spending_query:
-            max_spending = max([s.total_spending for s in spending_query])
-            krabby_patty_badge = self.db.query(Badge).filter(
-                Badge.condition_code == GROUP_BADGE_KRABBY_PATTY_VIP
-            ).first()
+        awards = self._weekly_awards(payer_rows, spending_rows)
+
+        # Replace old weekly badges for every group in the chunk
+        self.remove_old_weekly_badges(group_ids)
+        if awards:
+            self.db.execute(insert(UserBadge), [
+                {"user_id": user_id, "badge_id": badge_id, "group_id": group_id}
+                for group_id, user_id, badge_id in sorted(awards)
+            ])
+        return len(awards)
+
+    def _weekly_awards(self, payer_rows, spending_rows) -> Set[Tuple[int, int, int]]:
+        """(group_id, user_id, badge_id) awards from the aggregated rows."""
+        use_my_card_badge = badge_catalog.get_by_code(self.db, GROUP_BADGE_USE_MY_CARD)
+        mr_krabs_badge = badge_catalog.get_by_code(self.db, GROUP_BADGE_MR_KRABS)
+        krabby_patty_badge = badge_catalog.get_by_code(self.db, GROUP_BADGE_KRABBY_PATTY_VIP)
+        no_coin_badge = badge_catalog.get_by_code(self.db, GROUP_BADGE_NO_COIN_SQUIDWARD)
+
+        payers_by_group: Dict[int, list] = {}
+        for group_id, user_id, max_total, min_total in payer_rows:
+            payers_by_group.setdefault(group_id, []).append((user_id, max_total, min_total))
+        spending_by_group: Dict[int, list] = {}
+        for group_id, user_id, total_spending in spending_rows:
+            spending_by_group.setdefault(group_id, []).append((user_id, total_spending))
+
+        awards: Set[Tuple[int, int, int]] = set()
+
+        for group_id, payers in payers_by_group.items():
+            # UseMyCard: largest single payment by a claimed payer
+            claimed = [(user_id, max_total) for user_id, max_total, _ in payers if user_id]
+            max_single_payment = max([amount for _, amount in claimed], default=Decimal("0"))
+            if use_my_card_badge and max_single_payment > 0:
+                for user_id, amount in claimed:
+                    if amount == max_single_payment:
+                        awards.add((group_id, user_id, use_my_card_badge.id))
+
+            # MrKrabs: smallest single payment in the group
+            min_single_payment = min(min_total for _, _, min_total in payers)
+            if mr_krabs_badge and min_single_payment > 0:
+                for user_id, _, amount in payers:
+                    if user_id and amount == min_single_payment:
+                        awards.add((group_id, user_id, mr_krabs_badge.id))
+
+        for group_id, spending in spending_by_group.items():
+            # KrabbyPattyVIP: highest total spending
+            max_spending = max(total for _, total in spending)
             if krabby_patty_badge and max_spending > 0:
-                for user_id, total_spending in spending_query:
-                    if total_spending == max_spending:
-                        badge = self._award_badge_if_not_exists(
-                            user_id, krabby_patty_badge.id, group_id
-                        )
-                        if badge:
-                            awarded_badges.append(badge)
-
-            # Calculate NoCoinSquidward: MIN total spending
-            min_spending = min([s.total_spending for s in spending_query])
-            no_coin_badge = self.db.query(Badge).filter(
-                Badge.condition_code == GROUP_BADGE_NO_COIN_SQUIDWARD
-            ).first()
+                for user_id, total in spending:
+                    if total == max_spending:
+                        awards.add((group_id, user_id, krabby_patty_badge.id))
+
+            # NoCoinSquidward: lowest total spending
+            min_spending = min(total for _, total in spending)
             if no_coin_badge and min_spending > 0:
-                for user_id, total_spending in spending_query:
-                    if total_spending == min_spending:
-                        badge = self._award_badge_if_not_exists(
-                            user_id, no_coin_badge.id, group_id
-                        )
-                        if badge:
-                            awarded_badges.append(badge)
+                for user_id, total in spending:
+                    if total == min_spending:
+                        awards.add((group_id, user_id, no_coin_badge.id))
 
-        self.db.commit()
-        return awarded_badges
-
-    def remove_old_weekly_badges(self, group_id: int):
-        """Remove previous weekly badges for this group."""
-        weekly_badge_codes = [
-            GROUP_BADGE_USE_MY_CARD,
-            GROUP_BADGE_MR_KRABS,
-            GROUP_BADGE_KRABBY_PATTY_VIP,
-            GROUP_BADGE_NO_COIN_SQUIDWARD,
-        ]
-
-        badges = self.db.query(Badge).filter(
-            Badge.condition_code.in_(weekly_badge_codes)
-        ).all()
-        badge_ids = [b.id for b in badges]
+        return awards
+
+    def remove_old_weekly_badges(self, group_ids: List[int]):
+        """Remove previous weekly badges for these groups."""
+        badge_ids = badge_catalog.ids_for_codes(self.db, WEEKLY_BADGE_CODES)
 
         if badge_ids:
             self.db.query(UserBadge).filter(
-                UserBadge.group_id == group_id,
+                UserBadge.group_id.in_(group_ids),
                 UserBadge.badge_id.in_(badge_ids)
             ).delete(synchronize_session=False)
+            bump_groups_version(self.db, group_ids)
 
     def _award_badge_if_not_exists(
         self, user_id: int, badge_id: int, group_id: Optional[int] = None
@@ -230,5 +175,7 @@ class BadgeService:
             group_id=group_id
         )
         self.db.add(user_badge)
+        if group_id:
+            bump_group_version(self.db, group_id)
         print(f"[BADGE DEBUG] Badge added to session: {user_badge}")
         return user_badge
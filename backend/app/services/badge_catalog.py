@@ -0,0 +1,92 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, NamedTuple, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.badge import Badge
+from app.schemas.badge import BadgeResponse
+
+
+class _Snapshot(NamedTuple):
+    badges: Tuple[BadgeResponse, ...]
+    by_id: Mapping[int, BadgeResponse]
+    by_code: Mapping[str, BadgeResponse]
+    loaded_at: float
+
+
+class BadgeCatalog:
+    """
+    Process-wide cache of the badges table (static seed data).
+    Loaded in one query on first use; dropped by invalidate() whenever badges
+    are seeded or edited, and after BADGE_CATALOG_TTL_SECONDS as a safety net
+    for edits made by other processes.
+
+    Readers work on one immutable snapshot, so a concurrent invalidate() or
+    reload never leaves them between an emptied and a filled catalog.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = settings.BADGE_CATALOG_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        # Bumped by invalidate(): a load that overlapped it must not be stored
+        self._generation = 0
+
+    def _load(self, db: Session) -> _Snapshot:
+        with self._lock:
+            generation = self._generation
+        badges = tuple(BadgeResponse.model_validate(b) for b in db.query(Badge).order_by(Badge.id).all())
+        by_code = {}
+        for badge in badges:
+            # Keep the first badge per code, like query(...).first() did
+            if badge.condition_code and badge.condition_code not in by_code:
+                by_code[badge.condition_code] = badge
+        snapshot = _Snapshot(
+            badges=badges,
+            by_id=MappingProxyType({badge.id: badge for badge in badges}),
+            by_code=MappingProxyType(by_code),
+            loaded_at=time.monotonic(),
+        )
+        with self._lock:
+            if self._generation == generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def _ensure_loaded(self, db: Session) -> _Snapshot:
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl_seconds:
+            snapshot = self._load(db)
+        return snapshot
+
+    def all(self, db: Session) -> List[BadgeResponse]:
+        return list(self._ensure_loaded(db).badges)
+
+    def get_by_id(self, db: Session, badge_id: int) -> Optional[BadgeResponse]:
+        return self._ensure_loaded(db).by_id.get(badge_id)
+
+    def get_by_code(self, db: Session, condition_code: str) -> Optional[BadgeResponse]:
+        return self._ensure_loaded(db).by_code.get(condition_code)
+
+    def ids_for_codes(self, db: Session, condition_codes: Iterable[str]) -> List[int]:
+        by_code = self._ensure_loaded(db).by_code
+        return [by_code[code].id for code in condition_codes if code in by_code]
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+
+badge_catalog = BadgeCatalog()
+
+
+@event.listens_for(Badge, "after_insert")
+@event.listens_for(Badge, "after_update")
+@event.listens_for(Badge, "after_delete")
+def _invalidate_on_badge_change(mapper, connection, target):
+    """Any badge written through the ORM in this process drops the cache."""
+    badge_catalog.invalidate()
@@ -0,0 +1,317 @@
+"""
+Event-driven badge rules.
+
+Services publish domain events (settlement created, transfer completed,
+game finished) to BadgeRuleEngine inside their own transaction. Each rule
+declares the events it consumes and returns award/revoke decisions per
+user, using only the event itself and small per-(group, user) counters in
+badge_progress, so no rule rescans settlement or game history.
+
+Weekly ranking badges are rankings over a sliding window and stay in the
+batch job (app.scripts.compute_weekly_badges).
+"""
+
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy.orm import Session
+
+from app.models.badge import (
+    BadgeProgress,
+    GROUP_BADGE_SANDY,
+    GROUP_BADGE_GARY_SNAIL,
+    GROUP_BADGE_GAME_MASTER,
+    GROUP_BADGE_QUICK_SETTLER,
+)
+from app.models.group import GroupParticipant
+from app.models.user import UserBadge
+from app.services.badge_catalog import badge_catalog
+from app.services.group_version import bump_group_version
+
+
+# ---------------------------------------------------------------------------
+# Domain events
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class SettlementCreated:
+    group_id: int
+    settlement_id: int
+    payer_participant_id: int
+    total_amount: Decimal
+    participant_ids: Tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class TransferCompleted:
+    group_id: int
+    result_id: int
+    debtor_participant_id: int
+    creditor_participant_id: int
+    amount: Decimal
+    requested_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+@dataclass(frozen=True)
+class GameFinished:
+    group_id: int
+    game_result_id: int
+    participant_ids: Tuple[int, ...] = ()
+    loser_participant_id: Optional[int] = None
+
+
+EVENT_TYPES: Dict[str, Type] = {
+    "settlement_created": SettlementCreated,
+    "transfer_completed": TransferCompleted,
+    "game_finished": GameFinished,
+}
+
+
+def event_to_payload(event) -> Dict[str, Any]:
+    """JSON-safe dict for storing an event in the outbox."""
+    name = next(name for name, cls in EVENT_TYPES.items() if isinstance(event, cls))
+    data = {}
+    for key, value in asdict(event).items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        elif isinstance(value, tuple):
+            value = list(value)
+        data[key] = value
+    return {"type": name, "data": data}
+
+
+def event_from_payload(payload: Dict[str, Any]):
+    """Inverse of event_to_payload."""
+    cls = EVENT_TYPES[payload["type"]]
+    data = dict(payload["data"])
+    for f in fields(cls):
+        value = data.get(f.name)
+        if value is None:
+            continue
+        if f.type in (datetime, Optional[datetime]):
+            data[f.name] = datetime.fromisoformat(value)
+        elif f.type is Decimal:
+            data[f.name] = Decimal(value)
+        elif f.type == Tuple[int, ...]:
+            data[f.name] = tuple(value)
+    return cls(**data)
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+class BadgeProgressTracker:
+    """Read/increment badge_progress counters for the current transaction."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def increment(self, group_id: int, user_ids: List[int], metric: str, amount: int = 1) -> Dict[int, int]:
+        """Add `amount` to each user's counter (rows locked, created if missing). Returns new values."""
+        if not user_ids:
+            return {}
+
+        rows = self.db.query(BadgeProgress).filter(
+            BadgeProgress.group_id == group_id,
+            BadgeProgress.user_id.in_(user_ids),
+            BadgeProgress.metric == metric
+        ).with_for_update().all()
+        by_user = {row.user_id: row for row in rows}
+
+        values = {}
+        for user_id in user_ids:
+            row = by_user.get(user_id)
+            if row:
+                row.value = (row.value or 0) + amount
+            else:
+                row = BadgeProgress(group_id=group_id, user_id=user_id, metric=metric, value=amount)
+                self.db.add(row)
+                by_user[user_id] = row
+            values[user_id] = row.value
+        # Sessions don't autoflush; make the rows visible to later events in this transaction
+        self.db.flush()
+        return values
+
+
+@dataclass
+class RuleContext:
+    db: Session
+    progress: BadgeProgressTracker
+    # participant_id -> user_id for every participant named by the event (claimed only)
+    users: Dict[int, int] = field(default_factory=dict)
+
+
+class BadgeRule:
+    """
+    A badge rule: which badge, which events it consumes, and how to decide.
+    evaluate() returns {user_id: True (award) | False (revoke)}; users not
+    in the result are left unchanged.
+    """
+
+    badge_code: str = ""
+    events: Tuple[Type, ...] = ()
+
+    def evaluate(self, event, ctx: RuleContext) -> Dict[int, bool]:
+        raise NotImplementedError
+
+
+def _payment_delay(event: TransferCompleted) -> Optional[timedelta]:
+    if not event.requested_at or not event.completed_at:
+        return None
+    return event.completed_at - event.requested_at
+
+
+class PaymentDelayRule(BadgeRule):
+    """Award the debtor when a transfer is completed within / after a delay."""
+
+    events = (TransferCompleted,)
+    within: Optional[timedelta] = None
+    after: Optional[timedelta] = None
+
+    def evaluate(self, event: TransferCompleted, ctx: RuleContext) -> Dict[int, bool]:
+        debtor_user_id = ctx.users.get(event.debtor_participant_id)
+        delay = _payment_delay(event)
+        if not debtor_user_id or delay is None:
+            return {}
+        if self.within is not None and delay <= self.within:
+            return {debtor_user_id: True}
+        if self.after is not None and delay > self.after:
+            return {debtor_user_id: True}
+        return {}
+
+
+class SandyRule(PaymentDelayRule):
+    """성실한 다람이: paid within 5 minutes of the request."""
+    badge_code = GROUP_BADGE_SANDY
+    within = timedelta(minutes=5)
+
+
+class GarySnailRule(PaymentDelayRule):
+    """핑핑이의 집념: paid more than 48 hours after the request."""
+    badge_code = GROUP_BADGE_GARY_SNAIL
+    after = timedelta(hours=48)
+
+
+class QuickSettlerRule(PaymentDelayRule):
+    """빠른 정산러: paid within 1 hour of the request."""
+    badge_code = GROUP_BADGE_QUICK_SETTLER
+    within = timedelta(hours=1)
+
+
+class GameMasterRule(BadgeRule):
+    """게임 마스터: won (did not lose) 3 or more mini-games in the group."""
+
+    badge_code = GROUP_BADGE_GAME_MASTER
+    events = (GameFinished,)
+    metric = "game_wins"
+    required_wins = 3
+
+    def evaluate(self, event: GameFinished, ctx: RuleContext) -> Dict[int, bool]:
+        winner_user_ids = sorted({
+            ctx.users[participant_id]
+            for participant_id in event.participant_ids
+            if participant_id != event.loser_participant_id and participant_id in ctx.users
+        })
+        wins = ctx.progress.increment(event.group_id, winner_user_ids, self.metric)
+        return {user_id: True for user_id, count in wins.items() if count >= self.required_wins}
+
+
+DEFAULT_RULES: List[BadgeRule] = [
+    SandyRule(),
+    GarySnailRule(),
+    QuickSettlerRule(),
+    GameMasterRule(),
+]
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def _event_participant_ids(event) -> List[int]:
+    if isinstance(event, SettlementCreated):
+        return [event.payer_participant_id, *event.participant_ids]
+    if isinstance(event, TransferCompleted):
+        return [event.debtor_participant_id, event.creditor_participant_id]
+    if isinstance(event, GameFinished):
+        return list(event.participant_ids)
+    return []
+
+
+class BadgeRuleEngine:
+    """
+    Dispatches a domain event to the rules that consume it and applies their
+    decisions to user_badges. Only adds to the current transaction; callers commit.
+    """
+
+    def __init__(self, db: Session, rules: Optional[List[BadgeRule]] = None):
+        self.db = db
+        self.rules = DEFAULT_RULES if rules is None else rules
+
+    def publish(self, event) -> Dict[str, Dict[int, bool]]:
+        """Evaluate every matching rule. Returns {badge_code: {user_id: awarded}} for changes made."""
+        rules = [rule for rule in self.rules if isinstance(event, rule.events)]
+        if not rules:
+            return {}
+
+        ctx = RuleContext(
+            db=self.db,
+            progress=BadgeProgressTracker(self.db),
+            users=self._resolve_users(_event_participant_ids(event)),
+        )
+
+        changes: Dict[str, Dict[int, bool]] = {}
+        for rule in rules:
+            decisions = rule.evaluate(event, ctx)
+            applied = self._apply(rule.badge_code, event.group_id, decisions) if decisions else {}
+            if applied:
+                changes[rule.badge_code] = applied
+        return changes
+
+    def _resolve_users(self, participant_ids: List[int]) -> Dict[int, int]:
+        """participant_id -> user_id for claimed participants, in one query."""
+        if not participant_ids:
+            return {}
+        rows = self.db.query(GroupParticipant.id, GroupParticipant.user_id).filter(
+            GroupParticipant.id.in_(set(participant_ids)),
+            GroupParticipant.user_id.isnot(None)
+        ).all()
+        return {participant_id: user_id for participant_id, user_id in rows}
+
+    def _apply(self, badge_code: str, group_id: int, decisions: Dict[int, bool]) -> Dict[int, bool]:
+        badge = badge_catalog.get_by_code(self.db, badge_code)
+        if not badge:
+            return {}
+
+        held = {
+            user_id for (user_id,) in self.db.query(UserBadge.user_id).filter(
+                UserBadge.group_id == group_id,
+                UserBadge.badge_id == badge.id,
+                UserBadge.user_id.in_(decisions.keys())
+            ).all()
+        }
+
+        to_award = sorted(user_id for user_id, award in decisions.items() if award and user_id not in held)
+        to_revoke = sorted(user_id for user_id, award in decisions.items() if not award and user_id in held)
+
+        for user_id in to_award:
+            self.db.add(UserBadge(user_id=user_id, badge_id=badge.id, group_id=group_id))
+        if to_revoke:
+            self.db.query(UserBadge).filter(
+                UserBadge.group_id == group_id,
+                UserBadge.badge_id == badge.id,
+                UserBadge.user_id.in_(to_revoke)
+            ).delete(synchronize_session=False)
+        if to_award or to_revoke:
+            bump_group_version(self.db, group_id)
+            self.db.flush()
+
+        changes = {user_id: True for user_id in to_award}
+        changes.update({user_id: False for user_id in to_revoke})
+        return changes
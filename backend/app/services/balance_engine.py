@@ -0,0 +1,129 @@
+"""
+Integer-cent, array-backed balance engine for large groups.
+
+Balances are accumulated as int64 minor units (cents) in a contiguous array
+indexed by participant, instead of one Decimal object per share row.
+Values are converted from/to Numeric(12, 2) Decimals only at the boundary,
+so results are identical to the Decimal path.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func
+
+CENTS_PER_UNIT = 100
+# Rounding dust in cents (the Decimal path uses 0.01)
+DUST_CENTS = 1
+
+
+def to_cents(value) -> int:
+    """Decimal amount -> integer cents, rounded like a Numeric(12, 2) column."""
+    return int((Decimal(value or 0) * CENTS_PER_UNIT).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def cents_column(column):
+    """SQL expression returning a Numeric(12, 2) column as integer cents."""
+    return cast(func.round(column * CENTS_PER_UNIT), BigInteger)
+
+
+def from_cents(cents: int) -> Decimal:
+    """Integer cents -> Decimal amount with two places."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+class CentBalanceEngine:
+    """
+    Accumulates net balances in cents.
+    Participant ids are mapped to array indexes in first-seen order, which
+    matches the insertion order of the Decimal dict it replaces.
+    """
+
+    def __init__(self):
+        self.index: Dict[int, int] = {}
+        self.participant_ids: List[int] = []
+        self.balances = np.zeros(0, dtype=np.int64)
+
+    def _indexes(self, participant_ids: Iterable[int]) -> np.ndarray:
+        indexes = []
+        for participant_id in participant_ids:
+            idx = self.index.get(participant_id)
+            if idx is None:
+                idx = len(self.participant_ids)
+                self.index[participant_id] = idx
+                self.participant_ids.append(participant_id)
+            indexes.append(idx)
+        if len(self.participant_ids) > len(self.balances):
+            grown = np.zeros(len(self.participant_ids), dtype=np.int64)
+            grown[:len(self.balances)] = self.balances
+            self.balances = grown
+        return np.asarray(indexes, dtype=np.intp)
+
+    def add_cents(self, rows: Sequence[Tuple[int, int]], sign: int = 1):
+        """Scatter-add (participant_id, cents) rows into the balance array."""
+        if not rows:
+            return
+        indexes = self._indexes(participant_id for participant_id, _ in rows)
+        cents = np.fromiter((amount for _, amount in rows), dtype=np.int64, count=len(rows))
+        np.add.at(self.balances, indexes, sign * cents)
+
+    def add(self, rows: Sequence[Tuple[int, Decimal]], sign: int = 1):
+        """Scatter-add (participant_id, Decimal amount) rows into the balance array."""
+        self.add_cents([(participant_id, to_cents(amount)) for participant_id, amount in rows], sign)
+
+    def add_transfers_cents(self, rows: Sequence[Tuple[int, int, int]]):
+        """Apply completed (debtor, creditor, cents) transfers."""
+        if not rows:
+            return
+        self.add_cents([(debtor_id, cents) for debtor_id, _, cents in rows])
+        self.add_cents([(creditor_id, cents) for _, creditor_id, cents in rows], sign=-1)
+
+    def to_decimal_dict(self) -> Dict[int, Decimal]:
+        """participant_id -> Decimal balance."""
+        return {
+            participant_id: from_cents(cents)
+            for participant_id, cents in zip(self.participant_ids, self.balances.tolist())
+        }
+
+    @classmethod
+    def from_balances(cls, balances: Dict[int, Decimal]) -> "CentBalanceEngine":
+        engine = cls()
+        engine.add(list(balances.items()))
+        return engine
+
+    def greedy_transfers(self) -> List[Tuple[int, int, Decimal]]:
+        """
+        Greedy debtor/creditor matching on sorted cent vectors.
+        Same ordering and dust rules as GreedySolver.
+        """
+        ids = np.asarray(self.participant_ids, dtype=np.int64)
+        balances = self.balances
+
+        debtor_mask = balances < 0
+        creditor_mask = balances > 0
+        debtor_ids, debts = ids[debtor_mask], -balances[debtor_mask]
+        creditor_ids, credits = ids[creditor_mask], balances[creditor_mask]
+
+        # Sort by amount (descending), stable like list.sort(reverse=True)
+        debtor_order = np.argsort(-debts, kind="stable")
+        creditor_order = np.argsort(-credits, kind="stable")
+        debtor_ids, debts = debtor_ids[debtor_order].tolist(), debts[debtor_order].tolist()
+        creditor_ids, credits = creditor_ids[creditor_order].tolist(), credits[creditor_order].tolist()
+
+        transfers = []
+        i, j = 0, 0
+        while i < len(debts) and j < len(credits):
+            transfer = min(debts[i], credits[j])
+            if transfer > DUST_CENTS:
+                transfers.append((debtor_ids[i], creditor_ids[j], from_cents(transfer)))
+
+            debts[i] -= transfer
+            credits[j] -= transfer
+
+            if debts[i] <= DUST_CENTS:
+                i += 1
+            if credits[j] <= DUST_CENTS:
+                j += 1
+
+        return transfers
@@ -1,10 +1,12 @@
-from decimal import Decimal
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.models.game import GameResult
 from app.models.settlement import Settlement, SettlementParticipant, SplitType
 from app.models.group import GroupParticipant
+from app.services.badge_rules import BadgeRuleEngine, GameFinished
+from app.services.group_version import bump_group_version
+from app.services.ledger import LedgerService
 from app.schemas.game import GameResultCreate
 
 
@@ -62,6 +64,23 @@ class GameService:
         # Link game result to settlement
         game_result.settlement_id = settlement.id
 
+        # Update balance ledger in the same transaction; the new settlement row
+        # changes the group screens even when no balance moves
+        LedgerService(self.db).apply_settlement(
+            data.group_id,
+            data.loser_participant_id,
+            data.amount,
+            [(participant_id, amount_per_person) for participant_id in data.participants],
+        )
+        bump_group_version(self.db, data.group_id)
+
+        BadgeRuleEngine(self.db).publish(GameFinished(
+            group_id=data.group_id,
+            game_result_id=game_result.id,
+            participant_ids=tuple(data.participants),
+            loser_participant_id=data.loser_participant_id,
+        ))
+
         self.db.commit()
         self.db.refresh(game_result)
 
@@ -0,0 +1,198 @@
+"""
+Google OAuth code exchange over a shared, pooled async HTTP client.
+
+The client is created once at app startup (keep-alive connections to
+Google are reused across logins) and closed on shutdown. Every call has
+strict connect/read timeouts, transient failures are retried a limited
+number of times, and a circuit breaker fails logins fast with a 503 while
+Google is unreachable instead of tying up requests on timeouts.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upstream responses worth retrying (the request itself was fine)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GoogleUnavailable(Exception):
+    """Google could not be reached or kept failing after retries."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open every
+    call is rejected until `reset_seconds` have passed, then one trial call
+    is let through (half-open) and closes the circuit again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+
+class GoogleOAuthClient:
+    def __init__(self):
+        self.token_url = settings.GOOGLE_TOKEN_URL
+        self.userinfo_url = settings.GOOGLE_USERINFO_URL
+        self.max_retries = settings.GOOGLE_HTTP_MAX_RETRIES
+        self.breaker = CircuitBreaker(
+            settings.GOOGLE_CIRCUIT_FAILURE_THRESHOLD,
+            settings.GOOGLE_CIRCUIT_RESET_SECONDS,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    connect=settings.GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS,
+                    read=settings.GOOGLE_HTTP_READ_TIMEOUT_SECONDS,
+                    write=settings.GOOGLE_HTTP_READ_TIMEOUT_SECONDS,
+                    pool=settings.GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=60,
+                ),
+            )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Started by app startup; scripts and tests without lifespan get one lazily
+        if self._client is None:
+            self.start()
+        return self._client
+
+    # -- calls -------------------------------------------------------------
+
+    async def _request(self, method: str, url: str, idempotent: bool, **kwargs) -> httpx.Response:
+        """
+        One upstream call with bounded retries. The token POST is not
+        idempotent (an auth code is single-use), so it is only retried when
+        the connection was never established.
+        """
+        if not self.breaker.allow():
+            raise GoogleUnavailable("circuit open")
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as exc:
+                    error = exc
+                except httpx.TransportError as exc:
+                    if not idempotent:
+                        self.breaker.record_failure()
+                        raise GoogleUnavailable(repr(exc))
+                    error = exc
+                else:
+                    if response.status_code in RETRYABLE_STATUS_CODES and idempotent and attempt < self.max_retries:
+                        error = f"HTTP {response.status_code}"
+                    elif response.status_code >= 500:
+                        self.breaker.record_failure()
+                        raise GoogleUnavailable(f"{url} returned {response.status_code}")
+                    else:
+                        self.breaker.record_success()
+                        return response
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+                logger.warning("Google OAuth %s %s failed (attempt %s): %s", method, url, attempt + 1, error)
+        except GoogleUnavailable:
+            raise
+        except BaseException:
+            # Unexpected errors and cancellation (the client went away mid-call or
+            # during a backoff sleep) must never leave a half-open trial hanging
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_failure()
+        raise GoogleUnavailable(f"{url} failed after {self.max_retries + 1} attempts")
+
+    async def fetch_user(self, code: str) -> Dict[str, Any]:
+        """Exchange an authorization code for the Google user profile."""
+        try:
+            token_response = await self._request("POST", self.token_url, idempotent=False, data={
+                "grant_type": "authorization_code",
+                "client_id": settings.GOOGLE_CLIENT_ID,
+                "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+                "code": code,
+            })
+            if token_response.status_code != 200:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Failed to get Google access token"
+                )
+            google_token = token_response.json()["access_token"]
+
+            # Get user info from Google
+            user_response = await self._request(
+                "GET", self.userinfo_url, idempotent=True,
+                headers={"Authorization": f"Bearer {google_token}"},
+            )
+            if user_response.status_code != 200:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Failed to get Google user info"
+                )
+            return user_response.json()
+        except GoogleUnavailable as exc:
+            logger.warning("Google OAuth unavailable: %s", exc)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Google login is temporarily unavailable, please retry shortly",
+                headers={"Retry-After": str(int(settings.GOOGLE_CIRCUIT_RESET_SECONDS))},
+            )
+
+
+google_oauth_client = GoogleOAuthClient()
@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.group import GroupParticipant
+from app.models.user import User, UserBadge
+from app.schemas.badge import UserBadgeResponse, BadgeResponse
+from app.schemas.group import GroupParticipantResponse
+
+
+def avatar_dict(user: Optional[User]):
+    if not user or not user.avatar:
+        return None
+    avatar = user.avatar
+    return {
+        "id": avatar.id,
+        "user_id": avatar.user_id,
+        "body": avatar.body,
+        "eyes": avatar.eyes,
+        "mouth": avatar.mouth,
+    }
+
+
+def user_badge_response(ub: UserBadge) -> UserBadgeResponse:
+    return UserBadgeResponse(
+        id=ub.id,
+        badge=BadgeResponse(
+            id=ub.badge.id,
+            name=ub.badge.name,
+            description=ub.badge.description,
+            icon=ub.badge.icon,
+            badge_type=ub.badge.badge_type,
+            condition_code=ub.badge.condition_code,
+            created_at=ub.badge.created_at,
+        ),
+        group_id=ub.group_id,
+        group_name=ub.group.name if ub.group else None,
+        earned_at=ub.earned_at,
+    )
+
+
+def participant_response(
+    p: GroupParticipant, badges: Optional[List[UserBadgeResponse]] = None
+) -> GroupParticipantResponse:
+    return GroupParticipantResponse(
+        id=p.id,
+        name=p.name,
+        user_id=p.user_id,
+        is_admin=p.is_admin,
+        joined_at=p.joined_at,
+        user_name=p.user.name if p.user else None,
+        user_avatar=avatar_dict(p.user),
+        user_profile_photo_url=p.user.profile_photo_url if p.user else None,
+        user_full_body_photo_url=p.user.full_body_photo_url if p.user else None,
+        is_claimed=bool(p.user_id),
+        badges=badges or [],
+    )
+
+
+class GroupMemberReader:
+    """
+    Read model for a group's member list.
+    Participants (with user and avatar) come from one query and the badges
+    of every claimed member from one IN query, grouped in memory.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_members(self, group_id: int, with_badges: bool = True) -> List[GroupParticipantResponse]:
+        participants = self.db.query(GroupParticipant).options(
+            joinedload(GroupParticipant.user).joinedload(User.avatar)
+        ).filter(
+            GroupParticipant.group_id == group_id
+        ).order_by(GroupParticipant.id).all()
+
+        badges_by_user: Dict[int, List[UserBadgeResponse]] = {}
+        if with_badges:
+            badges_by_user = self._badges_by_user(
+                group_id, {p.user_id for p in participants if p.user_id}
+            )
+
+        return [
+            participant_response(p, badges_by_user.get(p.user_id) if p.user_id else None)
+            for p in participants
+        ]
+
+    def _badges_by_user(self, group_id: int, user_ids) -> Dict[int, List[UserBadgeResponse]]:
+        """Badges earned in this group, for all given users at once."""
+        if not user_ids:
+            return {}
+
+        user_badges = self.db.query(UserBadge).options(
+            joinedload(UserBadge.badge),
+            joinedload(UserBadge.group)
+        ).filter(
+            UserBadge.group_id == group_id,
+            UserBadge.user_id.in_(user_ids)
+        ).order_by(UserBadge.id).all()
+
+        badges_by_user: Dict[int, List[UserBadgeResponse]] = {}
+        for ub in user_badges:
+            badges_by_user.setdefault(ub.user_id, []).append(user_badge_response(ub))
+        return badges_by_user
@@ -0,0 +1,47 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.group import Group, GroupParticipant
+
+
+def bump_group_version(db: Session, group_id: int):
+    """
+    Invalidate the ETags of the group detail/settlements/results routes.
+    Runs as a single UPDATE inside the caller's transaction.
+    """
+    db.execute(
+        update(Group).where(Group.id == group_id).values(version=Group.version + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def bump_balance_version(db: Session, group_id: int):
+    """
+    Balances changed: mark the stored settlement results stale (they are
+    recomputed on the next read) and invalidate the ETags, in one UPDATE.
+    Profile, membership and badge changes only need bump_group_version.
+    """
+    db.execute(
+        update(Group).where(Group.id == group_id).values(
+            version=Group.version + 1,
+            balance_version=Group.balance_version + 1,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def bump_groups_version(db: Session, group_ids):
+    """bump_group_version for many groups in one UPDATE."""
+    db.execute(
+        update(Group).where(Group.id.in_(list(group_ids))).values(version=Group.version + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def bump_user_groups_version(db: Session, user_id: int):
+    """Bump every group the user belongs to (their name/photo/payment info is shown there)."""
+    group_ids = select(GroupParticipant.group_id).where(GroupParticipant.user_id == user_id)
+    db.execute(
+        update(Group).where(Group.id.in_(group_ids)).values(version=Group.version + 1),
+        execution_options={"synchronize_session": False},
+    )
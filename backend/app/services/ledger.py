@@ -0,0 +1,149 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Tuple
+from sqlalchemy.orm import Session
+
+from app.services.balance_engine import CentBalanceEngine, cents_column
+from app.services.group_version import bump_balance_version
+from app.models.settlement import Settlement, SettlementParticipant, SettlementResult, ParticipantBalance
+
+CENT = Decimal("0.01")
+
+
+def to_money(value) -> Decimal:
+    """Round a value the same way a Numeric(12, 2) column stores it."""
+    return Decimal(value or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class LedgerService:
+    """
+    Maintains the per-participant balance ledger (participant_balances).
+    All methods only add to the current transaction; callers commit.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def settlement_deltas(
+        self,
+        payer_participant_id: int,
+        total_amount: Decimal,
+        shares: Iterable[Tuple[int, Decimal]],
+        sign: int = 1,
+    ) -> Dict[int, Decimal]:
+        """Balance changes caused by one unsettled expense (sign=-1 to revert it)."""
+        deltas: Dict[int, Decimal] = {}
+        # Payer paid the full amount, so they should receive their share back
+        deltas[payer_participant_id] = sign * to_money(total_amount)
+        # Each participant owes their share
+        for participant_id, amount_owed in shares:
+            deltas[participant_id] = deltas.get(participant_id, Decimal("0")) - sign * to_money(amount_owed)
+        return deltas
+
+    def apply_settlement(
+        self,
+        group_id: int,
+        payer_participant_id: int,
+        total_amount: Decimal,
+        shares: Iterable[Tuple[int, Decimal]],
+        sign: int = 1,
+    ):
+        """Add (or with sign=-1 remove) an unsettled expense to the ledger."""
+        self.apply_deltas(
+            group_id,
+            self.settlement_deltas(payer_participant_id, total_amount, shares, sign),
+        )
+
+    def apply_transfer(self, group_id: int, debtor_participant_id: int, creditor_participant_id: int, amount: Decimal):
+        """Apply a completed 1:1 transfer: the debtor paid the creditor back."""
+        amount = to_money(amount)
+        self.apply_deltas(group_id, {
+            debtor_participant_id: amount,
+            creditor_participant_id: -amount,
+        })
+
+    def apply_deltas(self, group_id: int, deltas: Dict[int, Decimal]):
+        """Add deltas to the balance rows, creating missing rows. Rows are locked for the transaction."""
+        deltas = {pid: delta for pid, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        bump_balance_version(self.db, group_id)
+
+        rows = self.db.query(ParticipantBalance).filter(
+            ParticipantBalance.participant_id.in_(deltas.keys())
+        ).with_for_update().all()
+        by_participant = {row.participant_id: row for row in rows}
+
+        for participant_id, delta in deltas.items():
+            row = by_participant.get(participant_id)
+            if row:
+                row.balance = (row.balance or Decimal("0")) + delta
+            else:
+                self.db.add(ParticipantBalance(
+                    group_id=group_id,
+                    participant_id=participant_id,
+                    balance=delta,
+                ))
+
+    def get_balances(self, group_id: int) -> Dict[int, Decimal]:
+        """Current net balance per participant (participant_id -> balance)."""
+        rows = self.db.query(
+            ParticipantBalance.participant_id,
+            ParticipantBalance.balance,
+        ).filter(
+            ParticipantBalance.group_id == group_id
+        ).order_by(ParticipantBalance.participant_id).all()
+        return {participant_id: balance for participant_id, balance in rows}
+
+    def compute_balances_from_history(self, group_id: int) -> Dict[int, Decimal]:
+        """Replay every unsettled expense and completed transfer (slow path, used for rebuilds)."""
+        engine = CentBalanceEngine()
+
+        # Payer paid the full amount, so they should receive their share back
+        engine.add_cents(self.db.query(
+            Settlement.payer_participant_id,
+            cents_column(Settlement.total_amount),
+        ).filter(
+            Settlement.group_id == group_id,
+            Settlement.is_settled == False
+        ).all())
+
+        # Each participant owes their share
+        engine.add_cents(self.db.query(
+            SettlementParticipant.participant_id,
+            cents_column(SettlementParticipant.amount_owed),
+        ).join(
+            Settlement, Settlement.id == SettlementParticipant.settlement_id
+        ).filter(
+            Settlement.group_id == group_id,
+            Settlement.is_settled == False
+        ).all(), sign=-1)
+
+        # Completed transfers
+        engine.add_transfers_cents(self.db.query(
+            SettlementResult.debtor_participant_id,
+            SettlementResult.creditor_participant_id,
+            cents_column(SettlementResult.amount),
+        ).filter(
+            SettlementResult.group_id == group_id,
+            SettlementResult.is_completed == True
+        ).all())
+
+        return engine.to_decimal_dict()
+
+    def rebuild_group(self, group_id: int) -> Dict[int, Decimal]:
+        """Recompute a group's ledger from history and overwrite the stored rows."""
+        balances = self.compute_balances_from_history(group_id)
+
+        self.db.query(ParticipantBalance).filter(
+            ParticipantBalance.group_id == group_id
+        ).delete(synchronize_session=False)
+        for participant_id, balance in balances.items():
+            self.db.add(ParticipantBalance(
+                group_id=group_id,
+                participant_id=participant_id,
+                balance=balance,
+            ))
+        bump_balance_version(self.db, group_id)
+        self.db.flush()
+        return balances
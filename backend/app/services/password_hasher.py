@@ -0,0 +1,132 @@
+"""
+bcrypt hashing off the request threads.
+
+Each bcrypt call is ~200-300 ms of pure CPU at the default cost. Running it
+in the API process holds the GIL and a threadpool slot for that long, so a
+login burst stalls every other endpoint. PasswordHasher runs it in a small
+dedicated process pool instead, and refuses work with a fast 503 once
+BCRYPT_POOL_SIZE + BCRYPT_MAX_QUEUE calls are already in flight. Callers
+await the result on the event loop, so waiting for the pool doesn't hold
+a threadpool slot either.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import settings
+
+# One context per cost factor, per process (worker processes build their own)
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        _contexts[rounds] = context
+    return context
+
+
+def _bcrypt_cost(password_hash: str) -> Optional[int]:
+    """Cost factor of a $2b$NN$... hash."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_and_update(password: str, password_hash: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """
+    (matches, new_hash). new_hash is set when the password matches but the
+    stored hash was made with a different cost factor (or a deprecated scheme).
+    """
+    context = _context(rounds)
+    if not context.verify(password, password_hash):
+        return False, None
+    if context.needs_update(password_hash) or _bcrypt_cost(password_hash) != rounds:
+        return True, context.hash(password)
+    return True, None
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for bcrypt. BCRYPT_POOL_SIZE=0 runs inline (tests,
+    scripts). The pool is created on first use so forked server workers
+    each start their own.
+    """
+
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        rounds: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+    ):
+        self.pool_size = settings.BCRYPT_POOL_SIZE if pool_size is None else pool_size
+        self.max_queue = settings.BCRYPT_MAX_QUEUE if max_queue is None else max_queue
+        self.rounds = settings.BCRYPT_ROUNDS if rounds is None else rounds
+        self.timeout_seconds = settings.BCRYPT_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+
+        self._slots = threading.BoundedSemaphore(max(1, self.pool_size) + self.max_queue)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork the threaded server process
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.pool_size,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            if self.pool_size <= 0:
+                return fn(*args)
+            # Awaited on the event loop: no threadpool thread waits on the pool meanwhile
+            future = self._get_executor().submit(fn, *args)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_seconds)
+            except asyncio.TimeoutError:
+                future.cancel()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication timed out, please retry",
+                    headers={"Retry-After": "1"},
+                )
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """See verify_and_update."""
+        return await self._run(verify_and_update, password, password_hash, self.rounds)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
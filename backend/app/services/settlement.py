@@ -1,21 +1,62 @@
 from decimal import Decimal
-from typing import List, Dict
-from datetime import datetime
-from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Dict, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, exists, func, insert, or_, update
+from sqlalchemy.orm import Session, joinedload, subqueryload
+import base64
 import uuid
 
 from app.models.settlement import Settlement, SettlementParticipant, SettlementResult, SplitType
-from app.models.group import GroupParticipant
-from app.schemas.settlement import SettlementCreate, SettlementUpdate, GroupSettlementResults, SettlementResultResponse
+from app.database import query_budget
+from app.models.group import Group, GroupParticipant
+from app.services.badge_rules import BadgeRuleEngine, SettlementCreated
+from app.services.group_version import bump_group_version
+from app.services.ledger import LedgerService
+from app.services.settlement_solver import get_solver
+from app.services.uploads import add_reference
+from app.schemas.settlement import (
+    SettlementCreate,
+    SettlementUpdate,
+    SettlementPage,
+    GroupSettlementResults,
+    SettlementResultResponse,
+)
+
+
+# Eager-loading plan for SettlementResponse: payer (joined), then every share
+# with its participant and claimed user in one query that re-uses the parent
+# query as a subquery. Two queries no matter how many settlements or shares
+# (selectinload would add one SELECT ... IN per 500 settlements).
+SETTLEMENT_RESPONSE_OPTIONS = (
+    joinedload(Settlement.payer_participant),
+    subqueryload(Settlement.participants)
+    .joinedload(SettlementParticipant.participant)
+    .joinedload(GroupParticipant.user),
+)
+SETTLEMENT_READ_QUERY_BUDGET = 2
+
+
+def encode_settlement_cursor(settlement: Settlement) -> str:
+    """Opaque cursor pointing after the given settlement."""
+    raw = f"{settlement.created_at.isoformat()}|{settlement.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_settlement_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, settlement_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(settlement_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 class SettlementService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_settlement(self, data: SettlementCreate) -> Settlement:
-        """Create a new settlement with participants."""
+    def create_settlement(self, data: SettlementCreate, receipt_image: Optional[str] = None) -> Settlement:
+        """Create a new settlement with participants (receipt_image: URL of an already stored upload)."""
         payer_participant = self.db.query(GroupParticipant).filter(
             GroupParticipant.id == data.payer_participant_id,
             GroupParticipant.group_id == data.group_id
@@ -35,6 +76,7 @@ class SettlementService:
             total_amount=data.total_amount,
             split_type=data.split_type,
             icon=data.icon,
+            receipt_image=receipt_image,
         )
 
         # Set custom date if provided
@@ -46,20 +88,125 @@ class SettlementService:
 
         self.db.add(settlement)
         self.db.flush()
+        add_reference(self.db, receipt_image)
 
         # Calculate and add participants
-        self._add_participants(settlement, data.participants, data.split_type, data.total_amount)
+        shares = self._add_participants(settlement, data.participants, data.split_type, data.total_amount)
+
+        # Update balance ledger in the same transaction. The new row changes the
+        # settlement list even when it moves no balance (payer-only, zero amount)
+        LedgerService(self.db).apply_settlement(
+            settlement.group_id, settlement.payer_participant_id, settlement.total_amount, shares
+        )
+        bump_group_version(self.db, settlement.group_id)
+
+        BadgeRuleEngine(self.db).publish(SettlementCreated(
+            group_id=settlement.group_id,
+            settlement_id=settlement.id,
+            payer_participant_id=settlement.payer_participant_id,
+            total_amount=settlement.total_amount,
+            participant_ids=tuple(participant_id for participant_id, _ in shares),
+        ))
 
         self.db.commit()
-        self.db.refresh(settlement)
+        return self.get_settlement(settlement.id)
+
+    def get_settlement(self, settlement_id: int) -> Settlement:
+        """Load one settlement with everything SettlementResponse needs."""
+        with query_budget(SETTLEMENT_READ_QUERY_BUDGET, "get_settlement"):
+            settlement = self.db.query(Settlement).options(
+                *SETTLEMENT_RESPONSE_OPTIONS
+            ).filter(
+                Settlement.id == settlement_id
+            ).first()
+        if not settlement:
+            raise HTTPException(status_code=404, detail="Settlement not found")
         return settlement
 
+    def list_group_settlements(self, group_id: int, is_settled: bool = None) -> List[Settlement]:
+        """All settlements of a group, newest first, eagerly loaded for SettlementResponse."""
+        with query_budget(SETTLEMENT_READ_QUERY_BUDGET, "list_group_settlements"):
+            query = self.db.query(Settlement).options(
+                *SETTLEMENT_RESPONSE_OPTIONS
+            ).filter(Settlement.group_id == group_id)
+            if is_settled is not None:
+                query = query.filter(Settlement.is_settled == is_settled)
+            return query.order_by(Settlement.created_at.desc()).all()
+
+    def list_settlement_history(
+        self,
+        group_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        payer_participant_id: Optional[int] = None,
+        participant_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        icon: Optional[str] = None,
+    ) -> SettlementPage:
+        """
+        Keyset-paginated settlement history, newest first, ordered by (created_at, id).
+        Each page is a bounded range scan of ix_settlements_group_created_id.
+        """
+        query = self.db.query(Settlement).options(
+            *SETTLEMENT_RESPONSE_OPTIONS
+        ).filter(Settlement.group_id == group_id)
+        created_at = self._history_created_at()
+
+        if cursor:
+            cursor_created_at, cursor_id = decode_settlement_cursor(cursor)
+            cursor_created_at = self._history_created_at(cursor_created_at)
+            query = query.filter(or_(
+                created_at < cursor_created_at,
+                and_(created_at == cursor_created_at, Settlement.id < cursor_id),
+            ))
+        if payer_participant_id is not None:
+            query = query.filter(Settlement.payer_participant_id == payer_participant_id)
+        if participant_id is not None:
+            query = query.filter(
+                exists().where(
+                    SettlementParticipant.settlement_id == Settlement.id,
+                    SettlementParticipant.participant_id == participant_id,
+                )
+            )
+        if date_from is not None:
+            query = query.filter(created_at >= self._history_created_at(datetime.combine(date_from, time.min)))
+        if date_to is not None:
+            query = query.filter(
+                created_at < self._history_created_at(datetime.combine(date_to + timedelta(days=1), time.min))
+            )
+        if icon is not None:
+            query = query.filter(Settlement.icon == icon)
+
+        with query_budget(SETTLEMENT_READ_QUERY_BUDGET, "list_settlement_history"):
+            rows = query.order_by(
+                created_at.desc(), Settlement.id.desc()
+            ).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        items = rows[:limit]
+        next_cursor = encode_settlement_cursor(items[-1]) if has_more else None
+        return SettlementPage(items=items, next_cursor=next_cursor, has_more=has_more)
+
+    def _history_created_at(self, value=Settlement.created_at):
+        """
+        created_at as the history is ordered and paged by.
+        SQLite keeps timestamps as text: server_default rows read 'YYYY-MM-DD HH:MM:SS'
+        while a bound cursor reads '... HH:MM:SS.000000', so the raw comparison puts a
+        row before its own cursor and the next page repeats it. Compare both sides in
+        one format there; other backends compare real DATETIME values (and use the index).
+        """
+        if self.db.get_bind().dialect.name == "sqlite":
+            return func.strftime("%Y-%m-%d %H:%M:%f", value)
+        return value
+
     def _add_participants(self, settlement: Settlement, participants, split_type: SplitType, total: Decimal):
-        """Add participants and calculate their owed amounts."""
+        """Add participants and calculate their owed amounts. Returns (participant_id, amount_owed) pairs."""
         participant_count = len(participants)
         if participant_count == 0:
             raise HTTPException(status_code=400, detail="At least one participant is required")
 
+        shares = []
         for p in participants:
             participant = self.db.query(GroupParticipant).filter(
                 GroupParticipant.id == p.participant_id,
@@ -85,6 +232,9 @@ class SettlementService:
                 amount_owed=amount_owed,
             )
             self.db.add(settlement_participant)
+            shares.append((p.participant_id, amount_owed))
+
+        return shares
 
     def update_settlement(self, settlement_id: int, data: SettlementUpdate, user_id: int) -> Settlement:
         """Update settlement details."""
@@ -100,6 +250,19 @@ class SettlementService:
         if not user_participant:
             raise HTTPException(status_code=403, detail="Only group members can update this settlement")
 
+        # Remember the old contribution so the ledger can be adjusted by the difference
+        ledger = LedgerService(self.db)
+        old_shares = self.db.query(
+            SettlementParticipant.participant_id,
+            SettlementParticipant.amount_owed,
+        ).filter(SettlementParticipant.settlement_id == settlement_id).all()
+        old_deltas = {}
+        if not settlement.is_settled:
+            old_deltas = ledger.settlement_deltas(
+                settlement.payer_participant_id, settlement.total_amount, old_shares, sign=-1
+            )
+        new_shares = old_shares
+
         # Update fields
         for field, value in data.model_dump(exclude_unset=True, exclude={"participants", "date"}).items():
             setattr(settlement, field, value)
@@ -118,141 +281,221 @@ class SettlementService:
                 SettlementParticipant.settlement_id == settlement_id
             ).delete()
 
-            self._add_participants(
+            new_shares = self._add_participants(
                 settlement,
                 data.participants,
                 data.split_type or settlement.split_type,
                 data.total_amount or settlement.total_amount
             )
 
+        bump_group_version(self.db, settlement.group_id)
+
+        if not settlement.is_settled:
+            deltas = dict(old_deltas)
+            for participant_id, delta in ledger.settlement_deltas(
+                settlement.payer_participant_id, settlement.total_amount, new_shares
+            ).items():
+                deltas[participant_id] = deltas.get(participant_id, Decimal("0")) + delta
+            ledger.apply_deltas(settlement.group_id, deltas)
+
         self.db.commit()
-        self.db.refresh(settlement)
-        return settlement
+        return self.get_settlement(settlement_id)
+
+    def get_settlement_results(self, group_id: int) -> GroupSettlementResults:
+        """
+        Return the group's settlement results.
+        Read-only when the stored results are up to date with the balances;
+        recomputes (and writes) only after a balance change bumped balance_version.
+        """
+        versions = self.db.query(Group.balance_version, Group.results_version).filter(Group.id == group_id).first()
+        if not versions:
+            raise HTTPException(status_code=404, detail="Group not found")
+
+        balance_version, results_version = versions
+        if results_version is None or results_version != balance_version:
+            return self.calculate_settlement_results(group_id)
+
+        return self._stored_results(group_id)
+
+    def _stored_results(self, group_id: int) -> GroupSettlementResults:
+        rows = self.db.query(
+            SettlementResult.id,
+            SettlementResult.debtor_participant_id,
+            SettlementResult.creditor_participant_id,
+            SettlementResult.amount,
+        ).filter(
+            SettlementResult.group_id == group_id,
+            SettlementResult.is_completed == False
+        ).order_by(SettlementResult.id).all()
+
+        return GroupSettlementResults(
+            group_id=group_id,
+            results=self._build_result_responses(rows),
+            total_transactions=len(rows)
+        )
 
     def calculate_settlement_results(self, group_id: int) -> GroupSettlementResults:
         """
-        Calculate settlement results using Greedy Algorithm.
-        Returns who needs to pay whom to minimize transactions (N-1 transactions).
+        Calculate settlement results using the configured solver (greedy by default).
+        Returns who needs to pay whom to minimize transactions (at most N-1 transactions).
+
+        Recomputes for one group are serialized on the group row: the outbox worker
+        and a client's GET /results can both find the results stale, and without the
+        lock both would diff against the same open rows and insert the same pairs.
+
+        Commits the session: it ends the caller's transaction before reading and
+        commits the results it writes. The session must have no pending changes
+        (RuntimeError otherwise), so the caller's own work is never committed here.
         """
-        # Get all unsettled settlements for the group
-        settlements = self.db.query(Settlement).filter(
-            Settlement.group_id == group_id,
-            Settlement.is_settled == False
-        ).all()
+        if self.db.new or self.db.dirty or self.db.deleted:
+            raise RuntimeError("calculate_settlement_results() commits the session; it has pending changes")
+
+        # End the caller's transaction first: on MySQL (REPEATABLE READ) the reads below
+        # would otherwise come from a snapshot taken before a concurrent recompute committed
+        self.db.commit()
 
-        # Calculate net balance for each user
+        # Lock the group row and take the balance version the results will correspond to
+        # (read before the balances). Writers bump it under the same lock, so the balances
+        # cannot move between this read and the commit below.
+        versions = self.db.query(Group.balance_version, Group.results_version).filter(
+            Group.id == group_id
+        ).with_for_update().first()
+        if not versions:
+            self.db.rollback()
+            raise HTTPException(status_code=404, detail="Group not found")
+
+        version, results_version = versions
+        if results_version == version:
+            # Another recompute stored results for these balances while we waited
+            response = self._stored_results(group_id)
+            self.db.commit()
+            return response
+
+        # Net balance per participant, maintained incrementally by LedgerService
         # balance > 0: user should receive money
         # balance < 0: user should pay money
-        balances: Dict[int, Decimal] = {}
-
-        for settlement in settlements:
-            payer_id = settlement.payer_participant_id
-            total = settlement.total_amount
-
-            # Payer paid the full amount, so they should receive their share back
-            if payer_id not in balances:
-                balances[payer_id] = Decimal("0")
-            balances[payer_id] += total
-
-            # Each participant owes their share
-            for participant in settlement.participants:
-                participant_id = participant.participant_id
-                if participant_id not in balances:
-                    balances[participant_id] = Decimal("0")
-                balances[participant_id] -= participant.amount_owed
-
-        # Apply completed transfers so they don't reappear in results
-        completed_transfers = self.db.query(SettlementResult).filter(
-            SettlementResult.group_id == group_id,
-            SettlementResult.is_completed == True
-        ).all()
-        for transfer in completed_transfers:
-            amount = transfer.amount or Decimal("0")
-            balances[transfer.debtor_participant_id] = balances.get(
-                transfer.debtor_participant_id, Decimal("0")
-            ) + amount
-            balances[transfer.creditor_participant_id] = balances.get(
-                transfer.creditor_participant_id, Decimal("0")
-            ) - amount
-
-        # Separate into debtors (negative balance) and creditors (positive balance)
-        debtors = [(pid, -bal) for pid, bal in balances.items() if bal < 0]
-        creditors = [(pid, bal) for pid, bal in balances.items() if bal > 0]
-
-        # Sort by amount (descending)
-        debtors.sort(key=lambda x: x[1], reverse=True)
-        creditors.sort(key=lambda x: x[1], reverse=True)
-
-        # Greedy matching
-        results = []
-        batch_id = str(uuid.uuid4())[:8]
+        balances = LedgerService(self.db).get_balances(group_id)
 
-        i, j = 0, 0
-        while i < len(debtors) and j < len(creditors):
-            debtor_id, debt_amount = debtors[i]
-            creditor_id, credit_amount = creditors[j]
-
-            transfer_amount = min(debt_amount, credit_amount)
-
-            if transfer_amount > Decimal("0.01"):  # Ignore tiny amounts
-                # Check if this result already exists
-                existing = self.db.query(SettlementResult).filter(
-                    SettlementResult.group_id == group_id,
-                    SettlementResult.debtor_participant_id == debtor_id,
-                    SettlementResult.creditor_participant_id == creditor_id,
-                    SettlementResult.is_completed == False
-                ).first()
-
-                if existing:
-                    existing.amount = transfer_amount
-                    result = existing
-                else:
-                    result = SettlementResult(
-                        group_id=group_id,
-                        debtor_participant_id=debtor_id,
-                        creditor_participant_id=creditor_id,
-                        amount=transfer_amount,
-                        calculation_batch=batch_id,
-                    )
-                    self.db.add(result)
-
-                self.db.flush()
-                results.append(result)
-
-            # Update remaining amounts
-            debtors[i] = (debtor_id, debt_amount - transfer_amount)
-            creditors[j] = (creditor_id, credit_amount - transfer_amount)
-
-            if debtors[i][1] <= Decimal("0.01"):
-                i += 1
-            if creditors[j][1] <= Decimal("0.01"):
-                j += 1
+        transfers = get_solver().solve(balances)
 
+        rows = self._write_results(group_id, transfers)
+        self.db.execute(
+            update(Group).where(Group.id == group_id).values(results_version=version),
+            execution_options={"synchronize_session": False},
+        )
         self.db.commit()
 
-        # Build response with user names
+        return GroupSettlementResults(
+            group_id=group_id,
+            results=self._build_result_responses(rows),
+            total_transactions=len(rows)
+        )
+
+    def _write_results(self, group_id: int, transfers) -> List[tuple]:
+        """
+        Store transfers as the group's open settlement results.
+        Loads all open results once, diffs in memory and applies bulk
+        inserts/updates/deletes. Returns (id, debtor_id, creditor_id, amount) rows ordered by id,
+        the same order the read path uses.
+        """
+        open_results = self.db.query(
+            SettlementResult.id,
+            SettlementResult.debtor_participant_id,
+            SettlementResult.creditor_participant_id,
+            SettlementResult.amount,
+        ).filter(
+            SettlementResult.group_id == group_id,
+            SettlementResult.is_completed == False
+        ).order_by(SettlementResult.id).all()
+
+        existing: Dict[tuple, tuple] = {}
+        stale_ids = []
+        for row in open_results:
+            key = (row.debtor_participant_id, row.creditor_participant_id)
+            if key in existing:
+                stale_ids.append(row.id)  # Duplicate open result for the same pair
+            else:
+                existing[key] = row
+
+        batch_id = str(uuid.uuid4())[:8]
+        result_ids: Dict[tuple, int] = {}
+        inserts, updates = [], []
+        for debtor_id, creditor_id, amount in transfers:
+            key = (debtor_id, creditor_id)
+            row = existing.pop(key, None)
+            if row is None:
+                inserts.append({
+                    "group_id": group_id,
+                    "debtor_participant_id": debtor_id,
+                    "creditor_participant_id": creditor_id,
+                    "amount": amount,
+                    "is_completed": False,
+                    "calculation_batch": batch_id,
+                })
+                continue
+            result_ids[key] = row.id
+            if row.amount != amount:
+                updates.append({"id": row.id, "amount": amount})
+
+        # Open results no longer produced by the solver are obsolete
+        stale_ids.extend(row.id for row in existing.values())
+
+        if stale_ids:
+            self.db.execute(
+                delete(SettlementResult).where(SettlementResult.id.in_(stale_ids))
+            )
+        if updates:
+            self.db.execute(update(SettlementResult), updates)
+        if inserts:
+            self.db.execute(insert(SettlementResult), inserts)
+            inserted = self.db.query(
+                SettlementResult.id,
+                SettlementResult.debtor_participant_id,
+                SettlementResult.creditor_participant_id,
+            ).filter(
+                SettlementResult.group_id == group_id,
+                SettlementResult.is_completed == False,
+                SettlementResult.calculation_batch == batch_id
+            ).all()
+            for result_id, debtor_id, creditor_id in inserted:
+                result_ids.setdefault((debtor_id, creditor_id), result_id)
+
+        return sorted(
+            (result_ids[(debtor_id, creditor_id)], debtor_id, creditor_id, amount)
+            for debtor_id, creditor_id, amount in transfers
+        )
+
+    def _build_result_responses(self, rows) -> List[SettlementResultResponse]:
+        """Build responses for (id, debtor_id, creditor_id, amount) open results with one participant prefetch."""
+        participant_ids = {pid for _, debtor_id, creditor_id, _ in rows for pid in (debtor_id, creditor_id)}
+        participants = {}
+        if participant_ids:
+            participants = {
+                p.id: p
+                for p in self.db.query(GroupParticipant).options(
+                    joinedload(GroupParticipant.user)
+                ).filter(GroupParticipant.id.in_(participant_ids)).all()
+            }
+
         result_responses = []
-        for r in results:
-            debtor = self.db.query(GroupParticipant).filter(GroupParticipant.id == r.debtor_participant_id).first()
-            creditor = self.db.query(GroupParticipant).filter(GroupParticipant.id == r.creditor_participant_id).first()
+        for result_id, debtor_id, creditor_id, amount in rows:
+            debtor = participants.get(debtor_id)
+            creditor = participants.get(creditor_id)
+            creditor_user = creditor.user if creditor else None
 
             result_responses.append(SettlementResultResponse(
-                id=r.id,
-                debtor_participant_id=r.debtor_participant_id,
-                creditor_participant_id=r.creditor_participant_id,
-                amount=r.amount,
-                is_completed=r.is_completed,
-                completed_at=r.completed_at,
+                id=result_id,
+                debtor_participant_id=debtor_id,
+                creditor_participant_id=creditor_id,
+                amount=amount,
+                is_completed=False,
+                completed_at=None,
                 debtor_name=debtor.name if debtor else None,
                 creditor_name=creditor.name if creditor else None,
                 debtor_user_id=debtor.user_id if debtor else None,
                 creditor_user_id=creditor.user_id if creditor else None,
-                creditor_payment_method=creditor.user.payment_method if creditor and creditor.user else None,
-                creditor_payment_account=creditor.user.payment_account if creditor and creditor.user else None,
+                creditor_payment_method=creditor_user.payment_method if creditor_user else None,
+                creditor_payment_account=creditor_user.payment_account if creditor_user else None,
             ))
 
-        return GroupSettlementResults(
-            group_id=group_id,
-            results=result_responses,
-            total_transactions=len(result_responses)
-        )
+        return result_responses
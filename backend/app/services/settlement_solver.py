@@ -0,0 +1,185 @@
+"""
+Settlement solvers: turn net balances into a list of 1:1 transfers.
+
+- GreedySolver: largest debtor pays largest creditor. At most N-1 transfers.
+- ExactSolver: minimum number of transfers (N minus the largest number of
+  zero-sum subgroups) via bitmask DP, bounded by a CPU-time budget and
+  falling back to greedy when the budget runs out.
+"""
+
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.balance_engine import CentBalanceEngine, to_cents
+
+# (debtor_participant_id, creditor_participant_id, amount)
+Transfer = Tuple[int, int, Decimal]
+
+# Amounts at or below this are treated as settled (rounding dust)
+DUST = Decimal("0.01")
+
+
+class SolverBudgetExceeded(Exception):
+    """Raised internally when the exact solver runs out of CPU time."""
+
+
+class SettlementSolver:
+    """Base class for settlement solvers."""
+    name = "base"
+
+    def solve(self, balances: Dict[int, Decimal]) -> List[Transfer]:
+        raise NotImplementedError
+
+
+class GreedySolver(SettlementSolver):
+    name = "greedy"
+
+    def solve(self, balances: Dict[int, Decimal]) -> List[Transfer]:
+        # Large groups go through the integer-cent array engine (identical results)
+        if len(balances) >= settings.BALANCE_ENGINE_MIN_PARTICIPANTS:
+            return CentBalanceEngine.from_balances(balances).greedy_transfers()
+
+        # Separate into debtors (negative balance) and creditors (positive balance)
+        debtors = [(pid, -bal) for pid, bal in balances.items() if bal < 0]
+        creditors = [(pid, bal) for pid, bal in balances.items() if bal > 0]
+
+        # Sort by amount (descending)
+        debtors.sort(key=lambda x: x[1], reverse=True)
+        creditors.sort(key=lambda x: x[1], reverse=True)
+
+        transfers: List[Transfer] = []
+        i, j = 0, 0
+        while i < len(debtors) and j < len(creditors):
+            debtor_id, debt_amount = debtors[i]
+            creditor_id, credit_amount = creditors[j]
+
+            transfer_amount = min(debt_amount, credit_amount)
+
+            if transfer_amount > DUST:  # Ignore tiny amounts
+                transfers.append((debtor_id, creditor_id, transfer_amount))
+
+            # Update remaining amounts
+            debtors[i] = (debtor_id, debt_amount - transfer_amount)
+            creditors[j] = (creditor_id, credit_amount - transfer_amount)
+
+            if debtors[i][1] <= DUST:
+                i += 1
+            if creditors[j][1] <= DUST:
+                j += 1
+
+        return transfers
+
+
+class ExactSolver(SettlementSolver):
+    """
+    Minimum-transfer solver.
+    A group of k people whose balances sum to zero can always be settled
+    with k-1 transfers, so the minimum is N - (max number of disjoint
+    zero-sum subgroups). The partition is found with a DP over bitmasks;
+    each subgroup is then settled with the greedy matcher.
+    """
+    name = "exact"
+
+    def __init__(
+        self,
+        time_budget_ms: Optional[int] = None,
+        max_participants: Optional[int] = None,
+        fallback: Optional[SettlementSolver] = None,
+    ):
+        self.time_budget_ms = settings.SETTLEMENT_SOLVER_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+        self.max_participants = settings.SETTLEMENT_EXACT_MAX_PARTICIPANTS if max_participants is None else max_participants
+        self.fallback = fallback or GreedySolver()
+
+    def solve(self, balances: Dict[int, Decimal]) -> List[Transfer]:
+        # Participants with only rounding dust left do not take part
+        active = {pid: bal for pid, bal in balances.items() if abs(bal) > DUST}
+        if len(active) > self.max_participants:
+            return self.fallback.solve(balances)
+
+        deadline = time.process_time() + self.time_budget_ms / 1000
+        try:
+            groups = self._zero_sum_groups(active, deadline)
+        except SolverBudgetExceeded:
+            return self.fallback.solve(balances)
+
+        transfers: List[Transfer] = []
+        for group in groups:
+            transfers.extend(self.fallback.solve({pid: active[pid] for pid in group}))
+        return transfers
+
+    def _zero_sum_groups(self, balances: Dict[int, Decimal], deadline: float) -> List[List[int]]:
+        """Partition participants into the largest number of zero-sum groups."""
+        groups: List[List[int]] = []
+
+        # An exactly opposite debtor/creditor pair is always its own group in some optimum
+        remaining: Dict[int, int] = {pid: to_cents(bal) for pid, bal in balances.items()}
+        by_amount: Dict[int, List[int]] = {}
+        for pid, cents in remaining.items():
+            by_amount.setdefault(cents, []).append(pid)
+        for cents in list(by_amount):
+            if cents <= 0:
+                continue
+            creditors = by_amount.get(cents, [])
+            debtors = by_amount.get(-cents, [])
+            while creditors and debtors:
+                creditor_id, debtor_id = creditors.pop(), debtors.pop()
+                groups.append([debtor_id, creditor_id])
+                del remaining[creditor_id], remaining[debtor_id]
+
+        ids = list(remaining)
+        values = [remaining[pid] for pid in ids]
+        n = len(ids)
+        if n == 0:
+            return groups
+
+        full = (1 << n) - 1
+        sums = [0] * (full + 1)
+        best = [0] * (full + 1)     # max zero-sum groups closed within mask
+        removed = [0] * (full + 1)  # element removed last to reach best[mask]
+
+        for mask in range(1, full + 1):
+            if not mask & 0xFFF and time.process_time() > deadline:
+                raise SolverBudgetExceeded()
+
+            low = mask & -mask
+            sums[mask] = sums[mask ^ low] + values[low.bit_length() - 1]
+
+            best_count, best_bit = -1, 0
+            rest = mask
+            while rest:
+                bit = rest & -rest
+                rest ^= bit
+                count = best[mask ^ bit]
+                if count > best_count:
+                    best_count, best_bit = count, bit
+            best[mask] = best_count + (1 if sums[mask] == 0 else 0)
+            removed[mask] = best_bit
+
+        # Walk back: each time the prefix mask sums to zero, a group is closed
+        mask = full
+        current: List[int] = []
+        while mask:
+            if sums[mask] == 0 and current:
+                groups.append(current)
+                current = []
+            bit = removed[mask]
+            current.append(ids[bit.bit_length() - 1])
+            mask ^= bit
+        if current:
+            groups.append(current)
+
+        return groups
+
+
+SOLVERS = {
+    GreedySolver.name: GreedySolver,
+    ExactSolver.name: ExactSolver,
+}
+
+
+def get_solver(name: Optional[str] = None) -> SettlementSolver:
+    """Return the configured settlement solver (SETTLEMENT_SOLVER setting)."""
+    solver_cls = SOLVERS.get((name or settings.SETTLEMENT_SOLVER).lower(), GreedySolver)
+    return solver_cls()
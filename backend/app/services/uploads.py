@@ -0,0 +1,309 @@
+"""
+Content-addressed image uploads.
+
+Uploads are copied to UPLOAD_DIR in UPLOAD_CHUNK_BYTES chunks on a
+threadpool thread, so the event loop never blocks on disk I/O and memory
+stays flat whatever the file size. The copy stops as soon as the size
+limit is exceeded, the content type is sniffed from the first bytes
+(the client's Content-Type and filename are not trusted), and the file
+only appears under its final name once complete: it is written to a
+temporary file in the same directory, fsynced, then renamed.
+
+The final name is the SHA-256 of the content (uploads/ab/ab12...ef.png),
+so identical images are stored once and a URL's content never changes:
+UploadFiles serves them with `Cache-Control: immutable` and the hash as a
+strong ETag. Rows that point at a file take a reference in upload_blobs
+(add_reference / release_reference, in the caller's transaction);
+app.scripts.gc_uploads deletes files nobody has referenced for a while.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+from app.config import settings
+from app.models.upload import UploadBlob
+
+# Leading bytes -> extension for the image formats we accept
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+SNIFF_BYTES = 12
+
+# /uploads/ab/ab<62 more hex>.png
+CONTENT_URL = re.compile(r"^/uploads/([0-9a-f]{2})/(\1[0-9a-f]{62})\.(png|jpg|gif|webp)$")
+CONTENT_FILE = re.compile(r"^[0-9a-f]{64}\.(png|jpg|gif|webp)$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def sniff_image_extension(header: bytes) -> Optional[str]:
+    """File extension for a supported image format, from its first bytes."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def content_path(sha256: str, extension: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / sha256[:2] / f"{sha256}{extension}"
+
+
+def content_url(sha256: str, extension: str) -> str:
+    return f"/uploads/{sha256[:2]}/{sha256}{extension}"
+
+
+def parse_content_url(url: Optional[str]) -> Optional[str]:
+    """SHA-256 of a content-addressed upload URL; None for anything else (legacy uploads, external URLs)."""
+    match = CONTENT_URL.match(url or "")
+    return match.group(2) if match else None
+
+
+def path_for(url: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / url[len("/uploads/"):]
+
+
+def format_size(num_bytes: int) -> str:
+    """Human-readable size for messages: "10 MB", "1.5 KB", "200 bytes"."""
+    for unit, size in (("MB", 1024 * 1024), ("KB", 1024)):
+        if num_bytes >= size:
+            return f"{round(num_bytes / size, 1):g} {unit}"
+    return f"{num_bytes} bytes"
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File is larger than {format_size(max_bytes)}",
+    )
+
+
+def _unsupported() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="File must be a PNG, JPEG, GIF or WebP image",
+    )
+
+
+def _stream_to_disk(source: BinaryIO, max_bytes: int) -> str:
+    """Chunked, hashed copy with size limit and sniffing, then atomic rename. Runs on a worker thread."""
+    root = Path(settings.UPLOAD_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=root, prefix=".upload-", suffix=".part")
+    out = os.fdopen(fd, "wb")
+    try:
+        digest = hashlib.sha256()
+        header = b""
+        size = 0
+        while True:
+            chunk = source.read(settings.UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            if len(header) < SNIFF_BYTES:
+                header += chunk[:SNIFF_BYTES - len(header)]
+                if len(header) >= SNIFF_BYTES and not sniff_image_extension(header):
+                    raise _unsupported()
+            digest.update(chunk)
+            out.write(chunk)
+
+        extension = sniff_image_extension(header)
+        if not extension:
+            raise _unsupported()
+
+        sha256 = digest.hexdigest()
+        final_path = content_path(sha256, extension)
+        if final_path.exists():
+            # Already stored: drop the copy, and refresh the mtime so GC leaves it alone
+            # until the caller has taken its reference
+            out.close()
+            os.unlink(temp_name)
+            os.utime(final_path)
+        else:
+            out.flush()
+            os.fsync(out.fileno())
+            out.close()
+            final_path.parent.mkdir(exist_ok=True)
+            os.replace(temp_name, final_path)
+        return content_url(sha256, extension)
+    except BaseException:
+        out.close()
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+async def save_image(file: UploadFile, max_bytes: Optional[int] = None) -> str:
+    """
+    Store an uploaded image and return its /uploads/... URL (413/415 on bad
+    input). The file is unreferenced until the caller records the URL with
+    add_reference; if that never commits, GC removes it. max_bytes limits the
+    stored file; how much a request may send at all is bounded by
+    UploadSizeLimit while the body streams in.
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    # Starlette knows the spooled size already: reject without copying anything
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    return await run_in_threadpool(_stream_to_disk, file.file, max_bytes)
+
+
+# ---------------------------------------------------------------------------
+# Request size limit
+# ---------------------------------------------------------------------------
+
+# Most files one upload form carries (profile photo + full-body photo), plus room for its text fields
+MAX_FILES_PER_REQUEST = 2
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware bounding multipart bodies while they stream in.
+    Starlette spools a whole form to disk before the route runs, so
+    save_image's max_bytes alone would accept (and store) any size first.
+    A declared Content-Length over the limit is refused before anything is
+    read; an undeclared (chunked) body fails with 413 as soon as it passes
+    the limit, raised from receive() inside form parsing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def limit() -> int:
+        return MAX_FILES_PER_REQUEST * settings.UPLOAD_MAX_BYTES + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        headers = Headers(scope=scope) if scope["type"] == "http" else None
+        if headers is None or not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit()
+        declared = headers.get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            response = JSONResponse(
+                {"detail": f"Request is larger than {format_size(limit)}"},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # An HTTPException, so FastAPI's body parsing re-raises it as is
+                    raise _too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# ---------------------------------------------------------------------------
+# Reference counting (in the caller's transaction; the caller commits)
+#
+# updated_at is set from utcnow() here rather than the database's NOW(), which
+# is in the server's time zone: gc_uploads compares it with utcnow().
+# ---------------------------------------------------------------------------
+
+def _locked_blob(db: Session, sha256: str) -> Optional[UploadBlob]:
+    return db.query(UploadBlob).filter(UploadBlob.sha256 == sha256).with_for_update().first()
+
+
+def add_reference(db: Session, url: Optional[str]):
+    """Record one more row pointing at `url`. No-op for URLs outside the content store."""
+    sha256 = parse_content_url(url)
+    if sha256 is None:
+        return
+
+    now = datetime.utcnow()
+    blob = _locked_blob(db, sha256)
+    if blob is None:
+        try:
+            with db.begin_nested():
+                db.add(UploadBlob(sha256=sha256, url=url, ref_count=1, updated_at=now))
+        except IntegrityError:
+            # A concurrent upload of the same content created the row first
+            blob = _locked_blob(db, sha256)
+    if blob is not None:
+        blob.ref_count += 1
+        blob.updated_at = now
+    db.flush()
+
+    # GC may have removed an unreferenced file just before the reference was taken
+    if not path_for(url).exists():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Uploaded file is no longer available, please upload it again",
+        )
+
+
+def release_reference(db: Session, url: Optional[str]):
+    """Drop one reference to `url`; the file is left for GC once nothing points at it."""
+    sha256 = parse_content_url(url)
+    if sha256 is None:
+        return
+    blob = _locked_blob(db, sha256)
+    if blob is not None and blob.ref_count > 0:
+        blob.ref_count -= 1
+        blob.updated_at = datetime.utcnow()
+        db.flush()
+
+
+# ---------------------------------------------------------------------------
+# Serving
+# ---------------------------------------------------------------------------
+
+class UploadFiles(StaticFiles):
+    """
+    StaticFiles for UPLOAD_DIR. Content-addressed files never change, so they
+    are cacheable forever with the content hash as a strong ETag; legacy
+    uuid-named files are revalidated on every use.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        name = os.path.basename(full_path)
+        if CONTENT_FILE.match(name):
+            response.headers["etag"] = f'"{name.split(".")[0]}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = "no-cache"
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
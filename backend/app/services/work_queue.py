@@ -0,0 +1,216 @@
+"""
+Outbox-backed background work queue.
+
+Request handlers call enqueue_* in their own transaction, so the work is
+recorded if and only if the change that caused it commits. OutboxWorker
+claims pending rows with a lease, handles them per group (badge events in
+order, then at most one settlement recalculation however many payments
+asked for it) and marks them processed. A worker that dies mid-batch
+leaves its rows to reappear when the lease expires: delivery is
+at-least-once, and every handler is safe to run twice.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.outbox import OutboxEvent
+from app.services.badge_rules import BadgeRuleEngine, event_from_payload, event_to_payload
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_RECALCULATE_RESULTS = "recalculate_results"
+OUTBOX_BADGE_EVENT = "badge_event"
+
+
+class ClaimedEvent(NamedTuple):
+    id: int
+    kind: str
+    group_id: int
+    payload: Optional[Dict[str, Any]]
+    attempts: int
+
+
+# available_at is always set from utcnow() here, like the worker's leases and backoff:
+# the database's NOW() is in the server's time zone, and _claim compares with utcnow()
+
+def enqueue_badge_event(db: Session, event):
+    """Defer badge evaluation of a domain event. Does not commit."""
+    db.add(OutboxEvent(
+        kind=OUTBOX_BADGE_EVENT,
+        group_id=event.group_id,
+        payload=event_to_payload(event),
+        available_at=datetime.utcnow(),
+    ))
+
+
+def enqueue_results_recalculation(db: Session, group_id: int):
+    """Defer recalculation of a group's settlement results. Does not commit."""
+    db.add(OutboxEvent(kind=OUTBOX_RECALCULATE_RESULTS, group_id=group_id, available_at=datetime.utcnow()))
+
+
+class OutboxWorker:
+    """
+    Polls outbox_events and runs the handlers. Runs as a daemon thread in the
+    API process by default (start()/stop() from app startup/shutdown), or on
+    its own via app.scripts.run_outbox_worker.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+        self.poll_interval = settings.OUTBOX_POLL_INTERVAL_SECONDS
+        self.coalesce_window = settings.OUTBOX_COALESCE_WINDOW_MS / 1000
+        self.batch_size = settings.OUTBOX_BATCH_SIZE
+        self.lease = timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        self.max_attempts = settings.OUTBOX_MAX_ATTEMPTS
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def session_factory(self) -> Callable[[], Session]:
+        if self._session_factory is None:
+            from app.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        """Nudge the worker after committing new outbox rows (no-op if it isn't running)."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if self._wakeup.wait(self.poll_interval):
+                # Let the rest of a burst land so it is coalesced into one batch
+                self._stopping.wait(self.coalesce_window)
+            self._wakeup.clear()
+            try:
+                while self.run_once() and not self._stopping.is_set():
+                    pass
+            except Exception:
+                logger.exception("Outbox worker iteration failed")
+
+    # -- processing --------------------------------------------------------
+
+    def run_once(self) -> int:
+        """Claim and process one batch. Returns the number of rows claimed."""
+        claimed = self._claim()
+        by_group: Dict[int, List[ClaimedEvent]] = {}
+        for row in claimed:
+            by_group.setdefault(row.group_id, []).append(row)
+
+        for group_id, rows in by_group.items():
+            self._process_group(group_id, rows)
+        return len(claimed)
+
+    def _claim(self) -> List[ClaimedEvent]:
+        """Lease a batch of pending rows so other workers skip them until it expires."""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            rows = db.query(OutboxEvent).filter(
+                OutboxEvent.processed_at.is_(None),
+                OutboxEvent.available_at <= now
+            ).order_by(OutboxEvent.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+            if not rows:
+                db.rollback()
+                return []
+
+            claimed = []
+            for row in rows:
+                row.available_at = now + self.lease
+                row.attempts = (row.attempts or 0) + 1
+                claimed.append(ClaimedEvent(row.id, row.kind, row.group_id, row.payload, row.attempts))
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _process_group(self, group_id: int, rows: List[ClaimedEvent]):
+        badge_rows = [row for row in rows if row.kind == OUTBOX_BADGE_EVENT]
+        recalc_rows = [row for row in rows if row.kind == OUTBOX_RECALCULATE_RESULTS]
+        unknown_rows = [row for row in rows if row not in badge_rows and row not in recalc_rows]
+
+        db = self.session_factory()
+        try:
+            # Badge effects and their outbox rows commit together, so a row is never applied twice
+            if badge_rows:
+                engine = BadgeRuleEngine(db)
+                for row in badge_rows:
+                    engine.publish(event_from_payload(row.payload))
+                self._mark_processed(db, badge_rows)
+                db.commit()
+
+            # Any number of requests for this group -> one recalculation (idempotent)
+            if recalc_rows:
+                from app.services.settlement import SettlementService
+                SettlementService(db).calculate_settlement_results(group_id)
+                self._mark_processed(db, recalc_rows)
+                db.commit()
+
+            if unknown_rows:
+                logger.error("Unknown outbox kinds for group %s: %s", group_id, {row.kind for row in unknown_rows})
+                self._mark_processed(db, unknown_rows, error="unknown kind")
+                db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Outbox processing failed for group %s", group_id)
+            self._record_failure(db, rows, exc)
+        finally:
+            db.close()
+
+    def _mark_processed(self, db: Session, rows: List[ClaimedEvent], error: Optional[str] = None):
+        db.execute(
+            update(OutboxEvent).where(
+                OutboxEvent.id.in_([row.id for row in rows])
+            ).values(processed_at=datetime.utcnow(), last_error=error),
+            execution_options={"synchronize_session": False},
+        )
+
+    def _record_failure(self, db: Session, rows: List[ClaimedEvent], exc: Exception):
+        """Retry with exponential backoff; give up after OUTBOX_MAX_ATTEMPTS."""
+        try:
+            now = datetime.utcnow()
+            for row in rows:
+                values = {"last_error": repr(exc)[:1000]}
+                if row.attempts >= self.max_attempts:
+                    values["processed_at"] = now
+                    logger.error("Outbox event %s (%s) dropped after %s attempts", row.id, row.kind, row.attempts)
+                else:
+                    values["available_at"] = now + timedelta(seconds=self.poll_interval * 2 ** row.attempts)
+                db.execute(
+                    update(OutboxEvent).where(
+                        OutboxEvent.id == row.id,
+                        OutboxEvent.processed_at.is_(None)
+                    ).values(**values),
+                    execution_options={"synchronize_session": False},
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Could not record outbox failure; rows retry when their lease expires")
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,62 @@
+"""
+Production server: gunicorn pre-forking uvicorn workers.
+Usage: gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master (preload_app) and forked, so
+workers start without re-importing it. Nothing connects to the database
+at import time; engines are disposed after fork anyway so a worker never
+reuses a connection opened by the master. On SIGTERM workers stop
+accepting, finish in-flight requests for up to graceful_timeout seconds
+and run the app's shutdown hooks (outbox worker, bcrypt pool, HTTP clients).
+"""
+
+import multiprocessing
+import os
+
+from app.config import settings
+
+# Connection budget on the primary: each worker has a sync and an async engine,
+# each pooling up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections. Workers times
+# that must stay below the server's max_connections (DB_MAX_CONNECTIONS), with
+# some left for migrations, admin shells and replication. With the defaults
+# (5 + 5) a worker needs 20, so 151 connections fit 7 workers.
+RESERVED_CONNECTIONS = 10
+CONNECTIONS_PER_WORKER = 2 * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+MAX_WORKERS = max(1, (settings.DB_MAX_CONNECTIONS - RESERVED_CONNECTIONS) // CONNECTIONS_PER_WORKER)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# WEB_CONCURRENCY wins; the default is 2 per CPU, capped by the connection budget
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2, MAX_WORKERS)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth; jitter avoids restarting them all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    if workers > MAX_WORKERS:
+        server.log.warning(
+            "%s workers x %s connections can exceed DB_MAX_CONNECTIONS=%s; "
+            "lower WEB_CONCURRENCY (at most %s) or DB_POOL_SIZE/DB_MAX_OVERFLOW",
+            workers, CONNECTIONS_PER_WORKER, settings.DB_MAX_CONNECTIONS, MAX_WORKERS,
+        )
+
+
+def post_fork(server, worker):
+    from app.database import async_engine, engine, read_router
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for factory in read_router.replicas:
+        factory.kw["bind"].dispose(close=False)
+    for factory in read_router.async_replicas:
+        factory.kw["bind"].sync_engine.dispose(close=False)
@@ -0,0 +1,144 @@
+import os
+
+# Settings are read at import time: point the app at a private in-memory
+# SQLite database and keep background threads out of the tests
+os.environ["DB_URL"] = "sqlite://"
+os.environ["DB_REPLICA_URLS"] = ""
+os.environ["OUTBOX_WORKER_ENABLED"] = "false"
+os.environ["DEBUG"] = "true"
+
+import itertools
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+
+from app.database import SessionLocal, engine
+from app.migrations import upgrade
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    upgrade(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def scratch_engine(tmp_path):
+    """A separate, empty file database (for migration tests)."""
+    scratch = create_engine(f"sqlite:///{tmp_path / 'scratch.db'}")
+    yield scratch
+    scratch.dispose()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="module")
+def plan_seed():
+    """The query-plan check's seed data (a few thousand rows), added to the test database."""
+    from app.scripts.check_query_plans import seed
+
+    with engine.begin() as conn:
+        return seed(conn)
+
+
+def auth_headers(user_id: int) -> dict:
+    from app.services.auth import AuthService
+
+    return {"Authorization": f"Bearer {AuthService(None)._create_access_token(user_id)}"}
+
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed inside the block (sync and async engines)."""
+    counter = [0]
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    event.listen(Engine, "before_cursor_execute", _count)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, "before_cursor_execute", _count)
+
+
+@contextmanager
+def record_statements():
+    """Collect the SQL statements executed inside the block (sync and async engines)."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.strip())
+
+    event.listen(Engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", _record)
+
+
+def make_group(members: int = 4) -> dict:
+    """Insert a group whose participants are all claimed by users. Returns ids."""
+    from app.models import Group, GroupParticipant, User
+
+    with engine.begin() as conn:
+        # Ids continue after any rows other tests added (e.g. the query-plan seed)
+        n = next(_ids) + conn.exec_driver_sql('SELECT COALESCE(MAX(id), 0) FROM "groups"').scalar()
+        user_ids = [n * 1000 + i for i in range(members)]
+        participant_ids = [n * 1000 + i for i in range(members)]
+        conn.execute(insert(User), [
+            {"id": uid, "email": f"user{uid}@example.com", "name": f"user{uid}", "password_hash": None}
+            for uid in user_ids
+        ])
+        conn.execute(insert(Group), [{"id": n, "name": f"group{n}", "owner_id": user_ids[0]}])
+        conn.execute(insert(GroupParticipant), [
+            {"id": pid, "group_id": n, "user_id": uid, "name": f"p{pid}", "is_admin": uid == user_ids[0]}
+            for pid, uid in zip(participant_ids, user_ids)
+        ])
+    return {"group_id": n, "user_ids": user_ids, "participant_ids": participant_ids}
+
+
+def add_settlements(group: dict, count: int):
+    """Bulk-insert `count` equal-split expenses shared by every participant."""
+    from app.models import Settlement, SettlementParticipant
+
+    pids = group["participant_ids"]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        first_id = (conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM settlements").scalar() or 0) + 1
+        settlement_ids = range(first_id, first_id + count)
+        conn.execute(insert(Settlement), [
+            {
+                "id": sid, "group_id": group["group_id"], "payer_participant_id": pids[sid % len(pids)],
+                "title": f"s{sid}", "total_amount": Decimal("40.00"), "is_settled": False,
+                "created_at": now - timedelta(minutes=sid),
+            }
+            for sid in settlement_ids
+        ])
+        conn.execute(insert(SettlementParticipant), [
+            {"settlement_id": sid, "participant_id": pid, "amount_owed": Decimal("40.00") / len(pids)}
+            for sid in settlement_ids
+            for pid in pids
+        ])
@@ -0,0 +1,104 @@
+import asyncio
+import inspect
+import time
+
+import pytest
+
+from app.routers import auth
+from app.services.auth import user_cache
+from app.services.password_hasher import PasswordHasher
+from conftest import auth_headers, make_group
+
+
+def test_signup_and_login_run_on_the_event_loop():
+    # Sync routes would hold a threadpool thread for the whole bcrypt call
+    assert inspect.iscoroutinefunction(auth.signup)
+    assert inspect.iscoroutinefunction(auth.login)
+
+
+def test_signup_login_and_hash_upgrade(client, monkeypatch):
+    monkeypatch.setattr(auth.password_hasher, "rounds", 4)
+    user = {"email": "async-login@example.com", "password": "correct horse", "name": "async"}
+
+    response = client.post("/api/v1/auth/signup", json=user)
+    assert response.status_code == 201
+    assert response.json()["email"] == user["email"]
+    assert client.post("/api/v1/auth/signup", json=user).status_code == 400
+
+    wrong = client.post("/api/v1/auth/login", json={"email": user["email"], "password": "wrong"})
+    assert wrong.status_code == 401
+
+    # A cost change since signup: the login succeeds and stores a rehashed password
+    monkeypatch.setattr(auth.password_hasher, "rounds", 5)
+    response = client.post("/api/v1/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.status_code == 200
+
+    from app.database import SessionLocal
+    from app.models import User
+
+    with SessionLocal() as db:
+        assert db.query(User.password_hash).filter(User.email == user["email"]).scalar().startswith("$2b$05$")
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_current_user_routes_open_no_sync_session(client, monkeypatch, cached):
+    import app.database
+
+    user_id = make_group(1)["user_ids"][0]
+    headers = auth_headers(user_id)
+    user_cache.clear()
+    if cached:
+        assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    def no_sync_session():
+        raise AssertionError("sync session opened")
+
+    monkeypatch.setattr(app.database, "SessionLocal", no_sync_session)
+
+    me = client.get("/api/v1/users/me", headers=headers)
+    assert me.status_code == 200
+    assert me.json()["avatar"] is None
+    assert user_cache.get(user_id) is not None
+
+    # Writes go through a user merged into the route's session, cache hit or not
+    response = client.patch("/api/v1/users/me", json={"name": "renamed"}, headers=headers)
+    assert response.status_code == 200
+    avatar = client.patch(
+        "/api/v1/users/me/avatar", json={"body": "b1", "eyes": "e1", "mouth": "m1"}, headers=headers
+    )
+    assert avatar.status_code == 200
+    me = client.get("/api/v1/users/me", headers=headers).json()
+    assert me["name"] == "renamed"
+    assert me["avatar"]["body"] == "b1"
+
+
+def test_pool_work_is_awaited_without_blocking_the_loop():
+    hasher = PasswordHasher(pool_size=1, max_queue=1, rounds=12, timeout_seconds=30)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        started = time.monotonic()
+        password_hash = await hasher.hash("secret")
+        elapsed = time.monotonic() - started
+        ticking.cancel()
+        return password_hash, ticks, elapsed
+
+    try:
+        password_hash, ticks, elapsed = asyncio.run(main())
+    finally:
+        hasher.shutdown()
+
+    assert asyncio.run(PasswordHasher(pool_size=0, rounds=12).verify("secret", password_hash)) == (True, None)
+    # The loop kept running while the pool worked
+    assert ticks >= elapsed / 0.01 / 2
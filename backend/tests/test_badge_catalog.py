@@ -0,0 +1,24 @@
+from app.models.badge import GROUP_BADGE_SANDY
+from app.scripts.seed_group_badges import seed_group_badges
+from app.services.badge_catalog import BadgeCatalog
+
+
+def test_reads_survive_an_invalidate_right_after_loading(db):
+    seed_group_badges()
+    catalog = BadgeCatalog(ttl_seconds=3600)
+    load = catalog._load
+
+    def load_then_invalidate(session):
+        # Another thread seeds or edits badges between the load and the read
+        snapshot = load(session)
+        catalog.invalidate()
+        return snapshot
+
+    catalog._load = load_then_invalidate
+
+    badges = catalog.all(db)
+    assert badges
+    sandy = catalog.get_by_code(db, GROUP_BADGE_SANDY)
+    assert sandy is not None
+    assert catalog.get_by_id(db, sandy.id) == sandy
+    assert catalog.ids_for_codes(db, [GROUP_BADGE_SANDY, "unknown"]) == [sandy.id]
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services.google_oauth import CircuitBreaker, GoogleOAuthClient
+
+
+async def _hang(request):
+    await asyncio.sleep(3600)
+
+
+async def _unavailable(request):
+    return httpx.Response(503)
+
+
+def _half_open_client(handler) -> GoogleOAuthClient:
+    client = GoogleOAuthClient()
+    client.max_retries = 5
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    client.breaker.record_failure()
+    client.breaker._opened_at = time.monotonic() - 31  # reset period over: the next call is the trial
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.parametrize("handler", [_hang, _unavailable], ids=["during the request", "during a backoff sleep"])
+def test_cancelled_half_open_trial_does_not_wedge_the_breaker(handler):
+    client = _half_open_client(handler)
+
+    async def cancel_trial():
+        trial = asyncio.create_task(client._request("GET", "https://google.test/userinfo", idempotent=True))
+        await asyncio.sleep(0.05)
+        assert client.breaker._trial_in_flight
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        await client.aclose()
+
+    asyncio.run(cancel_trial())
+
+    # The cancelled trial counts as a failure: open again, and another trial is allowed after the reset period
+    assert client.breaker.is_open
+    assert not client.breaker.allow()
+    client.breaker._opened_at = time.monotonic() - 31
+    assert client.breaker.allow()
@@ -0,0 +1,132 @@
+import pytest
+
+from conftest import auth_headers, make_group, record_statements
+
+
+def _settlements(client, group, headers, etag=None):
+    if etag:
+        headers = {**headers, "If-None-Match": etag}
+    return client.get(f"/api/v1/groups/{group['group_id']}/settlements", headers=headers)
+
+
+def test_payer_only_expense_invalidates_settlements_etag(client):
+    group = make_group()
+    pids = group["participant_ids"]
+    headers = auth_headers(group["user_ids"][0])
+
+    etag = _settlements(client, group, headers).headers["ETag"]
+    assert _settlements(client, group, headers, etag).status_code == 304
+
+    # Moves no balance: the payer owes their own full amount
+    response = client.post("/api/v1/settlements", headers=headers, json={
+        "group_id": group["group_id"], "payer_participant_id": pids[0], "title": "own lunch",
+        "total_amount": "12.00", "participants": [{"participant_id": pids[0]}],
+    })
+    assert response.status_code == 201
+
+    response = _settlements(client, group, headers, etag)
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["own lunch"]
+
+
+def test_zero_amount_game_invalidates_settlements_etag(client):
+    group = make_group()
+    pids = group["participant_ids"]
+    headers = auth_headers(group["user_ids"][0])
+
+    etag = _settlements(client, group, headers).headers["ETag"]
+
+    response = client.post("/api/v1/games/result", headers=headers, json={
+        "group_id": group["group_id"], "game_type": "bomb", "participants": pids[:3],
+        "loser_participant_id": pids[1], "amount": "0",
+    })
+    assert response.status_code == 201
+
+    response = _settlements(client, group, headers, etag)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def _writes(statements):
+    return [s for s in statements if s.split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+
+
+def test_results_are_recomputed_only_after_balance_changes(client):
+    group = make_group()
+    pids = group["participant_ids"]
+    headers = auth_headers(group["user_ids"][0])
+    results_url = f"/api/v1/groups/{group['group_id']}/results"
+
+    client.post("/api/v1/settlements", headers=headers, json={
+        "group_id": group["group_id"], "payer_participant_id": pids[0], "title": "dinner",
+        "total_amount": "40.00", "participants": [{"participant_id": pid} for pid in pids],
+    })
+    assert client.get(results_url, headers=headers).json()["total_transactions"] == 3
+
+    # Shown on the group screens (new ETag) but moves no balance: served from the stored rows
+    etag = client.get(results_url, headers=headers).headers["ETag"]
+    assert client.patch("/api/v1/users/me", headers=headers, json={"payment_account": "1234"}).status_code == 200
+    with record_statements() as statements:
+        response = client.get(results_url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["creditor_payment_account"] == "1234"
+    assert statements and _writes(statements) == []
+
+    # A balance change recomputes once, then reads are read-only again
+    client.post("/api/v1/settlements", headers=headers, json={
+        "group_id": group["group_id"], "payer_participant_id": pids[1], "title": "taxi",
+        "total_amount": "10.00", "participants": [{"participant_id": pids[0]}, {"participant_id": pids[1]}],
+    })
+    with record_statements() as statements:
+        client.get(results_url, headers=headers)
+    assert _writes(statements)
+    with record_statements() as statements:
+        client.get(results_url, headers=headers)
+    assert statements and _writes(statements) == []
+
+
+def test_stale_recompute_reuses_results_stored_while_it_waited(client, db):
+    from app.database import SessionLocal
+    from app.models import SettlementResult
+    from app.services.settlement import SettlementService
+
+    group = make_group()
+    pids = group["participant_ids"]
+    headers = auth_headers(group["user_ids"][0])
+    client.post("/api/v1/settlements", headers=headers, json={
+        "group_id": group["group_id"], "payer_participant_id": pids[0], "title": "dinner",
+        "total_amount": "40.00", "participants": [{"participant_id": pid} for pid in pids],
+    })
+
+    # A GET /results found the results stale; the outbox worker recomputes before it gets the lock
+    stale = SessionLocal()
+    try:
+        service = SettlementService(stale)
+        assert service.db.query(SettlementResult).filter(SettlementResult.group_id == group["group_id"]).count() == 0
+        expected = SettlementService(db).calculate_settlement_results(group["group_id"])
+
+        with record_statements() as statements:
+            response = service.calculate_settlement_results(group["group_id"])
+    finally:
+        stale.close()
+
+    assert _writes(statements) == []
+    assert response == expected
+    pairs = db.query(SettlementResult.debtor_participant_id, SettlementResult.creditor_participant_id).filter(
+        SettlementResult.group_id == group["group_id"], SettlementResult.is_completed == False
+    ).all()
+    assert len(pairs) == len(set(pairs)) == 3
+
+
+def test_recompute_refuses_to_commit_the_callers_pending_changes(db):
+    from app.models import Group
+    from app.services.settlement import SettlementService
+
+    group = make_group()
+    db.get(Group, group["group_id"]).name = "uncommitted"
+
+    with pytest.raises(RuntimeError):
+        SettlementService(db).calculate_settlement_results(group["group_id"])
+
+    db.rollback()
+    assert db.get(Group, group["group_id"]).name == f"group{group['group_id']}"
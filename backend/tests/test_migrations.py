@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import Base
+from app.migrations import HEAD, current_version, upgrade
+from app.migrations import v0001_baseline as baseline
+
+
+def test_migrations_produce_the_model_schema(scratch_engine):
+    upgrade(scratch_engine)
+
+    with scratch_engine.connect() as conn:
+        assert current_version(conn) == HEAD
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            assert inspector.has_table(table.name), table.name
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            assert {column.name for column in table.columns} <= columns, table.name
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            assert {index.name for index in table.indexes} <= indexes, table.name
+
+
+def test_upgrade_from_baseline_backfills_existing_data(scratch_engine):
+    upgrade(scratch_engine, target=1)
+    with scratch_engine.begin() as conn:
+        conn.execute(insert(baseline.users), [
+            {"id": uid, "email": f"legacy{uid}@example.com", "name": f"u{uid}"} for uid in (1, 2, 3)
+        ])
+        conn.execute(insert(baseline.groups), [{"id": 1, "name": "legacy", "owner_id": 1, "invite_code": "LEGACY01"}])
+        conn.execute(insert(baseline.group_participants), [
+            {"id": 1, "group_id": 1, "user_id": 1, "name": "a"},
+            {"id": 2, "group_id": 1, "user_id": 2, "name": "b"},
+            {"id": 3, "group_id": 1, "user_id": 3, "name": "c"},
+            {"id": 4, "group_id": 1, "user_id": None, "name": "guest"},
+        ])
+        conn.execute(insert(baseline.settlements), [
+            {"id": 1, "group_id": 1, "payer_participant_id": 1, "title": "dinner",
+             "total_amount": Decimal("100.00"), "split_type": "EQUAL", "is_settled": False},
+            {"id": 2, "group_id": 1, "payer_participant_id": 2, "title": "taxi",
+             "total_amount": Decimal("30.00"), "split_type": "EQUAL", "is_settled": False},
+            {"id": 3, "group_id": 1, "payer_participant_id": 3, "title": "old",
+             "total_amount": Decimal("999.00"), "split_type": "EQUAL", "is_settled": True},
+        ])
+        conn.execute(insert(baseline.settlement_participants), [
+            *({"settlement_id": 1, "participant_id": pid, "amount_owed": Decimal("25.00")} for pid in (1, 2, 3, 4)),
+            *({"settlement_id": 2, "participant_id": pid, "amount_owed": Decimal("10.00")} for pid in (1, 2, 3)),
+            {"settlement_id": 3, "participant_id": 1, "amount_owed": Decimal("999.00")},
+        ])
+        conn.execute(insert(baseline.settlement_results), [
+            {"group_id": 1, "debtor_participant_id": 4, "creditor_participant_id": 1,
+             "amount": Decimal("25.00"), "is_completed": True},
+            {"group_id": 1, "debtor_participant_id": 3, "creditor_participant_id": 1,
+             "amount": Decimal("35.00"), "is_completed": False},
+        ])
+        conn.execute(insert(baseline.game_results), [
+            {"group_id": 1, "game_type": "BOMB", "participants": [1, 2, 3, 4], "loser_participant_id": 3,
+             "amount": Decimal("0.00")}
+            for _ in range(3)
+        ])
+
+    upgrade(scratch_engine)
+
+    from app.models import BadgeProgress, Group
+    from app.services.ledger import LedgerService
+
+    with Session(scratch_engine) as db:
+        assert db.query(Group.version).filter(Group.id == 1).scalar() == 0
+
+        stored = LedgerService(db).get_balances(1)
+        assert stored == LedgerService(db).compute_balances_from_history(1)
+        assert stored == {1: Decimal("40.00"), 2: Decimal("-5.00"), 3: Decimal("-35.00"), 4: Decimal("0.00")}
+
+        wins = dict(db.execute(
+            select(BadgeProgress.user_id, BadgeProgress.value).where(BadgeProgress.metric == "game_wins")
+        ).all())
+        assert wins == {1: 3, 2: 3}
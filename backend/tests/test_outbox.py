@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from app.models import BadgeProgress, Group, OutboxEvent
+from app.services.badge_rules import GameFinished
+from app.services.work_queue import OutboxWorker, enqueue_badge_event, enqueue_results_recalculation
+from conftest import auth_headers, make_group
+
+
+def test_enqueued_events_are_drained_by_run_once(client, db):
+    group = make_group()
+    group_id, pids = group["group_id"], group["participant_ids"]
+    client.post("/api/v1/settlements", headers=auth_headers(group["user_ids"][0]), json={
+        "group_id": group_id, "payer_participant_id": pids[0], "title": "dinner",
+        "total_amount": "40.00", "participants": [{"participant_id": pid} for pid in pids],
+    })
+
+    enqueue_results_recalculation(db, group_id)
+    enqueue_badge_event(db, GameFinished(group_id, 1, tuple(pids[:3]), pids[2]))
+    # Available at once in UTC, whatever time zone the database server is in
+    events = list(db.new)
+    for event in events:
+        assert abs(event.available_at - datetime.utcnow()) < timedelta(seconds=5)
+    db.commit()
+
+    worker = OutboxWorker()
+    while worker.run_once():
+        pass
+
+    db.expire_all()
+    assert all(db.get(OutboxEvent, event.id).processed_at is not None for event in events)
+    balance_version, results_version = db.query(Group.balance_version, Group.results_version).filter(
+        Group.id == group_id
+    ).one()
+    assert results_version == balance_version
+    wins = dict(db.query(BadgeProgress.user_id, BadgeProgress.value).filter(
+        BadgeProgress.group_id == group_id, BadgeProgress.metric == "game_wins"
+    ).all())
+    assert wins == {group["user_ids"][0]: 1, group["user_ids"][1]: 1}
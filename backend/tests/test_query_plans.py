@@ -0,0 +1,12 @@
+from app.scripts import check_query_plans
+
+
+def test_hot_paths_never_full_scan(plan_seed):
+    checks = check_query_plans.run(plan_seed)
+
+    assert len(checks) > 20
+    failures = {
+        f"{check.label}: {' '.join(check.statement.split())[:200]}": check.plan
+        for check in checks if check.scanned
+    }
+    assert failures == {}
@@ -0,0 +1,45 @@
+from app import database
+from app.services.auth import RECENT_WRITE_COOKIE
+from conftest import auth_headers, make_group
+
+
+def test_reads_follow_the_recent_write_cookie(client, monkeypatch):
+    picks = []
+
+    def session_factory(primary=False):
+        picks.append(primary)
+        return database.SessionLocal
+
+    def async_session_factory(primary=False):
+        picks.append(primary)
+        return database.AsyncSessionLocal
+
+    # Any replica configured turns routing on; every read is served by the primary regardless
+    monkeypatch.setattr(database.read_router, "replicas", [database.SessionLocal])
+    monkeypatch.setattr(database.read_router, "session_factory", session_factory)
+    monkeypatch.setattr(database.read_router, "async_session_factory", async_session_factory)
+
+    group = make_group()
+    headers = auth_headers(group["user_ids"][0])
+    settlements_url = f"/api/v1/groups/{group['group_id']}/settlements"
+
+    assert client.get(settlements_url, headers=headers).status_code == 200
+    assert picks == [False]
+
+    response = client.patch("/api/v1/users/me", headers=headers, json={"payment_account": "1234"})
+    assert response.status_code == 200
+    marker = response.cookies[RECENT_WRITE_COOKIE]
+
+    # The client carries the marker, so any worker serving the next read pins it to the primary
+    picks.clear()
+    assert client.get(settlements_url, headers=headers).status_code == 200
+    assert picks == [True]
+
+    # Only for the user who wrote, and the marker is no access token
+    picks.clear()
+    other = auth_headers(group["user_ids"][1])
+    assert client.get(settlements_url, headers=other).status_code == 200
+    assert picks == [False]
+    client.cookies.clear()
+    response = client.get(settlements_url, headers={"Authorization": f"Bearer {marker}"})
+    assert response.status_code == 401
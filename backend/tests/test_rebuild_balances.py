@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app.database import engine
+from app.models import ParticipantBalance
+from app.scripts.rebuild_balances import rebuild_balances
+from app.services.ledger import LedgerService
+from conftest import auth_headers, make_group
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(client, db):
+    group = make_group()
+    group_id, pids = group["group_id"], group["participant_ids"]
+    client.post("/api/v1/settlements", headers=auth_headers(group["user_ids"][0]), json={
+        "group_id": group_id, "payer_participant_id": pids[0], "title": "dinner",
+        "total_amount": "40.00", "participants": [{"participant_id": pid} for pid in pids],
+    })
+    assert rebuild_balances([group_id], check_only=True) == []
+
+    with engine.begin() as conn:
+        conn.execute(update(ParticipantBalance).where(
+            ParticipantBalance.group_id == group_id, ParticipantBalance.participant_id == pids[1]
+        ).values(balance=Decimal("99.00")))
+
+    assert rebuild_balances([group_id], check_only=True) == [group_id]
+    assert LedgerService(db).get_balances(group_id)[pids[1]] == Decimal("99.00")
+
+    assert rebuild_balances([group_id]) == [group_id]
+    db.expire_all()
+    ledger = LedgerService(db)
+    assert ledger.get_balances(group_id) == ledger.compute_balances_from_history(group_id)
+    assert rebuild_balances([group_id], check_only=True) == []
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app.database import engine
+from app.models import Settlement
+from conftest import auth_headers, make_group
+
+
+def test_history_pages_through_rows_created_in_the_same_second(client):
+    group = make_group()
+    headers = auth_headers(group["user_ids"][0])
+    # created_at comes from the server default, so all three share one timestamp
+    with engine.begin() as conn:
+        conn.execute(insert(Settlement), [
+            {"group_id": group["group_id"], "payer_participant_id": group["participant_ids"][0],
+             "title": f"t{i}", "total_amount": Decimal("10.00"), "is_settled": False}
+            for i in range(3)
+        ])
+
+    titles, cursor = [], None
+    for _ in range(4):
+        params = {"limit": 1, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/api/v1/groups/{group['group_id']}/settlements/history", headers=headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        titles += [item["title"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+
+    assert titles == ["t2", "t1", "t0"]
@@ -0,0 +1,91 @@
+import pytest
+
+from app.schemas.settlement import SettlementResponse
+from app.services.settlement import SETTLEMENT_READ_QUERY_BUDGET, SettlementService
+
+from conftest import add_settlements, auth_headers, count_queries, make_group
+
+ROW_COUNTS = (1, 10, 600)
+
+
+def _serialize(settlements):
+    return [SettlementResponse.model_validate(s).model_dump() for s in settlements]
+
+
+@pytest.fixture(scope="module")
+def groups():
+    """One group per row count; 600 crosses SQLAlchemy's 500-row selectin batch."""
+    created = {}
+    for rows in ROW_COUNTS:
+        group = make_group()
+        add_settlements(group, rows)
+        created[rows] = group
+    return created
+
+
+def test_list_group_settlements_query_count_is_constant(db, groups):
+    counts = {}
+    for rows, group in groups.items():
+        db.expunge_all()
+        with count_queries() as counter:
+            settlements = SettlementService(db).list_group_settlements(group["group_id"])
+            payload = _serialize(settlements)
+        assert len(payload) == rows
+        assert all(share["user_name"] for item in payload for share in item["participants"])
+        counts[rows] = counter[0]
+
+    assert set(counts.values()) == {SETTLEMENT_READ_QUERY_BUDGET}, counts
+
+
+def test_settlement_history_query_count_is_constant(db, groups):
+    counts = {}
+    for rows, group in groups.items():
+        db.expunge_all()
+        with count_queries() as counter:
+            page = SettlementService(db).list_settlement_history(group["group_id"], limit=rows)
+            _serialize(page.items)
+        assert len(page.items) == rows
+        counts[rows] = counter[0]
+
+    assert set(counts.values()) == {SETTLEMENT_READ_QUERY_BUDGET}, counts
+
+
+def test_get_settlement_query_count(db, groups):
+    settlement_id = SettlementService(db).list_settlement_history(groups[10]["group_id"], limit=1).items[0].id
+    db.expunge_all()
+    with count_queries() as counter:
+        _serialize([SettlementService(db).get_settlement(settlement_id)])
+    assert counter[0] == SETTLEMENT_READ_QUERY_BUDGET
+
+
+def test_large_group_settlements_route(client, groups):
+    group = groups[600]
+    response = client.get(
+        f"/api/v1/groups/{group['group_id']}/settlements",
+        headers=auth_headers(group["user_ids"][0]),
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 600
+
+
+def test_create_and_update_responses_reflect_the_write(client):
+    group = make_group()
+    pids = group["participant_ids"]
+    headers = auth_headers(group["user_ids"][0])
+
+    response = client.post("/api/v1/settlements", headers=headers, json={
+        "group_id": group["group_id"], "payer_participant_id": pids[0], "title": "dinner",
+        "total_amount": "30.00", "participants": [{"participant_id": pid} for pid in pids[:3]],
+    })
+    assert response.status_code == 201
+    created = response.json()
+    assert sorted(share["participant_id"] for share in created["participants"]) == sorted(pids[:3])
+    assert all(share["user_name"] for share in created["participants"])
+
+    response = client.put(f"/api/v1/settlements/{created['id']}", headers=headers, json={
+        "participants": [{"participant_id": pid} for pid in pids[:2]],
+    })
+    assert response.status_code == 200
+    updated = response.json()
+    assert sorted(share["participant_id"] for share in updated["participants"]) == sorted(pids[:2])
+    assert {share["amount_owed"] for share in updated["participants"]} == {"15.00"}
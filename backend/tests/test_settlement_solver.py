@@ -0,0 +1,130 @@
+import random
+from decimal import Decimal
+from itertools import combinations
+
+import pytest
+
+from app.config import settings
+from app.services.settlement_solver import DUST, ExactSolver, GreedySolver
+
+
+def _random_balances(rng: random.Random, size: int, zero_sum: bool):
+    # Few distinct amounts so ties (and the sort's stability) are exercised too
+    amounts = [Decimal(rng.choice([1, 2, 5, 250, 1000, 3333, 999999]) * rng.choice([-1, 1])) / 100
+               for _ in range(size)]
+    if zero_sum:
+        amounts[-1] -= sum(amounts)
+    pids = rng.sample(range(1, 10 * size), size)
+    return dict(zip(pids, amounts))
+
+
+@pytest.mark.parametrize("zero_sum", [True, False], ids=["zero-sum", "unbalanced"])
+def test_cent_engine_matches_decimal_greedy(monkeypatch, zero_sum):
+    rng = random.Random(20240)
+    solver = GreedySolver()
+    for _ in range(300):
+        balances = _random_balances(rng, rng.randint(1, 40), zero_sum)
+
+        monkeypatch.setattr(settings, "BALANCE_ENGINE_MIN_PARTICIPANTS", len(balances) + 1)
+        decimal_transfers = solver.solve(balances)
+        monkeypatch.setattr(settings, "BALANCE_ENGINE_MIN_PARTICIPANTS", len(balances))
+        cent_transfers = solver.solve(balances)
+
+        assert cent_transfers == decimal_transfers, balances
+
+
+def _settle(balances, transfers):
+    remaining = dict(balances)
+    for debtor_id, creditor_id, amount in transfers:
+        assert amount > 0
+        remaining[debtor_id] += amount
+        remaining[creditor_id] -= amount
+    return remaining
+
+
+def _max_zero_sum_groups(values):
+    """Brute force: the largest number of disjoint zero-sum groups covering every value."""
+    if not values:
+        return 0
+    first, rest = values[0], values[1:]
+    best = 0
+    for size in range(len(rest) + 1):
+        for others in combinations(range(len(rest)), size):
+            if first + sum(rest[i] for i in others) == 0:
+                left = [v for i, v in enumerate(rest) if i not in others]
+                if sum(left) == 0:
+                    best = max(best, 1 + _max_zero_sum_groups(left))
+    return best
+
+
+class RecordingGreedy(GreedySolver):
+    def __init__(self):
+        self.calls = []
+
+    def solve(self, balances):
+        self.calls.append(dict(balances))
+        return super().solve(balances)
+
+
+def test_exact_solver_beats_greedy_on_splittable_groups():
+    balances = {pid: Decimal(v) for pid, v in enumerate([7, 3, 2, 6, -9, -9], start=1)}
+
+    exact = ExactSolver(time_budget_ms=1000).solve(balances)
+
+    assert len(GreedySolver().solve(balances)) == 5
+    assert len(exact) == 4  # {7, 2, -9} and {3, 6, -9}
+    assert all(abs(balance) <= DUST for balance in _settle(balances, exact).values())
+
+
+def test_exact_solver_uses_the_minimum_number_of_transfers():
+    rng = random.Random(7)
+    solver = ExactSolver(time_budget_ms=1000)
+    for _ in range(200):
+        values = [Decimal(rng.randint(-20, 20)) for _ in range(rng.randint(1, 7))]
+        values.append(-sum(values))
+        balances = {pid: value for pid, value in enumerate(values, start=1)}
+        active = [value for value in values if value]
+
+        transfers = solver.solve(balances)
+
+        assert len(transfers) == len(active) - _max_zero_sum_groups(active), balances
+        assert all(abs(balance) <= DUST for balance in _settle(balances, transfers).values()), balances
+
+
+def test_exact_solver_falls_back_to_greedy_when_the_budget_runs_out():
+    rng = random.Random(3)
+    values = [Decimal(rng.randint(1, 500)) * rng.choice([-1, 1]) / 100 for _ in range(15)]
+    values.append(-sum(values))
+    balances = {pid: value for pid, value in enumerate(values, start=1)}
+    fallback = RecordingGreedy()
+
+    transfers = ExactSolver(time_budget_ms=0, max_participants=20, fallback=fallback).solve(balances)
+
+    assert fallback.calls == [balances]
+    assert transfers == GreedySolver().solve(balances)
+
+
+def test_exact_solver_falls_back_to_greedy_above_max_participants():
+    balances = {1: Decimal("4.00"), 2: Decimal("-1.00"), 3: Decimal("-1.00"), 4: Decimal("-2.00")}
+    fallback = RecordingGreedy()
+
+    transfers = ExactSolver(max_participants=3, fallback=fallback).solve(balances)
+
+    assert fallback.calls == [balances]
+    assert transfers == GreedySolver().solve(balances)
+
+
+def test_exact_solver_settles_what_it_can_when_balances_do_not_sum_to_zero():
+    # 0.50 more is owed than is due (e.g. a rounding remainder on a ratio split)
+    balances = {1: Decimal("10.00"), 2: Decimal("-4.00"), 3: Decimal("-6.50"), 4: Decimal("3.00"), 5: Decimal("-3.00")}
+
+    transfers = ExactSolver(time_budget_ms=1000).solve(balances)
+
+    remaining = _settle(balances, transfers)
+    # Nobody is pushed past zero, and only the imbalance is left over
+    for pid, balance in balances.items():
+        assert abs(remaining[pid]) <= abs(balance)
+        assert remaining[pid] == 0 or (remaining[pid] > 0) == (balance > 0)
+    assert sum(remaining.values()) == sum(balances.values())
+    assert sum(abs(balance) for balance in remaining.values()) == Decimal("0.50")
+    assert len(transfers) <= len(GreedySolver().solve(balances))
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import main
+from app.migrations import HEAD, upgrade
+
+
+def test_startup_refuses_pending_migrations(scratch_engine, monkeypatch):
+    upgrade(scratch_engine, target=HEAD - 1)
+    monkeypatch.setattr(main, "engine", scratch_engine)
+
+    with pytest.raises(RuntimeError, match=f"version {HEAD - 1}, code expects {HEAD}"):
+        main.check_schema_version()
+
+    upgrade(scratch_engine)
+    main.check_schema_version()
+
+
+def test_ready_reports_pending_migrations(client, scratch_engine, monkeypatch):
+    upgrade(scratch_engine, target=HEAD - 1)
+    scratch_async = create_async_engine(scratch_engine.url.set(drivername="sqlite+aiosqlite"))
+    monkeypatch.setattr(main, "async_engine", scratch_async)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "database unavailable"}
+
+    upgrade(scratch_engine)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
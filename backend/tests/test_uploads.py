@@ -0,0 +1,87 @@
+import pytest
+
+from app.services.uploads import format_size
+
+
+@pytest.mark.parametrize("num_bytes, expected", [
+    (10 * 1024 * 1024, "10 MB"),
+    (1536 * 1024, "1.5 MB"),
+    (512 * 1024, "512 KB"),
+    (1536, "1.5 KB"),
+    (200, "200 bytes"),
+])
+def test_upload_limits_are_formatted_in_a_fitting_unit(num_bytes, expected):
+    assert format_size(num_bytes) == expected
+
+
+def test_reference_changes_stamp_updated_at_in_utc(db, tmp_path, monkeypatch):
+    from datetime import datetime, timedelta
+
+    from app.config import settings
+    from app.models.upload import UploadBlob
+    from app.services.uploads import add_reference, content_path, content_url, release_reference
+    from conftest import record_statements
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    sha256 = "ab" + "0" * 62
+    content_path(sha256, ".png").parent.mkdir(parents=True)
+    content_path(sha256, ".png").write_bytes(b"\x89PNG\r\n\x1a\n")
+    url = content_url(sha256, ".png")
+
+    # gc_uploads compares with utcnow(): the database's NOW() (server time zone) must not be used
+    with record_statements() as statements:
+        add_reference(db, url)
+        add_reference(db, url)
+        release_reference(db, url)
+    writes = [s for s in statements if s.startswith(("INSERT INTO upload_blobs", "UPDATE upload_blobs"))]
+    assert len(writes) == 3
+    assert all("updated_at" in s and "CURRENT_TIMESTAMP" not in s for s in writes)
+
+    blob = db.query(UploadBlob).filter(UploadBlob.sha256 == sha256).one()
+    assert blob.ref_count == 1
+    assert abs(blob.updated_at - datetime.utcnow()) < timedelta(seconds=5)
+    db.rollback()
+
+
+def test_oversized_multipart_body_is_refused_before_it_is_read(client, monkeypatch):
+    from app.config import settings
+    from app.services.uploads import UploadSizeLimit
+
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1024)
+    body = b"x" * (UploadSizeLimit.limit() + 1)
+
+    response = client.post("/api/v1/settlements", files={"receipt": ("r.png", body, "image/png")})
+
+    assert response.status_code == 413
+
+
+def test_chunked_multipart_body_is_cut_off_while_streaming(monkeypatch):
+    import asyncio
+
+    from fastapi import HTTPException
+
+    from app.config import settings
+    from app.services.uploads import UploadSizeLimit
+
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1024)
+    chunk = b"x" * 1024
+    chunks_total = 100
+    sent = []
+
+    async def receive():
+        sent.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": len(sent) < chunks_total}
+
+    async def app(scope, receive, send):
+        while (await receive())["more_body"]:
+            pass
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "headers": [(b"content-type", b"multipart/form-data; boundary=x")]}
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(UploadSizeLimit(app)(scope, receive, send))
+
+    assert error.value.status_code == 413
+    assert len(sent) * len(chunk) <= UploadSizeLimit.limit() + len(chunk)